@@ -1,35 +1,98 @@
+import asyncio
 import json
 import os
 import time
-from typing import Any, Dict
+from contextlib import asynccontextmanager
+from typing import AbstractSet, Any, AsyncIterable, AsyncIterator, Callable, Dict, FrozenSet, Iterable, List, Optional
 
 import httpx
-from fastapi import Depends, FastAPI, Header, HTTPException, Request
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_fastapi_instrumentator import Instrumentator
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 from slowapi.util import get_remote_address
 
-from ru_mapper.mapping import map_to_ru
-from ru_mapper.schema import ExtractedListing, RUListing, Photo
-from scraper.extractor import extract_from_html
-from scraper.enrich import collect_images, collect_amenities
+from ru_mapper.mapping import map_to_ru, ru_source_fields
+from ru_mapper.schema import (
+    EXTRACTED_FIELD_ALIASES,
+    RU_FIELD_ALIASES,
+    ExtractedListing,
+    RUListing,
+    select_fields,
+)
+from scraper.artifacts import save_html, store as artifact_store
+from scraper.anti_bot import looks_blocked
+from scraper.breakers import breaker, breakers_stats
+from scraper.changes import (
+    ChangeRecord,
+    ChangeTracker,
+    conditional_fetch,
+    content_hash,
+    diff_listings,
+    field_fingerprints,
+    room_id_from_url,
+    tracked_fields,
+)
+from scraper.extractor import extract_from_html, extract_from_next_data, parse_next_data
+from scraper.hedge import HedgedFetcher
+from scraper.photos import DimensionProber, probe_enabled
+from scraper.politeness import controller as politeness
+from scraper.proxy_pool import listing_session_key, proxy_pool, set_proxy_session
+from scraper.robots import RobotsDisallowed, robots
+from scraper.scheduler import BULK, clamp_priority, set_render_request
+from scraper.search import SearchExpansion
+from scraper.state import ResultCache, state_backend
+from scraper.enrich import EnrichmentOrchestrator, PatchCallback
 from scraper.utils import (
     find_first_listing_like,
     normalize_airbnb_url,
     canonicalize_airbnb_url,
 )
+from service.compression import CompressionMiddleware
+from service.responses import EventStreamResponse, NDJSONResponse, dumps, sse_event
+from service.warmup import WarmupState
 
-APP = FastAPI(title="AIR-scrappy API", version="0.1.0")
+WARMUP = WarmupState.from_env()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Warm the matcher and browser in the background; /readyz flips once done
+    task = asyncio.create_task(WARMUP.run())
+    try:
+        yield
+    finally:
+        task.cancel()
+        await artifact_store().close()
+        try:
+            from scraper.browser import BrowserManager
+
+            await BrowserManager.instance().stop()
+        except Exception:
+            pass
+
+
+APP = FastAPI(title="AIR-scrappy API", version="0.1.0", lifespan=lifespan)
 
 # Env
 API_KEY = os.getenv("API_KEY")
 ALLOWED_ORIGINS = [o.strip() for o in os.getenv("ALLOWED_ORIGINS", "http://localhost:5173,http://localhost:5174,http://localhost:5175").split(",") if o.strip()]
 RATE_LIMIT = os.getenv("RATE_LIMIT", "60/minute")
+STATE_BACKEND_URL = os.getenv("STATE_BACKEND_URL", "")
+# Share rate-limit counters across workers when a Redis state backend is configured
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI") or (
+    STATE_BACKEND_URL if STATE_BACKEND_URL.startswith(("redis://", "rediss://")) else "memory://"
+)
+EXTRACT_CACHE_TTL = float(os.getenv("EXTRACT_CACHE_TTL", "0"))
 PLAYWRIGHT_TIMEOUT = int(os.getenv("PLAYWRIGHT_TIMEOUT", "15"))
+BATCH_MAX_URLS = int(os.getenv("BATCH_MAX_URLS", "100"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+SEARCH_MAX_PAGES = int(os.getenv("SEARCH_MAX_PAGES", "15"))
+SEARCH_MAX_LISTINGS = int(os.getenv("SEARCH_MAX_LISTINGS", "300"))
+SEARCH_PAGE_CONCURRENCY = int(os.getenv("SEARCH_PAGE_CONCURRENCY", "3"))
 
 # CORS
 APP.add_middleware(
@@ -41,11 +104,27 @@ APP.add_middleware(
 )
 
 # Rate limiting
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(key_func=get_remote_address, storage_uri=RATE_LIMIT_STORAGE_URI)
 APP.state.limiter = limiter
 APP.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 APP.add_middleware(SlowAPIMiddleware)
 
+
+@APP.exception_handler(RobotsDisallowed)
+async def robots_disallowed_handler(request: Request, exc: RobotsDisallowed) -> Response:
+    return Response(dumps({"detail": str(exc)}), status_code=403, media_type="application/json")
+
+
+# Compression (gzip, plus br/zstd when installed), negotiated per request
+APP.add_middleware(CompressionMiddleware, **CompressionMiddleware.options_from_env())
+
+# Shared state: result cache and in-flight dedupe
+EXTRACT_CACHE = ResultCache(state_backend(), "extract", ttl_s=EXTRACT_CACHE_TTL)
+CHANGES = ChangeTracker.from_env(state_backend())
+PHOTO_PROBER = DimensionProber.from_env(state_backend())
+HEDGER = HedgedFetcher.from_env()
+ENRICHER = EnrichmentOrchestrator.from_env(PHOTO_PROBER if probe_enabled() else None)
+
 # Metrics
 Instrumentator().instrument(APP).expose(APP, endpoint="/metrics", include_in_schema=False)
 
@@ -54,32 +133,70 @@ class UrlInput(BaseModel):
     url: str
 
 
+class ExtractInput(UrlInput):
+    # Projection: only these fields are extracted, enriched and returned (default: all)
+    fields: Optional[List[str]] = None
+
+
 def require_api_key(x_api_key: str | None = Header(default=None)) -> None:
     if API_KEY and x_api_key != API_KEY:
         raise HTTPException(status_code=401, detail="Invalid API key")
 
 
+async def render_priority(
+    request: Request,
+    x_render_priority: str | None = Header(default=None),
+    x_api_key: str | None = Header(default=None),
+) -> None:
+    # Interactive (frontend) vs bulk (imports) traffic class for the render scheduler;
+    # quotas are per API key, falling back to the client address
+    set_render_request(clamp_priority(x_render_priority), x_api_key or get_remote_address(request))
+
+
+async def bulk_render_priority(
+    request: Request,
+    x_render_priority: str | None = Header(default=None),
+    x_api_key: str | None = Header(default=None),
+) -> None:
+    # Batch endpoints always queue as bulk: the header cannot claim the interactive weight here
+    set_render_request(clamp_priority(x_render_priority, BULK), x_api_key or get_remote_address(request))
+
+
 @APP.get("/healthz")
 async def healthz() -> Dict[str, Any]:
     # Report Playwright/browser status if available
     browser_ok = False
     contexts = 0
+    concurrency: Dict[str, Any] = {}
     try:
         from scraper.browser import BrowserManager  # type: ignore
 
         mgr = BrowserManager.instance()
-        browser = getattr(mgr, "_browser", None)
-        if browser is not None:
-            browser_ok = True
-            try:
-                contexts = len(browser.contexts)
-            except Exception:
-                contexts = 0
+        concurrency = mgr.stats()
+        browser_ok = concurrency["browser"]["connected"]
+        contexts = concurrency["browser"]["contexts"]
     except Exception:
         # Playwright not installed or browser not started
         browser_ok = False
         contexts = 0
-    return {"status": "ok", "browser": browser_ok, "contexts": contexts}
+    return {
+        "status": "ok",
+        "browser": browser_ok,
+        "contexts": contexts,
+        "concurrency": concurrency,
+        "proxies": proxy_pool().stats(),
+        "hedge": HEDGER.stats(),
+        "breakers": breakers_stats(),
+        "robots": robots().stats(),
+        "politeness": politeness().stats(),
+    }
+
+
+@APP.get("/readyz")
+async def readyz() -> Response:
+    # Readiness (not liveness): 503 until the warm-up has finished
+    state = WARMUP.stats()
+    return Response(dumps(state), status_code=200 if state["ready"] else 503, media_type="application/json")
 
 
 # Alias under /api for frontend proxy convenience
@@ -90,15 +207,9 @@ async def healthz_api() -> Dict[str, Any]:
 
 @APP.get("/robots-check")
 async def robots_check(url: str) -> Dict[str, Any]:
-    # Warn-only compliance helper
+    # Served from the per-host policy cache the fetch pipelines consult
     try:
-        from urllib.parse import urlparse
-
-        p = urlparse(url)
-        robots = f"{p.scheme}://{p.netloc}/robots.txt"
-        async with httpx.AsyncClient(timeout=10) as client:
-            r = await client.get(robots)
-            return {"robots_url": robots, "status": r.status_code, "snippet": r.text[:500]}
+        return await robots().check(url)
     except Exception as e:
         return {"error": str(e)}
 
@@ -112,148 +223,458 @@ async def robots_check_api(url: str) -> Dict[str, Any]:
 async def fetch_html_with_playwright(url: str) -> str | None:
     try:
         from scraper.browser import render_and_get_next_data, render_and_get_html
-    except Exception:
+    except ImportError:
         return None
     try:
-        # First try NEXT_DATA
-        json_text = await render_and_get_next_data(url, timeout_s=PLAYWRIGHT_TIMEOUT)
-        if json_text:
-            try:
-                nd = json.loads(json_text)
-                if find_first_listing_like(nd):
-                    return f'<script id="__NEXT_DATA__" type="application/json">{json_text}</script>'
-            except Exception:
-                pass
-
-        # Fallback to HTML and attempt to find a PDP link if needed
-        html = await render_and_get_html(url, timeout_s=PLAYWRIGHT_TIMEOUT)
-        if '/rooms/' not in url:
-            import re
-            m = re.search(r'https?://[^"\s]+/rooms/\d+', html)
-            if m:
-                next_url = m.group(0)
-                jt2 = await render_and_get_next_data(next_url, timeout_s=PLAYWRIGHT_TIMEOUT)
-                if jt2:
-                    try:
-                        nd2 = json.loads(jt2)
-                        if find_first_listing_like(nd2):
-                            return f'<script id="__NEXT_DATA__" type="application/json">{jt2}</script>'
-                    except Exception:
-                        pass
-                # As last resort, return the HTML of the PDP
-                html2 = await render_and_get_html(next_url, timeout_s=PLAYWRIGHT_TIMEOUT)
-                return html2
-        return html
+        async with breaker("playwright").guard() as call:
+            html = await _render_listing(url, render_and_get_next_data, render_and_get_html)
+            if not html or looks_blocked(None, html):
+                call.fail()
+            return html
     except Exception:
+        # Counted by the breaker (or rejected while it is open); the httpx path carries the request
         return None
 
 
-async def fetch_html_with_httpx(url: str) -> str:
-    async with httpx.AsyncClient(timeout=PLAYWRIGHT_TIMEOUT) as client:
-        resp = await client.get(url)
-        resp.raise_for_status()
-        return resp.text
+async def _render_listing(url: str, render_next_data: Any, render_html: Any) -> str:
+    # First try NEXT_DATA
+    json_text = await render_next_data(url, timeout_s=PLAYWRIGHT_TIMEOUT)
+    if json_text and _has_listing_json(json_text):
+        return f'<script id="__NEXT_DATA__" type="application/json">{json_text}</script>'
+
+    # Fallback to HTML and attempt to find a PDP link if needed
+    html = await render_html(url, timeout_s=PLAYWRIGHT_TIMEOUT)
+    if '/rooms/' not in url:
+        import re
+        m = re.search(r'https?://[^"\s]+/rooms/\d+', html)
+        if m:
+            next_url = m.group(0)
+            jt2 = await render_next_data(next_url, timeout_s=PLAYWRIGHT_TIMEOUT)
+            if jt2 and _has_listing_json(jt2):
+                return f'<script id="__NEXT_DATA__" type="application/json">{jt2}</script>'
+            # As last resort, return the HTML of the PDP
+            return await render_html(next_url, timeout_s=PLAYWRIGHT_TIMEOUT)
+    return html
+
+
+def _has_listing_json(json_text: str) -> bool:
+    try:
+        return bool(find_first_listing_like(json.loads(json_text)))
+    except ValueError:
+        return False
 
 
-@APP.post("/api/extract")
-@limiter.limit(RATE_LIMIT)
-async def api_extract(payload: UrlInput, request: Request, _: None = Depends(require_api_key)) -> ExtractedListing:
-    start = time.time()
-    url = normalize_airbnb_url(payload.url)
+async def fetch_html_with_httpx(url: str) -> str:
+    ctl = politeness()
+    await ctl.acquire(url)
+    async with breaker("httpx").guard() as call:
+        async with httpx.AsyncClient(timeout=PLAYWRIGHT_TIMEOUT) as client:
+            try:
+                resp = await client.get(url)
+            except httpx.HTTPError:
+                ctl.observe(url, error=True)
+                raise
+        ctl.observe(url, status=resp.status_code, body=resp.text, retry_after=resp.headers.get("retry-after"))
+        # A 404 is the listing's problem, not the fetch path's
+        if resp.status_code >= 500 or looks_blocked(resp.status_code, resp.text):
+            call.fail()
+    resp.raise_for_status()
+    return resp.text
+
+
+async def resolve_listing_url(raw_url: str) -> str:
+    url = normalize_airbnb_url(raw_url)
     if "/rooms/" not in url:
         try:
-            url = await canonicalize_airbnb_url(url)
+            async with breaker("canonicalize").guard():
+                url = await canonicalize_airbnb_url(url, strict=True)
         except Exception:
+            # Counted by the breaker; unresolved short links still go through the browser path's PDP hop
             pass
+    return url
 
-    html = await fetch_html_with_playwright(url)
-    if not html:
-        html = await fetch_html_with_httpx(url)
 
-    listing = extract_from_html(html, url=url)
-    # Enrichment: collect images and amenities via Playwright when initial parse is weak
+def parse_fields(fields: Any, ru: bool = False) -> Optional[FrozenSet[str]]:
     try:
-        if len(listing.photos) < 5:
-            imgs = await collect_images(url, max_images=int(os.getenv("MAX_IMAGES", "25")), wait_seconds=1.0)
-            if imgs:
-                listing.photos = [
-                    Photo(url=i) for i in imgs[: int(os.getenv("MAX_IMAGES", "25"))]
-                ]
-        if not listing.amenities_raw and not listing.amenities_normalized:
-            ams = await collect_amenities(url, wait_seconds=1.0)
-            if ams:
-                listing.amenities_raw = ams
-                from ru_mapper.amenities import normalize_amenities as _norm
-
-                listing.amenities_normalized = _norm(ams)
-    except Exception:
-        pass
-    duration_ms = int((time.time() - start) * 1000)
-    return listing
+        if ru:
+            return select_fields(fields, RUListing, RU_FIELD_ALIASES)
+        return select_fields(fields, ExtractedListing, EXTRACTED_FIELD_ALIASES)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def project(model: BaseModel, fields: Optional[FrozenSet[str]]) -> Any:
+    if fields is None:
+        return model
+    return Response(model.model_dump_json(include=set(fields)), media_type="application/json")
+
+
+async def enrich_listing(
+    listing: ExtractedListing,
+    url: str,
+    fields: Optional[AbstractSet[str]] = None,
+    on_patch: Optional[PatchCallback] = None,
+) -> None:
+    # Images and amenities are collected concurrently when the initial parse is weak,
+    # skipping browser work for fields the caller did not ask for
+    await ENRICHER.run(listing, url, fields, on_patch=on_patch)
+
+
+def has_listing(html: str) -> bool:
+    next_data = parse_next_data(html)
+    return bool(next_data and find_first_listing_like(next_data))
+
+
+async def fetch_listing_html(url: str) -> str:
+    await robots().ensure_allowed(url)
+    set_proxy_session(listing_session_key(url))
+    # httpx first; Playwright joins after HEDGE_DELAY_S (or at once for hosts that need it)
+    return await HEDGER.fetch(url, fetch_html_with_httpx, fetch_html_with_playwright, has_listing)
+
+
+def listing_cache_key(url: str, enrich: bool, fields: Optional[AbstractSet[str]]) -> str:
+    return f"{int(enrich)}:{url}" if fields is None else f"{int(enrich)}:{','.join(sorted(fields))}:{url}"
+
+
+async def load_listing(raw_url: str, enrich: bool = True, fields: Optional[AbstractSet[str]] = None) -> ExtractedListing:
+    return await load_resolved_listing(await resolve_listing_url(raw_url), enrich, fields)
+
+
+async def scrape_listing(
+    url: str,
+    enrich: bool = True,
+    fields: Optional[AbstractSet[str]] = None,
+    on_listing: Optional[Callable[[ExtractedListing], None]] = None,
+    on_patch: Optional[PatchCallback] = None,
+) -> str:
+    """Fetch, extract and (optionally) enrich one resolved URL; the EXTRACT_CACHE producer."""
+    html = await fetch_listing_html(url)
+    listing = extract_from_html(html, url=url, fields=fields)
+    # Keep the page when extraction came back empty; sample the rest
+    ok = bool(listing.title) or (fields is not None and "title" not in fields)
+    save_html(html, url, tag="ok" if ok else "extract-miss", ok=ok)
+    if on_listing is not None:
+        on_listing(listing)
+    if enrich:
+        await enrich_listing(listing, url, fields, on_patch)
+    return listing.model_dump_json()
+
+
+async def load_resolved_listing(url: str, enrich: bool = True, fields: Optional[AbstractSet[str]] = None) -> ExtractedListing:
+    # ``url`` already went through resolve_listing_url; no second canonicalization round trip
+    # Identical concurrent requests share one scrape; finished ones are cached for EXTRACT_CACHE_TTL
+    raw = await EXTRACT_CACHE.get_or_compute(
+        listing_cache_key(url, enrich, fields), lambda: scrape_listing(url, enrich, fields)
+    )
+    return ExtractedListing.model_validate_json(raw)
+
+
+@APP.post("/api/extract")
+@limiter.limit(RATE_LIMIT)
+async def api_extract(payload: ExtractInput, request: Request, _: None = Depends(require_api_key), __: None = Depends(render_priority)) -> ExtractedListing:
+    fields = parse_fields(payload.fields)
+    return project(await load_listing(payload.url, fields=fields), fields)
 
 
 @APP.get("/api/extract")
 @limiter.limit(RATE_LIMIT)
-async def api_extract_get(url: str, request: Request, _: None = Depends(require_api_key)) -> ExtractedListing:
-    # Convenience GET endpoint for manual testing
-    start = time.time()
-    url = normalize_airbnb_url(url)
-    if "/rooms/" not in url:
-        try:
-            url = await canonicalize_airbnb_url(url)
-        except Exception:
-            pass
-    html = await fetch_html_with_playwright(url)
-    if not html:
-        html = await fetch_html_with_httpx(url)
-    listing = extract_from_html(html, url=url)
-    _ = int((time.time() - start) * 1000)
-    return listing
+async def api_extract_get(url: str, request: Request, fields: Optional[str] = None, _: None = Depends(require_api_key), __: None = Depends(render_priority)) -> ExtractedListing:
+    # Convenience GET endpoint for manual testing; fields is comma-separated
+    selected = parse_fields(fields)
+    return project(await load_listing(url, enrich=False, fields=selected), selected)
 
 
 @APP.post("/api/map/rentals-united")
 @limiter.limit(RATE_LIMIT)
-async def api_map_ru(payload: UrlInput, request: Request, _: None = Depends(require_api_key)) -> RUListing:
-    url = normalize_airbnb_url(payload.url)
-    if "/rooms/" not in url:
-        try:
-            url = await canonicalize_airbnb_url(url)
-        except Exception:
-            pass
-    html = await fetch_html_with_playwright(url)
-    if not html:
-        html = await fetch_html_with_httpx(payload.url)
+async def api_map_ru(payload: ExtractInput, request: Request, _: None = Depends(require_api_key), __: None = Depends(render_priority)) -> RUListing:
+    fields = parse_fields(payload.fields, ru=True)
+    listing = await load_listing(payload.url, fields=ru_source_fields(fields))
+    return project(map_to_ru(listing, fields), fields)
+
+
+async def extract_events(raw_url: str, fields: Optional[FrozenSet[str]], to_ru: bool) -> AsyncIterator[bytes]:
+    # event: listing  -> the first parse (projected), sent before any enrichment
+    # event: patch    -> {"stage": "photos" | "amenities" | "ru", "patch": {...}} as each finishes
+    # event: error    -> {"error": "..."}; event: done -> {"stages": [...]} closes the stream
+    include = set(fields) if fields is not None else None
+    seq = 0
+
+    def event(name: str, data: bytes) -> bytes:
+        nonlocal seq
+        seq += 1
+        return sse_event(name, data, id=seq)
 
-    listing = extract_from_html(html, url=url)
-    # Enrichment similar to /api/extract
     try:
-        if len(listing.photos) < 5:
-            imgs = await collect_images(payload.url, max_images=int(os.getenv("MAX_IMAGES", "25")), wait_seconds=1.0)
-            if imgs:
-                listing.photos = [Photo(url=i) for i in imgs[: int(os.getenv("MAX_IMAGES", "25"))]]
-        if not listing.amenities_raw and not listing.amenities_normalized:
-            ams = await collect_amenities(payload.url, wait_seconds=1.0)
-            if ams:
-                listing.amenities_raw = ams
-                from ru_mapper.amenities import normalize_amenities as _norm
-
-                listing.amenities_normalized = _norm(ams)
-    except Exception:
-        pass
-    return map_to_ru(listing)
+        url = await resolve_listing_url(raw_url)
+        # Same producer and in-flight dedupe as /api/extract. When we start the
+        # scrape its first parse and patches are streamed as they happen; when we
+        # join one already running (or hit the cache) the finished listing is sent once.
+        updates: asyncio.Queue = asyncio.Queue()
+        task = asyncio.create_task(
+            EXTRACT_CACHE.get_or_compute(
+                listing_cache_key(url, True, fields),
+                lambda: scrape_listing(
+                    url,
+                    True,
+                    fields,
+                    on_listing=lambda listing: updates.put_nowait(("listing", listing)),
+                    on_patch=lambda stage, names: updates.put_nowait((stage, names)),
+                ),
+            )
+        )
+        task.add_done_callback(lambda _: updates.put_nowait(None))
+        listing: Optional[ExtractedListing] = None
+        stages: List[str] = []
+        try:
+            while (item := await updates.get()) is not None:
+                stage, value = item
+                if stage == "listing":
+                    listing = value
+                    yield event("listing", listing.model_dump_json(include=include).encode("utf-8"))
+                    continue
+                stages.append(stage)
+                patch = listing.model_dump(mode="json", include={n for n in value if include is None or n in include})
+                yield event("patch", dumps({"stage": stage, "patch": patch}))
+            # A failed fetch or enrichment surfaces here and becomes the error event
+            raw = await task
+        finally:
+            task.cancel()
+        if listing is None:
+            listing = ExtractedListing.model_validate_json(raw)
+            yield event("listing", listing.model_dump_json(include=include).encode("utf-8"))
+        if to_ru:
+            ru = map_to_ru(listing)
+            stages.append("ru")
+            yield event("patch", dumps({"stage": "ru", "patch": {"ru": ru.model_dump(mode="json")}}))
+        yield event("done", dumps({"stages": stages}))
+    except Exception as e:
+        yield event("error", dumps({"error": str(e) or type(e).__name__}))
+
+
+@APP.get("/api/extract/stream")
+@limiter.limit(RATE_LIMIT)
+async def api_extract_stream(url: str, request: Request, fields: Optional[str] = None, ru: bool = False, _: None = Depends(require_api_key), __: None = Depends(render_priority)) -> EventStreamResponse:
+    # Server-Sent Events (EventSource-friendly GET): core listing first, enrichments as patches
+    return EventStreamResponse(extract_events(url, parse_fields(fields), ru))
 
 
 @APP.get("/api/map/rentals-united")
 @limiter.limit(RATE_LIMIT)
-async def api_map_ru_get(url: str, request: Request, _: None = Depends(require_api_key)) -> RUListing:
-    url = normalize_airbnb_url(url)
-    if "/rooms/" not in url:
+async def api_map_ru_get(url: str, request: Request, fields: Optional[str] = None, _: None = Depends(require_api_key), __: None = Depends(render_priority)) -> RUListing:
+    selected = parse_fields(fields, ru=True)
+    listing = await load_listing(url, enrich=False, fields=ru_source_fields(selected))
+    return project(map_to_ru(listing, selected), selected)
+
+
+class BatchInput(BaseModel):
+    urls: List[str]
+    fields: Optional[List[str]] = None
+    # Return Rentals United listings instead of raw extractions (fields then name RU fields)
+    map: bool = False
+
+
+async def extract_batch_lines(
+    urls: AsyncIterable[str] | Iterable[str], fields: Optional[FrozenSet[str]], to_ru: bool
+) -> AsyncIterator[bytes]:
+    # URLs may arrive while earlier ones are already extracting (search expansion)
+    sem = asyncio.Semaphore(max(1, BATCH_CONCURRENCY))
+    include = set(fields) if fields is not None else None
+
+    async def one(index: int, url: str) -> bytes:
+        head = {"index": index, "url": url}
         try:
-            url = await canonicalize_airbnb_url(url)
-        except Exception:
-            pass
-    html = await fetch_html_with_playwright(url)
-    if not html:
-        html = await fetch_html_with_httpx(url)
-    listing = extract_from_html(html, url=url)
-    return map_to_ru(listing)
+            async with sem:
+                if to_ru:
+                    listing = await load_listing(url, fields=ru_source_fields(fields))
+                    result = map_to_ru(listing, fields).model_dump_json(include=include)
+                else:
+                    result = (await load_listing(url, fields=fields)).model_dump_json(include=include)
+        except Exception as e:
+            return dumps({**head, "ok": False, "error": str(e) or type(e).__name__}) + b"\n"
+        # Splice the pydantic-serialized result in rather than round-tripping it through a dict
+        return dumps({**head, "ok": True})[:-1] + b',"result":' + result.encode("utf-8") + b"}\n"
+
+    done: asyncio.Queue = asyncio.Queue()
+    tasks: List[asyncio.Task] = []
+
+    async def feed() -> int:
+        source = urls if hasattr(urls, "__aiter__") else _aiter(urls)
+        async for url in source:
+            task = asyncio.create_task(one(len(tasks), url))
+            task.add_done_callback(done.put_nowait)
+            tasks.append(task)
+        return len(tasks)
+
+    feeder = asyncio.create_task(feed())
+    yielded = 0
+    try:
+        while True:
+            if feeder.done() and yielded == feeder.result():
+                break
+            getter = asyncio.ensure_future(done.get())
+            await asyncio.wait({getter} if feeder.done() else {getter, feeder}, return_when=asyncio.FIRST_COMPLETED)
+            if not getter.done():
+                getter.cancel()
+                continue
+            yield getter.result().result()
+            yielded += 1
+    finally:
+        feeder.cancel()
+        for t in tasks:
+            t.cancel()
+
+
+async def _aiter(items: Iterable[str]) -> AsyncIterator[str]:
+    for item in items:
+        yield item
+
+
+@APP.post("/api/extract/batch")
+@limiter.limit(RATE_LIMIT)
+async def api_extract_batch(payload: BatchInput, request: Request, _: None = Depends(require_api_key), __: None = Depends(bulk_render_priority)) -> NDJSONResponse:
+    # NDJSON, one line per URL in completion order: {"index", "url", "ok", "result" | "error"}
+    if len(payload.urls) > BATCH_MAX_URLS:
+        raise HTTPException(status_code=422, detail=f"At most {BATCH_MAX_URLS} URLs per batch")
+    fields = parse_fields(payload.fields, ru=payload.map)
+    return NDJSONResponse(extract_batch_lines(payload.urls, fields, payload.map))
+
+
+class SearchInput(UrlInput):
+    fields: Optional[List[str]] = None
+    map: bool = False
+    max_pages: Optional[int] = Field(default=None, ge=1)
+    max_listings: Optional[int] = Field(default=None, ge=1)
+
+
+async def fetch_search_html(url: str) -> str:
+    # Search pages are rendered as-is: no hop to the first PDP link
+    await robots().ensure_allowed(url)
+    try:
+        from scraper.browser import render_and_get_html
+
+        async with breaker("playwright").guard() as call:
+            html = await render_and_get_html(url, timeout_s=PLAYWRIGHT_TIMEOUT)
+            if not html or looks_blocked(None, html):
+                call.fail()
+        if html:
+            return html
+    except Exception:
+        pass  # counted by the breaker; fall back to httpx
+    return await fetch_html_with_httpx(url)
+
+
+async def search_batch_lines(
+    expansion: SearchExpansion, fields: Optional[FrozenSet[str]], to_ru: bool
+) -> AsyncIterator[bytes]:
+    async for line in extract_batch_lines(expansion.run(fetch_search_html), fields, to_ru):
+        yield line
+    yield dumps({"summary": expansion.stats()}) + b"\n"
+
+
+@APP.post("/api/extract/search")
+@limiter.limit(RATE_LIMIT)
+async def api_extract_search(payload: SearchInput, request: Request, _: None = Depends(require_api_key), __: None = Depends(bulk_render_priority)) -> NDJSONResponse:
+    # Same NDJSON lines as /api/extract/batch, streamed while pagination is still being
+    # followed, then one {"summary": {...}} line with page/listing counts and page errors
+    fields = parse_fields(payload.fields, ru=payload.map)
+    expansion = SearchExpansion(
+        normalize_airbnb_url(payload.url),
+        max_pages=min(payload.max_pages or SEARCH_MAX_PAGES, SEARCH_MAX_PAGES),
+        max_listings=min(payload.max_listings or SEARCH_MAX_LISTINGS, SEARCH_MAX_LISTINGS),
+        concurrency=SEARCH_PAGE_CONCURRENCY,
+    )
+    return NDJSONResponse(search_batch_lines(expansion, fields, payload.map))
+
+
+class RescrapeInput(UrlInput):
+    map: bool = True
+
+
+class RescrapeResult(BaseModel):
+    room_id: Optional[str] = None
+    changed: bool
+    not_modified: bool = False
+    changed_fields: List[str] = Field(default_factory=list)
+    diff: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
+    listing: ExtractedListing
+    ru: Optional[RUListing] = None
+
+
+def _unchanged(rec: ChangeRecord, prev: ExtractedListing, want_ru: bool, not_modified: bool = False) -> RescrapeResult:
+    ru = map_to_ru(prev) if want_ru else None
+    return RescrapeResult(room_id=rec.room_id, changed=False, not_modified=not_modified, listing=prev, ru=ru)
+
+
+@APP.post("/api/rescrape")
+@limiter.limit(RATE_LIMIT)
+async def api_rescrape(payload: RescrapeInput, request: Request, _: None = Depends(require_api_key), __: None = Depends(render_priority)) -> RescrapeResult:
+    # Incremental re-scrape: skip extraction, normalization and mapping when the listing did not change
+    url = await resolve_listing_url(payload.url)
+    await robots().ensure_allowed(url)
+    room_id = room_id_from_url(url)
+    if not room_id:
+        listing = await load_resolved_listing(url)
+        return RescrapeResult(changed=True, listing=listing, ru=map_to_ru(listing) if payload.map else None)
+
+    rec = await CHANGES.get(room_id)
+    prev = rec.listing(url) if rec else None
+    etag = rec.etag if rec else None
+    last_modified = rec.last_modified if rec else None
+
+    # A plain conditional GET first: answers 304s for free, records validators
+    # for next time and skips the browser when the HTML already has __NEXT_DATA__
+    html: Optional[str] = None
+    try:
+        async with breaker("httpx").guard() as call:
+            status, body, new_etag, new_last_modified = await conditional_fetch(url, etag, last_modified, PLAYWRIGHT_TIMEOUT)
+            if status >= 500 or looks_blocked(status, body):
+                call.fail()
+        if status == 304 and rec and prev:
+            await CHANGES.put(rec)
+            return _unchanged(rec, prev, payload.map, not_modified=True)
+        if status == 200:
+            etag, last_modified = new_etag, new_last_modified
+            if rec:
+                rec.etag, rec.last_modified = etag, last_modified
+            if body and parse_next_data(body):
+                html = body
+    except Exception:
+        pass  # counted by the httpx breaker; the full fetch below decides
+    if html is None:
+        html = await fetch_listing_html(url)
+
+    next_data = parse_next_data(html)
+    subtree = find_first_listing_like(next_data) if next_data else None
+    digest = content_hash(subtree) if subtree else None
+    if rec and prev and digest and digest == rec.content_hash:
+        await CHANGES.put(rec)
+        return _unchanged(rec, prev, payload.map)
+
+    listing = extract_from_next_data(next_data, url=url) if subtree else extract_from_html(html, url=url)
+    await enrich_listing(listing, url)
+    diff = diff_listings(prev, listing, rec.fingerprints if rec else None)
+    if rec and prev and not diff:
+        # Different payload bytes (or DOM fallback) but the same listing
+        rec.content_hash = digest or rec.content_hash
+        await CHANGES.put(rec)
+        return _unchanged(rec, prev, payload.map)
+
+    await CHANGES.put(
+        ChangeRecord(
+            room_id=room_id,
+            content_hash=digest,
+            fingerprints=field_fingerprints(listing),
+            etag=etag,
+            last_modified=last_modified,
+            fields=tracked_fields(listing),
+            changed_at=time.time(),
+        )
+    )
+    return RescrapeResult(
+        room_id=room_id,
+        changed=True,
+        changed_fields=sorted(diff),
+        diff=diff if prev else {},
+        listing=listing,
+        ru=map_to_ru(listing) if payload.map else None,
+    )
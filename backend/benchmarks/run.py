@@ -0,0 +1,150 @@
+"""Offline benchmarks for the parsing and mapping hot paths.
+
+    python -m benchmarks.run --out bench.json
+    python -m benchmarks.run --quick --compare bench.json
+
+Timings are wall-clock per call; peak memory is measured in a separate
+traced run so tracemalloc overhead does not skew the timings.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ru_mapper.amenities import normalize_amenities
+from ru_mapper.mapping import map_to_ru
+from scraper.extractor import extract_from_html, extract_from_next_data
+from scraper.html_fallback import extract_from_html_fallback
+
+from .synth import make_amenity_list, make_next_data, make_pdp_html
+
+SIZES = {"100KB": 100_000, "1MB": 1_000_000, "10MB": 10_000_000}
+QUICK_SIZES = {"100KB": 100_000, "1MB": 1_000_000}
+
+Case = Tuple[str, Callable[[], Any], int]
+
+
+def _cases(sizes: Dict[str, int]) -> List[Case]:
+    cases: List[Case] = []
+    for label, n in sizes.items():
+        html = make_pdp_html(n)
+        cases.append((f"extract_from_html/{label}", lambda h=html: extract_from_html(h, url="https://bench/rooms/1"), len(html)))
+        nd = make_next_data(n)
+        nd_bytes = len(json.dumps(nd))
+        cases.append((f"extract_from_next_data/{label}", lambda d=nd: extract_from_next_data(d, url="https://bench/rooms/1"), nd_bytes))
+        fb = make_pdp_html(n, with_next_data=False)
+        cases.append((f"extract_from_html_fallback/{label}", lambda h=fb: extract_from_html_fallback(h, url="https://bench/rooms/1"), len(fb)))
+    for count in (20, 100, 500):
+        items = make_amenity_list(count, seed=count)
+        cases.append((f"normalize_amenities/{count}", lambda a=items: normalize_amenities(a), count))
+    listing = extract_from_next_data(make_next_data(100_000), url="https://bench/rooms/1")
+    cases.append(("map_to_ru/listing", lambda ex=listing: map_to_ru(ex), 1))
+    return cases
+
+
+def _percentile(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    idx = min(len(sorted_vals) - 1, max(0, int(round(q * (len(sorted_vals) - 1)))))
+    return sorted_vals[idx]
+
+
+def bench(fn: Callable[[], Any], units: int, min_iters: int = 3, max_iters: int = 200, budget_s: float = 2.0) -> Dict[str, Any]:
+    fn()  # warm caches and lazy imports
+    times: List[float] = []
+    started = time.perf_counter()
+    while len(times) < max_iters and (len(times) < min_iters or time.perf_counter() - started < budget_s):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    times.sort()
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    mean = statistics.fmean(times)
+    return {
+        "iterations": len(times),
+        "mean_ms": round(mean * 1000, 4),
+        "p50_ms": round(_percentile(times, 0.50) * 1000, 4),
+        "p99_ms": round(_percentile(times, 0.99) * 1000, 4),
+        "ops_per_s": round(1.0 / mean, 2) if mean else None,
+        "units": units,
+        "units_per_s": round(units / mean, 2) if mean else None,
+        "peak_mem_bytes": peak,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run(sizes: Dict[str, int], budget_s: float, only: Optional[str] = None) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for name, fn, units in _cases(sizes):
+        if only and only not in name:
+            continue
+        results[name] = bench(fn, units, budget_s=budget_s)
+        r = results[name]
+        print(f"{name:42s} p50={r['p50_ms']:>10.3f}ms p99={r['p99_ms']:>10.3f}ms peak={r['peak_mem_bytes'] / 1e6:>8.2f}MB", file=sys.stderr)
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, float]:
+    """Ratio of current/baseline p50 per case (>1 means slower)."""
+    out: Dict[str, float] = {}
+    for name, r in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base and base.get("p50_ms"):
+            out[name] = round(r["p50_ms"] / base["p50_ms"], 3)
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--out", help="write results JSON here (default: stdout)")
+    ap.add_argument("--quick", action="store_true", help="skip the 10MB inputs")
+    ap.add_argument("--budget", type=float, default=2.0, help="seconds per case")
+    ap.add_argument("--only", help="run cases whose name contains this")
+    ap.add_argument("--compare", help="baseline results JSON to compare p50 against")
+    args = ap.parse_args(argv)
+
+    report = run(QUICK_SIZES if args.quick else SIZES, args.budget, args.only)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            report["compare"] = compare(report, json.load(f))
+        for name, ratio in report["compare"].items():
+            print(f"{name:42s} x{ratio}", file=sys.stderr)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import random
+from functools import lru_cache
+from typing import Any, Dict, List
+
+from ru_mapper.amenities import canonical_flat_list, synonyms_table
+
+_WORDS = (
+    "bright spacious cozy quiet central modern renovated historic charming sunny terrace view "
+    "kitchen balcony walk metro beach old town market cafe restaurants park river museum "
+    "family friendly perfect couples business travellers comfortable stylish minimalist"
+).split()
+
+_CITIES = [("Lisbon", "Portugal"), ("Porto", "Portugal"), ("Barcelona", "Spain"), ("Berlin", "Germany")]
+
+
+def _sentence(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(n)).capitalize() + "."
+
+
+def _photo(rng: random.Random, i: int) -> Dict[str, Any]:
+    pid = rng.randrange(10**8, 10**9)
+    return {
+        "url": f"https://a0.muscache.com/im/pictures/{pid}/{pid:x}_{i}.jpg?im_w=1200",
+        "width": rng.choice([720, 1024, 1200, 1440]),
+        "height": rng.choice([480, 683, 800, 960]),
+        "caption": _sentence(rng, 5),
+    }
+
+
+@lru_cache(maxsize=1)
+def _amenity_pool() -> List[str]:
+    return list(canonical_flat_list()) + list(synonyms_table().keys())
+
+
+def make_amenity_list(n: int = 60, noise: float = 0.3, seed: int = 0) -> List[str]:
+    """Amenity labels as scraped: synonyms, canonical names, casing/spacing noise and junk."""
+    rng = random.Random(seed)
+    pool = _amenity_pool()
+    junk = ["Unavailable: Carbon monoxide alarm", "Show all 54 amenities", "Exterior security cameras on property"]
+    out: List[str] = []
+    for _ in range(n):
+        item = rng.choice(pool)
+        r = rng.random()
+        if r < noise / 3:
+            item = item.upper()
+        elif r < 2 * noise / 3:
+            item = f"  {item}  \t"
+        elif r < noise:
+            # Single-character typo
+            pos = rng.randrange(len(item))
+            item = item[:pos] + rng.choice("abcdefghijklmnopqrstuvwxyz") + item[pos + 1:]
+        if rng.random() < noise / 4:
+            item = rng.choice(junk)
+        out.append(item)
+    return out
+
+
+def make_listing(rng: random.Random, photos: int = 40, amenities: int = 60) -> Dict[str, Any]:
+    city, country = rng.choice(_CITIES)
+    return {
+        "id": str(rng.randrange(10**6, 10**9)),
+        "name": _sentence(rng, 6),
+        "description": " ".join(_sentence(rng, 14) for _ in range(12)),
+        "address": {"city": city, "country": country, "lat": 38.7 + rng.random(), "lng": -9.1 + rng.random()},
+        "photos": [_photo(rng, i) for i in range(photos)],
+        "amenities": make_amenity_list(amenities, seed=rng.randrange(1 << 30)),
+        "bedrooms": rng.randint(1, 5),
+        "beds": rng.randint(1, 8),
+        "bathrooms": rng.choice([1, 1.5, 2, 3]),
+        "personCapacity": rng.randint(1, 12),
+        "propertyType": rng.choice(["Apartment", "Entire loft", "Townhouse", "Villa", "Guest suite"]),
+        "roomTypeCategory": rng.choice(["entire_place", "private_room"]),
+        "starRating": round(rng.uniform(3.5, 5.0), 2),
+        "pricingQuote": {"price": {"amount": rng.randint(40, 600), "currency": "EUR"}},
+        "host": {"name": "Host", "isSuperhost": rng.random() < 0.5, "responseRate": 100},
+    }
+
+
+def make_next_data(target_bytes: int = 100_000, seed: int = 0) -> Dict[str, Any]:
+    """A ``__NEXT_DATA__`` document of roughly ``target_bytes`` once serialized.
+
+    Real PDP payloads are dominated by reviews and similar listings around
+    the listing itself, so padding goes there.
+    """
+    rng = random.Random(seed)
+    listing = make_listing(rng)
+    reviews: List[Dict[str, Any]] = []
+    similar: List[Dict[str, Any]] = []
+    doc = {
+        "props": {"pageProps": {"listing": listing, "reviews": reviews, "similarListings": similar}},
+        "page": "/rooms/[id]",
+        "buildId": "bench",
+    }
+    size = len(json.dumps(doc))
+    while size < target_bytes:
+        if rng.random() < 0.7:
+            item: Dict[str, Any] = {"author": "Guest", "rating": rng.randint(3, 5), "comments": _sentence(rng, 40)}
+            reviews.append(item)
+        else:
+            item = make_listing(rng, photos=6, amenities=10)
+            similar.append(item)
+        size += len(json.dumps(item)) + 2
+    return doc
+
+
+def make_pdp_html(target_bytes: int = 100_000, seed: int = 0, with_next_data: bool = True) -> str:
+    """PDP HTML; with ``with_next_data=False`` only DOM content is available (fallback path)."""
+    rng = random.Random(seed)
+    head = f"<html><head><title>{_sentence(rng, 6)}</title><meta name=\"description\" content=\"{_sentence(rng, 20)}\"></head><body>"
+    parts: List[str] = [head]
+    size = len(head)
+    if with_next_data:
+        nd = json.dumps(make_next_data(int(target_bytes * 0.8), seed=seed))
+        script = f'<script id="__NEXT_DATA__" type="application/json">{nd}</script>'
+        parts.append(script)
+        size += len(script)
+    labels = make_amenity_list(200, seed=seed)
+    i = 0
+    while size < target_bytes:
+        if i % 5 == 0:
+            chunk = f'<img src="https://a0.muscache.com/im/pictures/{i}.jpg?im_w=720" alt="{_sentence(rng, 3)}">'
+        elif i % 5 == 1:
+            chunk = f'<ul class="amenities"><li>{rng.choice(labels)}</li></ul>'
+        else:
+            chunk = f"<div class=\"section\"><div><span>{_sentence(rng, 12)}</span></div></div>"
+        parts.append(chunk)
+        size += len(chunk)
+        i += 1
+    parts.append("</body></html>")
+    return "".join(parts)
@@ -0,0 +1,184 @@
+"""Closed-loop load driver for the API against the local mock site.
+
+    python -m loadtest.mock_site --port 8100 &
+    POLITE_RATE=1000 POLITE_MAX_RATE=1000 POLITE_BURST=1000 uvicorn app:APP --port 8000 &
+    python -m loadtest.driver --target http://127.0.0.1:8000 --site http://127.0.0.1:8100 \\
+        --concurrency 8 --requests 200 --out load.json
+
+Each worker keeps one request in flight. Browser RSS is sampled from
+/proc when ``--app-pid`` is given (same host), else from /healthz.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from scraper.concurrency import browser_rss_bytes
+
+ENDPOINTS = {
+    "extract": "/api/extract",
+    "map": "/api/map/rentals-united",
+}
+
+
+def _pct(sorted_vals: List[float], q: float) -> Optional[float]:
+    if not sorted_vals:
+        return None
+    return sorted_vals[min(len(sorted_vals) - 1, int(round(q * (len(sorted_vals) - 1))))]
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Counter] = {}
+        self.rss: List[int] = []
+
+    def add(self, endpoint: str, latency_s: float, status: str) -> None:
+        self.latencies.setdefault(endpoint, []).append(latency_s)
+        self.statuses.setdefault(endpoint, Counter())[status] += 1
+
+    def summary(self, wall_s: float) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"wall_s": round(wall_s, 3), "endpoints": {}}
+        total = 0
+        for ep, lat in self.latencies.items():
+            lat = sorted(lat)
+            total += len(lat)
+            statuses = self.statuses[ep]
+            errors = sum(n for s, n in statuses.items() if s != "200")
+            out["endpoints"][ep] = {
+                "requests": len(lat),
+                "throughput_rps": round(len(lat) / wall_s, 3) if wall_s else None,
+                "p50_ms": round(_pct(lat, 0.50) * 1000, 1),
+                "p90_ms": round(_pct(lat, 0.90) * 1000, 1),
+                "p99_ms": round(_pct(lat, 0.99) * 1000, 1),
+                "max_ms": round(lat[-1] * 1000, 1),
+                "error_rate": round(errors / len(lat), 4),
+                "statuses": dict(statuses),
+            }
+        out["requests"] = total
+        out["throughput_rps"] = round(total / wall_s, 3) if wall_s else None
+        if self.rss:
+            out["browser_rss_mb"] = {
+                "max": round(max(self.rss) / 1e6, 1),
+                "mean": round(sum(self.rss) / len(self.rss) / 1e6, 1),
+                "samples": len(self.rss),
+            }
+        return out
+
+
+async def _sample_rss(client: httpx.AsyncClient, target: str, rec: Recorder, app_pid: Optional[int], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        rss: Optional[int] = None
+        if app_pid:
+            rss = browser_rss_bytes(app_pid)
+        else:
+            try:
+                r = await client.get(f"{target}/healthz", timeout=5)
+                rss = (r.json().get("concurrency") or {}).get("rss_bytes")
+            except Exception:
+                rss = None
+        if rss:
+            rec.rss.append(rss)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=1.0)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    rec = Recorder()
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    headers = {"X-Render-Priority": args.priority}
+    if args.api_key:
+        headers["X-API-Key"] = args.api_key
+    remaining = args.requests
+    deadline = time.monotonic() + args.duration if args.duration else None
+    rng = random.Random(args.seed)
+
+    def next_job() -> Optional[tuple]:
+        nonlocal remaining
+        if deadline is not None:
+            if time.monotonic() >= deadline:
+                return None
+        elif remaining <= 0:
+            return None
+        remaining -= 1
+        room = rng.randrange(args.rooms)
+        path = f"/h/listing-{room}" if rng.random() < args.shortlink_ratio else f"/rooms/{room}"
+        return rng.choice(endpoints), f"{args.site}{path}"
+
+    async with httpx.AsyncClient(timeout=args.timeout, headers=headers, limits=httpx.Limits(max_connections=args.concurrency + 2)) as client:
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(_sample_rss(client, args.target, rec, args.app_pid, stop))
+
+        async def worker() -> None:
+            while True:
+                job = next_job()
+                if job is None:
+                    return
+                ep, url = job
+                t0 = time.perf_counter()
+                try:
+                    r = await client.post(f"{args.target}{ENDPOINTS[ep]}", json={"url": url})
+                    status = str(r.status_code)
+                except httpx.TimeoutException:
+                    status = "timeout"
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                rec.add(ep, time.perf_counter() - t0, status)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+        wall = time.perf_counter() - started
+        stop.set()
+        await sampler
+
+    report = rec.summary(wall)
+    report["config"] = {
+        "concurrency": args.concurrency,
+        "endpoints": endpoints,
+        "priority": args.priority,
+        "rooms": args.rooms,
+    }
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--target", default="http://127.0.0.1:8000", help="API base URL")
+    ap.add_argument("--site", default="http://127.0.0.1:8100", help="mock site base URL")
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--requests", type=int, default=100)
+    ap.add_argument("--duration", type=float, default=0.0, help="run for N seconds instead of --requests")
+    ap.add_argument("--endpoints", default="extract,map")
+    ap.add_argument("--rooms", type=int, default=1000, help="distinct listing ids to draw from")
+    ap.add_argument("--shortlink-ratio", type=float, default=0.1, help="fraction of /h/ short links")
+    ap.add_argument("--priority", default="bulk", choices=["interactive", "bulk"])
+    ap.add_argument("--api-key")
+    ap.add_argument("--timeout", type=float, default=120.0)
+    ap.add_argument("--app-pid", type=int, help="API process id for /proc RSS sampling")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", help="write JSON report here (default: stdout)")
+    args = ap.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(text, file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,198 @@
+"""Local Airbnb-like site for load tests; no real network involved.
+
+    python -m loadtest.mock_site --port 8100 --latency-ms 150 --error-rate 0.02
+
+Serves ``/rooms/<id>`` PDPs with ``__NEXT_DATA__``, ``/h/<slug>`` redirects,
+a lazy-loaded image gallery, an amenities modal, tiny image bytes and
+paginated ``/s/<place>/homes`` search pages.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import html as html_lib
+import json
+import os
+import random
+import zlib
+from dataclasses import dataclass
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, PlainTextResponse, RedirectResponse, Response
+from starlette.routing import Route
+
+from benchmarks.synth import make_listing
+
+# 1x1 PNG
+_PIXEL = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=="
+)
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    block_rate: float = 0.0
+    photos_in_next_data: int = 3
+    gallery_size: int = 30
+    amenities_in_next_data: bool = False
+    search_results: int = 90
+
+    @classmethod
+    def from_env(cls) -> "MockConfig":
+        return cls(
+            latency_ms=float(os.getenv("MOCK_LATENCY_MS", "0")),
+            jitter_ms=float(os.getenv("MOCK_JITTER_MS", "0")),
+            error_rate=float(os.getenv("MOCK_ERROR_RATE", "0")),
+            block_rate=float(os.getenv("MOCK_BLOCK_RATE", "0")),
+            photos_in_next_data=int(os.getenv("MOCK_PHOTOS", "3")),
+            gallery_size=int(os.getenv("MOCK_GALLERY", "30")),
+            amenities_in_next_data=os.getenv("MOCK_ND_AMENITIES", "0") == "1",
+            search_results=int(os.getenv("MOCK_SEARCH_RESULTS", "90")),
+        )
+
+
+def _room_id(slug: str) -> int:
+    return zlib.crc32(slug.encode("utf-8")) % 10**9
+
+
+def render_pdp(room_id: int, base: str, cfg: MockConfig, photo_tour: bool = False) -> str:
+    rng = random.Random(room_id)
+    listing = make_listing(rng, photos=cfg.photos_in_next_data)
+    for i, p in enumerate(listing["photos"]):
+        p["url"] = f"{base}/im/pictures/{room_id}_{i}.jpg?im_w=1200"
+    amenities = listing["amenities"]
+    if not cfg.amenities_in_next_data:
+        listing.pop("amenities")
+    next_data = {"props": {"pageProps": {"listing": listing}}, "page": "/rooms/[id]", "buildId": "mock"}
+
+    gallery = []
+    for i in range(cfg.gallery_size):
+        src = f"{base}/im/pictures/{room_id}_g{i}.jpg"
+        if photo_tour or i < 5:
+            gallery.append(f'<img src="{src}?im_w=720" srcset="{src}?im_w=720 720w, {src}?im_w=1200 1200w">')
+        else:
+            gallery.append(f'<img data-src="{src}?im_w=720" class="lazy">')
+    items = "".join(f"<li><div><span>{html_lib.escape(a.strip())}</span></div></li>" for a in amenities)
+    return f"""<!doctype html><html><head><title>{html_lib.escape(listing['name'])}</title>
+<meta name="description" content="{html_lib.escape(listing['description'][:150])}">
+<link rel="canonical" href="{base}/rooms/{room_id}"></head>
+<body>
+<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data)}</script>
+<h1>{html_lib.escape(listing['name'])}</h1>
+<section class="gallery">{''.join(gallery)}</section>
+<div style="height:3000px">{html_lib.escape(listing['description'])}</div>
+<button id="amenities-btn">Show all {len(amenities)} amenities</button>
+<div role="dialog" aria-label="Amenities" style="display:none"><ul>{items}</ul></div>
+<script>
+document.getElementById('amenities-btn').addEventListener('click', () => {{
+  document.querySelector("div[role='dialog']").style.display = 'block';
+}});
+window.addEventListener('scroll', () => {{
+  document.querySelectorAll('img.lazy').forEach(img => {{ img.src = img.dataset.src; img.classList.remove('lazy'); }});
+}});
+</script>
+</body></html>"""
+
+
+SEARCH_PAGE_SIZE = 18
+
+
+def render_search(place: str, offset: int, base: str, cfg: MockConfig) -> str:
+    ids = [_room_id(f"{place}-{i}") for i in range(offset, min(offset + SEARCH_PAGE_SIZE, cfg.search_results))]
+    cards = "".join(f'<div class="card"><a href="{base}/rooms/{rid}?check_in=2025-01-01">Home {rid}</a></div>' for rid in ids)
+    # Like the real pager: links to the next few pages only
+    pages = "".join(
+        f'<a href="/s/{place}/homes?items_offset={o}&amp;section_offset=2">{o // SEARCH_PAGE_SIZE + 1}</a>'
+        for o in range(offset + SEARCH_PAGE_SIZE, min(offset + 4 * SEARCH_PAGE_SIZE, cfg.search_results), SEARCH_PAGE_SIZE)
+    )
+    return f"<!doctype html><html><body><main>{cards}</main><nav aria-label='Search results pagination'>{pages}</nav></body></html>"
+
+
+def create_app(cfg: MockConfig | None = None) -> Starlette:
+    cfg = cfg or MockConfig.from_env()
+
+    async def inject() -> Response | None:
+        delay = cfg.latency_ms + random.uniform(0, cfg.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000.0)
+        r = random.random()
+        if r < cfg.error_rate:
+            return PlainTextResponse("upstream error", status_code=503)
+        if r < cfg.error_rate + cfg.block_rate:
+            return PlainTextResponse("Too Many Requests", status_code=429, headers={"Retry-After": "1"})
+        return None
+
+    def base_url(request: Request) -> str:
+        return str(request.base_url).rstrip("/")
+
+    async def rooms(request: Request) -> Response:
+        failed = await inject()
+        if failed is not None:
+            return failed
+        room_id = int(request.path_params["room_id"])
+        tour = request.query_params.get("modal") == "PHOTO_TOUR_SCROLLABLE"
+        return HTMLResponse(render_pdp(room_id, base_url(request), cfg, photo_tour=tour))
+
+    async def search(request: Request) -> Response:
+        failed = await inject()
+        if failed is not None:
+            return failed
+        offset = int(request.query_params.get("items_offset", "0"))
+        return HTMLResponse(render_search(request.path_params["place"], offset, base_url(request), cfg))
+
+    async def short_link(request: Request) -> Response:
+        room_id = _room_id(request.path_params["slug"])
+        return RedirectResponse(f"{base_url(request)}/rooms/{room_id}", status_code=302)
+
+    async def picture(request: Request) -> Response:
+        return Response(_PIXEL, media_type="image/png", headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
+    async def robots(request: Request) -> Response:
+        return PlainTextResponse("User-agent: *\nAllow: /\n")
+
+    return Starlette(
+        routes=[
+            Route("/rooms/{room_id:int}", rooms),
+            Route("/h/{slug}", short_link),
+            Route("/s/{place}/homes", search),
+            Route("/im/pictures/{name:path}", picture),
+            Route("/robots.txt", robots),
+        ]
+    )
+
+
+def main() -> None:
+    import uvicorn
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8100)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fraction of PDP responses that are 503")
+    ap.add_argument("--block-rate", type=float, default=0.0, help="fraction of PDP responses that are 429")
+    ap.add_argument("--photos", type=int, default=3, help="photos embedded in __NEXT_DATA__")
+    ap.add_argument("--gallery", type=int, default=30, help="images in the DOM gallery")
+    ap.add_argument("--next-data-amenities", action="store_true", help="embed amenities in __NEXT_DATA__")
+    ap.add_argument("--search-results", type=int, default=90, help="listings behind each /s/<place>/homes search")
+    args = ap.parse_args()
+    cfg = MockConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        block_rate=args.block_rate,
+        photos_in_next_data=args.photos,
+        gallery_size=args.gallery,
+        amenities_in_next_data=args.next_data_amenities,
+        search_results=args.search_results,
+    )
+    uvicorn.run(create_app(cfg), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 __all__ = [
     "amenities",
     "mapping",
+    "property_types",
     "schema",
 ]
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import os
 import re
 import unicodedata
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, List
-
-from rapidfuzz import fuzz, process
+from typing import Dict, Iterable, List, Optional
 
 DATA_DIR = Path(__file__).resolve().parent / "data"
 TAXONOMY_FILE = DATA_DIR / "amenities_taxonomy.json"
@@ -55,16 +56,103 @@ def canonical_flat_list() -> List[str]:
     return ordered_unique
 
 
-_CANONICAL = canonical_flat_list()
-_SYNONYMS = synonyms_table()
+class _Tables:
+    __slots__ = ("canonical", "canonical_set", "synonyms")
+
+    def __init__(self, canonical: List[str], synonyms: Dict[str, str]) -> None:
+        self.canonical = canonical
+        self.canonical_set = frozenset(canonical)
+        self.synonyms = synonyms
+
+
+def _source_stamp() -> str:
+    parts = []
+    for path in (TAXONOMY_FILE, SYNONYMS_FILE):
+        st = path.stat()
+        parts.append(f"{path.name}:{st.st_size}:{st.st_mtime_ns}")
+    return hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _cache_file(stamp: str) -> Optional[Path]:
+    # Only an app-owned directory: a shared temp dir would let other users plant the file
+    base = os.getenv("AMENITY_CACHE_DIR")
+    if not base:
+        return None
+    return Path(base) / f"air-scrappy-amenities-{stamp}.json"
+
+
+def _read_cache(cache: Path) -> Optional[_Tables]:
+    try:
+        with cache.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        canonical, synonyms = data["canonical"], data["synonyms"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if not isinstance(canonical, list) or not isinstance(synonyms, dict):
+        return None
+    return _Tables([str(c) for c in canonical], {str(k): str(v) for k, v in synonyms.items()})
+
+
+@lru_cache(maxsize=1)
+def tables() -> _Tables:
+    """Canonical list and normalized synonyms, built on first use.
+
+    When AMENITY_CACHE_DIR is set the compiled form is written there as JSON,
+    keyed by the data files' size and mtime, so later processes skip
+    normalization. Without it nothing is cached on disk.
+    """
+    try:
+        cache = _cache_file(_source_stamp())
+    except OSError:
+        cache = None
+    if cache is not None and cache.exists():
+        cached = _read_cache(cache)
+        if cached is not None:
+            return cached
+    canonical, synonyms = canonical_flat_list(), synonyms_table()
+    if cache is not None:
+        try:
+            cache.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            tmp = cache.with_suffix(f".{os.getpid()}.tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump({"canonical": canonical, "synonyms": synonyms}, f)
+            tmp.replace(cache)
+        except OSError:
+            pass
+    return _Tables(canonical, synonyms)
+
+
+@lru_cache(maxsize=4096)
+def _fuzzy_match(key: str) -> Optional[str]:
+    from rapidfuzz import fuzz, process  # deferred: only needed for non-exact items
+
+    match = process.extractOne(
+        key,
+        tables().canonical,
+        scorer=fuzz.token_set_ratio,
+        score_cutoff=88,
+    )
+    if match:
+        best, score, _ = match
+        if score >= 88:
+            return best
+    return None
+
+
+def warm_up() -> None:
+    """Build the tables and load the fuzzy matcher ahead of the first request."""
+    t = tables()
+    if t.canonical:
+        _fuzzy_match(normalize_text(t.canonical[0]))
 
 
 def _pre_map_synonyms(raw_items: Iterable[str]) -> List[str]:
+    synonyms = tables().synonyms
     mapped: List[str] = []
     for item in raw_items:
         key = normalize_text(item)
-        if key in _SYNONYMS:
-            mapped.append(_SYNONYMS[key])
+        if key in synonyms:
+            mapped.append(synonyms[key])
         else:
             mapped.append(item)
     return mapped
@@ -74,6 +162,7 @@ def normalize_amenities(raw_list: Iterable[str]) -> List[str]:
     if raw_list is None:
         return []
 
+    t = tables()
     # First, apply explicit synonyms mapping
     pre_mapped = _pre_map_synonyms(raw_list)
 
@@ -81,21 +170,14 @@ def normalize_amenities(raw_list: Iterable[str]) -> List[str]:
     results = set()
     for item in pre_mapped:
         # If already canonical, accept
-        if item in _CANONICAL:
+        if item in t.canonical_set:
             results.add(item)
             continue
         key = normalize_text(item)
-        if key in _SYNONYMS:
-            results.add(_SYNONYMS[key])
+        if key in t.synonyms:
+            results.add(t.synonyms[key])
             continue
-        match = process.extractOne(
-            key,
-            _CANONICAL,
-            scorer=fuzz.token_set_ratio,
-            score_cutoff=88,
-        )
-        if match:
-            best, score, _ = match
-            if score >= 88:
-                results.add(best)
+        best = _fuzzy_match(key)
+        if best:
+            results.add(best)
     return sorted(results)
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import AbstractSet, Any, Dict, FrozenSet, Iterable, List, Optional
 
 from .amenities import normalize_amenities
+from .property_types import classify_many, classify_property_type, classify_room_type
 from .schema import (
     Address,
     ExtractedListing,
@@ -12,69 +13,58 @@ from .schema import (
 )
 
 
-_ROOM_TYPE_MAP = {
-    "entire_place": RURoomType.ENTIRE_PLACE,
-    "entire home/apt": RURoomType.ENTIRE_PLACE,
-    "private_room": RURoomType.PRIVATE_ROOM,
-    "private room": RURoomType.PRIVATE_ROOM,
-    "shared_room": RURoomType.SHARED_ROOM,
-    "shared room": RURoomType.SHARED_ROOM,
-    "hotel_room": RURoomType.HOTEL_ROOM,
-    "hotel room": RURoomType.HOTEL_ROOM,
-}
-
-
 def map_room_type_to_ru(room_type_raw: Optional[str]) -> Optional[RURoomType]:
-    if not room_type_raw:
-        return None
-    key = room_type_raw.strip().lower()
-    return _ROOM_TYPE_MAP.get(key)
+    return classify_room_type(room_type_raw)
 
 
 def map_property_type_to_ru(property_type_raw: Optional[str]) -> RUPropertyType:
-    if not property_type_raw:
-        return RUPropertyType.OTHER
-    key = property_type_raw.strip().lower()
-    if any(k in key for k in ["apartment", "apt", "flat"]):
-        return RUPropertyType.APARTMENT
-    # Check more specific types before broader ones to avoid false matches
-    if any(k in key for k in ["townhouse", "townhome"]):
-        return RUPropertyType.TOWNHOUSE
-    if any(k in key for k in ["house", "home"]):
-        return RUPropertyType.HOUSE
-    if "villa" in key:
-        return RUPropertyType.VILLA
-    if any(k in key for k in ["bungalow"]):
-        return RUPropertyType.BUNGALOW
-    if any(k in key for k in ["condo", "condominium"]):
-        return RUPropertyType.CONDO
-    if any(k in key for k in ["hotel"]):
-        return RUPropertyType.HOTEL
-    if any(k in key for k in ["hostel"]):
-        return RUPropertyType.HOSTEL
-    if any(k in key for k in ["guesthouse", "guest house"]):
-        return RUPropertyType.GUESTHOUSE
-    return RUPropertyType.OTHER
+    # Keyword rules and their priorities live in data/property_types.json
+    return classify_property_type(property_type_raw)
+
+
+def map_property_types_to_ru(property_types_raw: Iterable[Optional[str]]) -> List[RUPropertyType]:
+    return classify_many(property_types_raw)
+
+
+# RU field -> (ExtractedListing fields it reads, how to build it)
+_RU_FIELDS: Dict[str, tuple] = {
+    "property_name": ({"title"}, lambda ex: ex.title),
+    "description": ({"description"}, lambda ex: ex.description),
+    "property_type": ({"property_type_raw"}, lambda ex: map_property_type_to_ru(ex.property_type_raw)),
+    "room_type": ({"room_type_raw"}, lambda ex: map_room_type_to_ru(ex.room_type_raw)),
+    "bedrooms": ({"bedrooms"}, lambda ex: ex.bedrooms),
+    "beds": ({"beds"}, lambda ex: ex.beds),
+    "bathrooms": ({"bathrooms"}, lambda ex: ex.bathrooms),
+    "max_guests": ({"max_guests"}, lambda ex: ex.max_guests),
+    "address": ({"address"}, lambda ex: Address(**ex.address.model_dump())),
+    "photos": ({"photos"}, lambda ex: list(ex.photos)),
+    "amenities": (
+        {"amenities_raw"},
+        lambda ex: normalize_amenities(ex.amenities_raw or ex.amenities_normalized),
+    ),
+    "amenities_raw": ({"amenities_raw"}, lambda ex: list(ex.amenities_raw)),
+    "currency": ({"currency"}, lambda ex: ex.currency),
+    "base_price": ({"base_price"}, lambda ex: ex.base_price),
+    "host": ({"host"}, lambda ex: ex.host),
+    "source": ({"source"}, lambda ex: ex.source),
+    "canonical_url": ({"canonical_url"}, lambda ex: ex.canonical_url),
+    "fetched_at": ({"fetched_at"}, lambda ex: ex.fetched_at),
+}
+
+
+def ru_source_fields(ru_fields: Optional[AbstractSet[str]]) -> Optional[FrozenSet[str]]:
+    """ExtractedListing fields needed to build the given RU fields (None means all)."""
+    if ru_fields is None:
+        return None
+    out = set()
+    for name in ru_fields:
+        out |= _RU_FIELDS[name][0]
+    return frozenset(out)
 
 
-def map_to_ru(extracted: ExtractedListing) -> RUListing:
-    return RUListing(
-        property_name=extracted.title,
-        description=extracted.description,
-        property_type=map_property_type_to_ru(extracted.property_type_raw),
-        room_type=map_room_type_to_ru(extracted.room_type_raw),
-        bedrooms=extracted.bedrooms,
-        beds=extracted.beds,
-        bathrooms=extracted.bathrooms,
-        max_guests=extracted.max_guests,
-        address=Address(**extracted.address.model_dump()),
-        photos=list(extracted.photos),
-        amenities=normalize_amenities(extracted.amenities_raw or extracted.amenities_normalized),
-        amenities_raw=list(extracted.amenities_raw),
-        currency=extracted.currency,
-        base_price=extracted.base_price,
-        host=extracted.host,
-        source=extracted.source,
-        canonical_url=extracted.canonical_url,
-        fetched_at=extracted.fetched_at,
-    )
+def map_to_ru(extracted: ExtractedListing, fields: Optional[AbstractSet[str]] = None) -> RUListing:
+    values: Dict[str, Any] = {}
+    for name, (_, build) in _RU_FIELDS.items():
+        if fields is None or name in fields:
+            values[name] = build(extracted)
+    return RUListing(**values)
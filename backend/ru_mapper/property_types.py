@@ -0,0 +1,122 @@
+"""Property and room type classification driven by ``data/property_types.json``.
+
+Property type keywords are compiled once into an Aho-Corasick automaton, so
+a label is scanned in a single pass however many keywords there are. Every
+keyword found in the label is a candidate and the rule with the highest
+``priority`` wins, which keeps e.g. "townhouse" from falling into "house"
+without depending on the order of checks. Room types are exact aliases.
+"""
+from __future__ import annotations
+
+import json
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .amenities import DATA_DIR, normalize_text
+from .schema import RUPropertyType, RURoomType
+
+TYPES_FILE = DATA_DIR / "property_types.json"
+
+_NO_MATCH: Tuple[int, Optional[RUPropertyType]] = (-1, None)
+
+
+class KeywordAutomaton:
+    """Aho-Corasick matcher returning the highest-priority value among all keyword hits."""
+
+    __slots__ = ("_goto", "_fail", "_best")
+
+    def __init__(self, keywords: Iterable[Tuple[str, int, RUPropertyType]]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._best: List[Tuple[int, Optional[RUPropertyType]]] = [_NO_MATCH]
+        for word, priority, value in keywords:
+            state = 0
+            for ch in word:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = self._goto[state][ch] = len(self._goto)
+                    self._goto.append({})
+                    self._best.append(_NO_MATCH)
+                state = nxt
+            if priority > self._best[state][0]:
+                self._best[state] = (priority, value)
+        # Breadth-first failure links; each state's best also covers the keywords
+        # that end at its suffixes, so matching never walks the fail chain for output
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                if self._best[self._fail[nxt]][0] > self._best[nxt][0]:
+                    self._best[nxt] = self._best[self._fail[nxt]]
+                queue.append(nxt)
+
+    def best(self, text: str) -> Optional[RUPropertyType]:
+        goto, fail, best = self._goto, self._fail, self._best
+        state, found = 0, _NO_MATCH
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if best[state][0] > found[0]:
+                found = best[state]
+        return found[1]
+
+
+class _Rules:
+    __slots__ = ("automaton", "room_types")
+
+    def __init__(self, automaton: KeywordAutomaton, room_types: Dict[str, RURoomType]) -> None:
+        self.automaton = automaton
+        self.room_types = room_types
+
+
+@lru_cache(maxsize=1)
+def rules() -> _Rules:
+    with TYPES_FILE.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    keywords = [
+        (normalize_text(word), int(rule["priority"]), RUPropertyType(rule["type"]))
+        for rule in data["property_types"]
+        for word in rule["keywords"]
+    ]
+    room_types = {
+        normalize_text(alias): RURoomType(value)
+        for value, aliases in data["room_types"].items()
+        for alias in aliases
+    }
+    return _Rules(KeywordAutomaton(keywords), room_types)
+
+
+@lru_cache(maxsize=4096)
+def _classify_property(key: str) -> RUPropertyType:
+    return rules().automaton.best(key) or RUPropertyType.OTHER
+
+
+def classify_property_type(raw: Optional[str]) -> RUPropertyType:
+    if not raw:
+        return RUPropertyType.OTHER
+    return _classify_property(normalize_text(raw))
+
+
+def classify_many(raws: Iterable[Optional[str]]) -> List[RUPropertyType]:
+    """Property types for a batch of raw labels; repeated labels are classified once."""
+    seen: Dict[Optional[str], RUPropertyType] = {}
+    out: List[RUPropertyType] = []
+    for raw in raws:
+        value = seen.get(raw)
+        if value is None:
+            value = seen[raw] = classify_property_type(raw)
+        out.append(value)
+    return out
+
+
+def classify_room_type(raw: Optional[str]) -> Optional[RURoomType]:
+    if not raw:
+        return None
+    return rules().room_types.get(normalize_text(raw))
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional
+from typing import Dict, FrozenSet, Iterable, List, Optional, Type, Union
 
 from pydantic import BaseModel, Field
 
@@ -93,3 +93,47 @@ class RUListing(BaseModel):
     source: str = "airbnb"
     canonical_url: Optional[str] = None
     fetched_at: datetime = Field(default_factory=lambda: datetime.utcnow())
+
+
+# Shorthand names accepted in ``fields=`` projections
+EXTRACTED_FIELD_ALIASES: Dict[str, FrozenSet[str]] = {
+    "amenities": frozenset({"amenities_raw", "amenities_normalized"}),
+    "capacity": frozenset({"bedrooms", "beds", "bathrooms", "max_guests"}),
+    "price": frozenset({"currency", "base_price"}),
+    "types": frozenset({"property_type_raw", "room_type_raw"}),
+}
+
+RU_FIELD_ALIASES: Dict[str, FrozenSet[str]] = {
+    "capacity": frozenset({"bedrooms", "beds", "bathrooms", "max_guests"}),
+    "price": frozenset({"currency", "base_price"}),
+    "types": frozenset({"property_type", "room_type"}),
+}
+
+
+def select_fields(
+    fields: Union[str, Iterable[str], None],
+    model: Type[BaseModel],
+    aliases: Optional[Dict[str, FrozenSet[str]]] = None,
+) -> Optional[FrozenSet[str]]:
+    """Resolve a ``fields=`` projection to model field names; None selects everything.
+
+    Accepts a comma-separated string or an iterable; raises ValueError on unknown names.
+    """
+    if fields is None:
+        return None
+    names = fields.split(",") if isinstance(fields, str) else list(fields)
+    out = set()
+    unknown = []
+    for name in names:
+        name = name.strip()
+        if not name:
+            continue
+        if aliases and name in aliases:
+            out |= aliases[name]
+        elif name in model.model_fields:
+            out.add(name)
+        else:
+            unknown.append(name)
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+    return frozenset(out) if out else None
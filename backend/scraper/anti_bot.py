@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import json
 import os
 import random
@@ -31,14 +30,9 @@ def choose_user_agent() -> str:
     return random.choice(pool)
 
 
-def get_proxy_config() -> Optional[Dict[str, Any]]:
-    proxy = os.getenv("HTTP_PROXY") or os.getenv("HTTPS_PROXY")
-    if proxy:
-        return {"server": proxy}
-    return None
-
-
-def build_context_kwargs() -> Dict[str, Any]:
+def build_context_kwargs(
+    proxy: Optional[Dict[str, Any]] = None, storage_state: Optional[str] = None
+) -> Dict[str, Any]:
     ua = choose_user_agent()
     opts: Dict[str, Any] = {
         "user_agent": ua,
@@ -52,14 +46,40 @@ def build_context_kwargs() -> Dict[str, Any]:
             "Referer": "https://www.google.com/",
         },
     }
-    proxy = get_proxy_config()
+    # The caller's pool choice stands, including "no proxy": choosing again would skew in-flight counts
     if proxy:
         opts["proxy"] = proxy
+    if storage_state:
+        # Cookies/localStorage from a captured profile (see profiles.py)
+        opts["storage_state"] = storage_state
     return opts
 
 
-async def jitter_delay(min_ms: int = 600, max_ms: int = 1500) -> None:
-    await asyncio.sleep(random.uniform(min_ms, max_ms) / 1000.0)
+_CHALLENGE_MARKERS = (
+    "px-captcha",
+    "cf-chl-",
+    "/cdn-cgi/challenge-platform",
+    "please verify you are a human",
+    "access to this page has been denied",
+    "unusual traffic from your",
+)
+# Captcha widgets also appear on normal pages (e.g. the login modal), so they only
+# count on a page that is nothing but the widget: a short page without app data
+_WIDGET_MARKERS = ("g-recaptcha", "h-captcha")
+_INTERSTITIAL_MAX_CHARS = 20000
+
+
+def looks_blocked(status: Optional[int], body: Optional[str] = None) -> bool:
+    # Rate limited or served a bot challenge instead of content
+    if status in (403, 429):
+        return True
+    if body:
+        head = body[:_INTERSTITIAL_MAX_CHARS].lower()
+        if any(m in head for m in _CHALLENGE_MARKERS):
+            return True
+        if any(m in head for m in _WIDGET_MARKERS):
+            return status == 503 or (len(body) < _INTERSTITIAL_MAX_CHARS and "__next_data__" not in head)
+    return False
 
 
 async def enable_request_blocking(page) -> None:
@@ -69,10 +89,18 @@ async def enable_request_blocking(page) -> None:
         "segment", "amplitude", "mixpanel", "hotjar", "optimizely", "criteo",
     )
 
+    from .subresources import serve_cached
+
     async def on_route(route):
         url = route.request.url.lower()
         if any(b in url for b in blocked):
             return await route.abort()
+        # Static JS/CSS/fonts come from the shared disk cache when possible
+        try:
+            if await serve_cached(route):
+                return None
+        except Exception:
+            pass
         return await route.continue_()
 
     try:
@@ -1,12 +1,35 @@
+"""Debug artifacts (HTML, screenshots) written off the event loop.
+
+Captures are queued and written by a background task in a worker thread,
+compressed, sampled (failures always, successes at ``ARTIFACT_SAMPLE_RATE``),
+indexed by room id in ``index.jsonl`` and pruned by age and total size.
+"""
 from __future__ import annotations
 
+import asyncio
+import gzip
+import json
 import os
+import random
+import threading
 import time
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional
+
+from prometheus_client import Counter
+
+try:  # optional
+    import zstandard  # type: ignore
+except ImportError:  # pragma: no cover - depends on environment
+    zstandard = None
 
 ARTIFACT_DIR = Path(os.getenv("ARTIFACT_DIR", "/tmp/artifacts")).resolve()
-ARTIFACT_DIR.mkdir(parents=True, exist_ok=True)
+INDEX_NAME = "index.jsonl"
+
+_WRITTEN = Counter("scrappy_artifacts_written_total", "Artifacts written to disk", ["kind"])
+_DROPPED = Counter("scrappy_artifacts_dropped_total", "Artifacts not written", ["reason"])
+_PRUNED = Counter("scrappy_artifacts_pruned_total", "Artifacts removed by retention")
 
 
 def _ts() -> str:
@@ -18,18 +41,236 @@ def safe_slug(url: str) -> str:
     return ("".join(keep)).strip("-")[:120]
 
 
-def save_html(html: str, url: str, tag: str = "error") -> Path:
-    name = f"{_ts()}_{tag}_{safe_slug(url)}.html"
-    path = ARTIFACT_DIR / name
-    path.write_text(html or "", encoding="utf-8")
-    return path
+@dataclass
+class ArtifactEntry:
+    file: str
+    kind: str
+    tag: str
+    url: str
+    room_id: Optional[str]
+    bytes: int
+    created_at: float
+
+
+@dataclass
+class _Job:
+    data: bytes
+    kind: str
+    ext: str
+    tag: str
+    url: str
+    room_id: Optional[str]
+    compress: bool
+
+
+class ArtifactStore:
+    def __init__(
+        self,
+        root: Path = ARTIFACT_DIR,
+        max_bytes: int = 500 * 1024 * 1024,
+        max_age_s: float = 7 * 86400,
+        sample_rate: float = 0.01,
+        queue_size: int = 256,
+        compression: str = "auto",
+        max_item_bytes: int = 5 * 1024 * 1024,
+    ) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.sample_rate = sample_rate
+        self.queue_size = queue_size
+        if compression == "auto":
+            compression = "zstd" if zstandard is not None else "gzip"
+        if compression == "zstd" and zstandard is None:
+            compression = "gzip"
+        self.compression = compression
+        self.max_item_bytes = max_item_bytes
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._io_lock = threading.Lock()
+        self._bytes_since_prune = 0
+
+    @classmethod
+    def from_env(cls) -> "ArtifactStore":
+        return cls(
+            root=ARTIFACT_DIR,
+            max_bytes=int(float(os.getenv("ARTIFACT_MAX_MB", "500")) * 1024 * 1024),
+            max_age_s=float(os.getenv("ARTIFACT_MAX_AGE_DAYS", "7")) * 86400,
+            sample_rate=float(os.getenv("ARTIFACT_SAMPLE_RATE", "0.01")),
+            queue_size=int(os.getenv("ARTIFACT_QUEUE", "256")),
+            compression=os.getenv("ARTIFACT_COMPRESSION", "auto"),
+            max_item_bytes=int(float(os.getenv("ARTIFACT_MAX_ITEM_MB", "5")) * 1024 * 1024),
+        )
+
+    def should_capture(self, ok: bool) -> bool:
+        return not ok or random.random() < self.sample_rate
+
+    def submit(
+        self,
+        data: bytes,
+        url: str,
+        kind: str,
+        ext: str,
+        tag: str = "error",
+        room_id: Optional[str] = None,
+        compress: bool = True,
+    ) -> bool:
+        """Queue a capture without blocking; False when dropped."""
+        if len(data) > self.max_item_bytes:
+            _DROPPED.labels("too_large").inc()
+            return False
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        try:
+            self._queue.put_nowait(_Job(data, kind, ext, tag, url, room_id, compress))
+        except asyncio.QueueFull:
+            _DROPPED.labels("queue_full").inc()
+            return False
+        return True
+
+    async def flush(self) -> None:
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self) -> None:
+        await self.flush()
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        while True:
+            job = await self._queue.get()
+            try:
+                await asyncio.to_thread(self._write, job)
+            except Exception:
+                _DROPPED.labels("io_error").inc()
+            finally:
+                self._queue.task_done()
+
+    def _encode(self, job: _Job) -> tuple:
+        if not job.compress or self.compression == "none":
+            return job.data, job.ext
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=3).compress(job.data), f"{job.ext}.zst"
+        return gzip.compress(job.data, compresslevel=6), f"{job.ext}.gz"
+
+    def _write(self, job: _Job) -> ArtifactEntry:
+        data, ext = self._encode(job)
+        name = f"{_ts()}_{job.tag}_{safe_slug(job.url)}_{random.getrandbits(24):06x}.{ext}"
+        with self._io_lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            (self.root / name).write_bytes(data)
+            entry = ArtifactEntry(name, job.kind, job.tag, job.url, job.room_id, len(data), time.time())
+            with open(self.root / INDEX_NAME, "a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(entry)) + "\n")
+            self._bytes_since_prune += len(data)
+            # Prune every ~5% of the budget rather than on every write
+            if self._bytes_since_prune >= max(1, self.max_bytes // 20):
+                self._prune_locked()
+        _WRITTEN.labels(job.kind).inc()
+        return entry
+
+    def prune(self) -> int:
+        with self._io_lock:
+            return self._prune_locked()
+
+    def _prune_locked(self) -> int:
+        """Drop files older than max_age_s, then oldest first until under max_bytes."""
+        self._bytes_since_prune = 0
+        if not self.root.exists():
+            return 0
+        files = []
+        for p in self.root.iterdir():
+            if p.name == INDEX_NAME or not p.is_file():
+                continue
+            st = p.stat()
+            files.append((st.st_mtime, st.st_size, p))
+        files.sort(key=lambda t: (t[0], t[2].name))
+        cutoff = time.time() - self.max_age_s
+        total = sum(size for _, size, _ in files)
+        removed = set()
+        for mtime, size, p in files:
+            if mtime >= cutoff and total <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+            removed.add(p.name)
+            total -= size
+        if removed:
+            self._rewrite_index(lambda e: e.get("file") not in removed)
+            _PRUNED.inc(len(removed))
+        return len(removed)
+
+    def _rewrite_index(self, keep) -> None:
+        path = self.root / INDEX_NAME
+        if not path.exists():
+            return
+        lines = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    if keep(json.loads(line)):
+                        lines.append(line)
+                except ValueError:
+                    continue
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text("".join(lines), encoding="utf-8")
+        tmp.replace(path)
+
+    def lookup(self, room_id: str) -> List[Dict[str, Any]]:
+        """Index entries for a room id, oldest first."""
+        path = self.root / INDEX_NAME
+        if not path.exists():
+            return []
+        out = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("room_id") == room_id:
+                    out.append(entry)
+        return out
+
+
+_store: Optional[ArtifactStore] = None
+
+
+def store() -> ArtifactStore:
+    global _store
+    if _store is None:
+        _store = ArtifactStore.from_env()
+    return _store
+
+
+def _room_id(url: str) -> Optional[str]:
+    from .changes import room_id_from_url
+
+    return room_id_from_url(url)
+
+
+def save_html(html: str, url: str, tag: str = "error", ok: bool = False) -> bool:
+    """Queue an HTML capture (failures always, successes sampled); never blocks."""
+    s = store()
+    if not s.should_capture(ok):
+        return False
+    return s.submit((html or "").encode("utf-8"), url, "html", "html", tag=tag, room_id=_room_id(url))
 
 
-async def save_screenshot(page, url: str, tag: str = "error") -> Optional[Path]:
+async def save_screenshot(page, url: str, tag: str = "error", ok: bool = False) -> bool:
+    s = store()
+    if not s.should_capture(ok):
+        return False
     try:
-        name = f"{_ts()}_{tag}_{safe_slug(url)}.png"
-        path = ARTIFACT_DIR / name
-        await page.screenshot(path=path)
-        return path
+        # Viewport-only JPEG keeps captures small; already compressed, so stored as-is
+        data = await page.screenshot(type="jpeg", quality=60, full_page=False)
     except Exception:
-        return None
+        return False
+    return s.submit(data, url, "screenshot", "jpg", tag=tag, room_id=_room_id(url), compress=False)
@@ -0,0 +1,201 @@
+"""Per-stage circuit breakers so incidents fail fast instead of waiting out timeouts.
+
+Each stage (``playwright``, ``httpx``, ``canonicalize``, ``images``,
+``amenities``) keeps a rolling window of call outcomes and latencies. When
+the error rate or the slow-call rate over the window crosses its threshold
+the breaker opens and calls are rejected with :class:`CircuitOpen` for
+``open_s``. It then goes half-open and lets a few probe calls through; a
+successful probe closes it, a failed one re-opens it.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+
+from .scheduler import QueueTimeout
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+_STATE = Gauge("scrappy_breaker_state", "Circuit state per stage (0 closed, 1 half-open, 2 open)", ["stage"])
+_CALLS = Counter("scrappy_breaker_calls_total", "Calls through a circuit breaker by outcome", ["stage", "outcome"])
+_TRANSITIONS = Counter("scrappy_breaker_transitions_total", "Circuit state changes", ["stage", "state"])
+
+# Local overload (no browser slot in time) says nothing about the stage itself
+NEUTRAL_ERRORS: Tuple[type, ...] = (QueueTimeout,)
+
+# Calls slower than this count against the slow-call rate
+STAGE_SLOW_S = {
+    "playwright": 20.0,
+    "httpx": 10.0,
+    "canonicalize": 8.0,
+    "images": 25.0,
+    "amenities": 15.0,
+}
+
+
+class CircuitOpen(Exception):
+    def __init__(self, stage: str, retry_in_s: float) -> None:
+        super().__init__(f"{stage} circuit open, retry in {retry_in_s:.0f}s")
+        self.stage = stage
+        self.retry_in_s = retry_in_s
+
+
+class _Call:
+    __slots__ = ("failed",)
+
+    def __init__(self) -> None:
+        self.failed = False
+
+    def fail(self) -> None:
+        """Count this call as a failure even though it did not raise (e.g. a challenge page)."""
+        self.failed = True
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        stage: str,
+        window_s: float = 60.0,
+        min_calls: int = 10,
+        error_rate: float = 0.5,
+        slow_call_s: Optional[float] = None,
+        slow_rate: float = 0.8,
+        open_s: float = 30.0,
+        half_open_probes: int = 1,
+    ) -> None:
+        self.stage = stage
+        self.window_s = window_s
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_s = slow_call_s
+        self.slow_rate = slow_rate
+        self.open_s = open_s
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self._window: Deque[Tuple[float, bool, bool]] = deque()
+        self._opened_at = 0.0
+        self._probes = 0
+        _STATE.labels(stage).set(0)
+
+    @classmethod
+    def from_env(cls, stage: str) -> "CircuitBreaker":
+        return cls(
+            stage,
+            window_s=float(os.getenv("BREAKER_WINDOW_S", "60")),
+            min_calls=int(os.getenv("BREAKER_MIN_CALLS", "10")),
+            error_rate=float(os.getenv("BREAKER_ERROR_RATE", "0.5")),
+            slow_call_s=STAGE_SLOW_S.get(stage),
+            slow_rate=float(os.getenv("BREAKER_SLOW_RATE", "0.8")),
+            open_s=float(os.getenv("BREAKER_OPEN_S", "30")),
+        )
+
+    def _set(self, state: str) -> None:
+        if state != self.state:
+            self.state = state
+            _STATE.labels(self.stage).set(_STATE_VALUES[state])
+            _TRANSITIONS.labels(self.stage, state).inc()
+
+    def _trim(self, now: float) -> None:
+        cutoff = now - self.window_s
+        while self._window and self._window[0][0] < cutoff:
+            self._window.popleft()
+
+    def allow(self) -> bool:
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.open_s:
+                return False
+            self._set(HALF_OPEN)
+            self._probes = 0
+        if self.state == HALF_OPEN:
+            if self._probes >= self.half_open_probes:
+                return False
+            self._probes += 1
+        return True
+
+    def forget(self) -> None:
+        """Release an allowed call that ended without an outcome (cancelled)."""
+        if self.state == HALF_OPEN:
+            self._probes = max(0, self._probes - 1)
+
+    def record(self, ok: bool, latency_s: float = 0.0) -> None:
+        now = time.monotonic()
+        slow = self.slow_call_s is not None and latency_s > self.slow_call_s
+        _CALLS.labels(self.stage, "error" if not ok else "slow" if slow else "ok").inc()
+        if self.state == HALF_OPEN:
+            self._probes = max(0, self._probes - 1)
+            if ok and not slow:
+                self._window.clear()
+                self._set(CLOSED)
+            else:
+                self._open(now)
+            return
+        if self.state == OPEN:
+            return  # a straggler from before the breaker opened
+        self._window.append((now, ok, slow))
+        self._trim(now)
+        n = len(self._window)
+        if n < self.min_calls:
+            return
+        errors = sum(1 for _, good, _ in self._window if not good)
+        slows = sum(1 for _, _, s in self._window if s)
+        if errors / n >= self.error_rate or slows / n >= self.slow_rate:
+            self._open(now)
+
+    def _open(self, now: float) -> None:
+        self._opened_at = now
+        self._window.clear()
+        self._set(OPEN)
+
+    def retry_in(self) -> float:
+        return max(0.0, self.open_s - (time.monotonic() - self._opened_at)) if self.state == OPEN else 0.0
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[_Call]:
+        """Run one call through the breaker; raises :class:`CircuitOpen` when rejected."""
+        if not self.allow():
+            _CALLS.labels(self.stage, "rejected").inc()
+            raise CircuitOpen(self.stage, self.retry_in())
+        call = _Call()
+        started = time.monotonic()
+        try:
+            yield call
+        except (asyncio.CancelledError, *NEUTRAL_ERRORS):
+            # A cancelled call (e.g. a hedge loser) or a local queue timeout says nothing
+            # about the stage's health
+            self.forget()
+            raise
+        except Exception:
+            self.record(False, time.monotonic() - started)
+            raise
+        self.record(not call.failed, time.monotonic() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        n = len(self._window)
+        return {
+            "state": self.state,
+            "calls": n,
+            "errors": sum(1 for _, good, _ in self._window if not good),
+            "slow": sum(1 for _, _, s in self._window if s),
+            "retry_in_s": round(self.retry_in(), 1),
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def breaker(stage: str) -> CircuitBreaker:
+    b = _breakers.get(stage)
+    if b is None:
+        b = _breakers[stage] = CircuitBreaker.from_env(stage)
+    return b
+
+
+def breakers_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: b.stats() for name, b in sorted(_breakers.items())}
@@ -2,12 +2,33 @@ from __future__ import annotations
 
 import asyncio
 import os
+import time
 from contextlib import asynccontextmanager
-from typing import AsyncIterator
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict
 
-from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+from prometheus_client import Counter
 
-from .anti_bot import build_context_kwargs, enable_request_blocking, jitter_delay
+from .anti_bot import build_context_kwargs, enable_request_blocking, looks_blocked
+from .artifacts import save_html, save_screenshot
+from .concurrency import AdaptiveLimiter
+from .politeness import controller as politeness
+from .profiles import ProfileLease, profiles, report_navigation, reset_current_lease, set_current_lease
+from .proxy_pool import (
+    current_proxy,
+    current_proxy_session,
+    playwright_proxy,
+    proxy_pool,
+    reset_current_proxy,
+    set_current_proxy,
+)
+from .scheduler import RenderScheduler, current_render_request
+from .watchdog import BrowserWatchdog
+
+if TYPE_CHECKING:  # playwright is imported on first start(), not at app import
+    from playwright.async_api import Browser, BrowserContext, Page
+
+
+_RESTARTS = Counter("scrappy_browser_restarts_total", "Browser relaunches", ["reason"])
 
 
 class BrowserManager:
@@ -16,8 +37,17 @@ class BrowserManager:
     def __init__(self, max_contexts: int = 3) -> None:
         self._playwright = None
         self._browser: Browser | None = None
-        self._sem = asyncio.Semaphore(max_contexts)
+        self._limiter = AdaptiveLimiter.from_env(initial=max_contexts)
+        self._scheduler = RenderScheduler.from_env(self._limiter)
         self._lock = asyncio.Lock()
+        self._watchdog = BrowserWatchdog.from_env(self)
+        self._generation = 0
+        self._launched_at: float | None = None
+        # Contexts open per browser generation, so a restart can drain the old one
+        self._in_use: Dict[int, int] = {}
+        self._restarts: Dict[str, int] = {}
+        self._restarting = False
+        self.drain_timeout_s = float(os.getenv("BROWSER_DRAIN_TIMEOUT_S", "30"))
 
     @classmethod
     def instance(cls) -> "BrowserManager":
@@ -25,36 +55,205 @@ class BrowserManager:
             cls._instance = BrowserManager()
         return cls._instance
 
+    def _connected(self) -> bool:
+        return self._connected_browser(self._browser)
+
+    @staticmethod
+    def _connected_browser(browser: "Browser | None") -> bool:
+        try:
+            return browser is not None and browser.is_connected()
+        except Exception:
+            return False
+
+    async def _launch(self) -> None:
+        # Caller holds self._lock
+        if self._playwright is None:
+            from playwright.async_api import async_playwright
+
+            self._playwright = await async_playwright().start()
+        try:
+            browser = await self._playwright.chromium.launch(headless=True)
+        except Exception:
+            # Do not leak the driver process when Chromium is missing or crashes on launch,
+            # but keep it while an older browser generation is still serving or draining
+            if self._browser is None and not any(self._in_use.values()):
+                await self._playwright.stop()
+                self._playwright = None
+            raise
+        self._generation += 1
+        gen = self._generation
+        try:
+            browser.on("disconnected", lambda *_: self._on_disconnected(gen))
+        except Exception:
+            pass
+        self._browser = browser
+        self._launched_at = time.monotonic()
+        self._watchdog.ensure_running()
+
+    def _on_disconnected(self, gen: int) -> None:
+        if gen == self._generation and self._browser is not None:
+            asyncio.get_running_loop().create_task(self._restart_quietly("disconnected", gen))
+
+    async def _restart_quietly(self, reason: str, gen: int) -> None:
+        try:
+            await self.restart(reason, gen=gen)
+        except Exception:
+            pass  # the watchdog or the next start() retries
+
+    def _count_restart(self, reason: str) -> None:
+        self._restarts[reason] = self._restarts.get(reason, 0) + 1
+        _RESTARTS.labels(reason).inc()
+
     async def start(self) -> None:
         async with self._lock:
-            if self._browser:
+            if self._connected():
                 return
-            self._playwright = await async_playwright().start()
-            self._browser = await self._playwright.chromium.launch(headless=True)
+            if self._browser is not None:
+                # Crashed and nobody noticed yet
+                self._count_restart("disconnected")
+                self._browser = None
+            await self._launch()
+
+    async def restart(self, reason: str, gen: int | None = None) -> None:
+        """Replace the browser; new contexts go to the new one while the old one drains.
+
+        ``gen`` makes the call a no-op when that generation was already replaced.
+        """
+        if self._restarting:
+            return
+        self._restarting = True
+        try:
+            async with self._lock:
+                if gen is not None and gen != self._generation:
+                    return
+                old, old_gen = self._browser, self._generation
+                if old is not None and not self._connected():
+                    self._browser = None
+                try:
+                    await self._launch()
+                except Exception:
+                    # Keep serving from the old browser; the watchdog tries again
+                    self._browser = old if self._connected_browser(old) else None
+                    raise
+                self._count_restart(reason)
+            if old is not None:
+                await self._drain(old_gen)
+                try:
+                    await old.close()
+                except Exception:
+                    pass
+        finally:
+            self._restarting = False
+
+    async def _drain(self, gen: int) -> None:
+        deadline = time.monotonic() + self.drain_timeout_s
+        while self._in_use.get(gen, 0) > 0 and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        self._in_use.pop(gen, None)
+
+    async def warm_up(self) -> None:
+        """Launch Chromium and open/close one context so the first request starts warm."""
+        await self.start()
+        assert self._browser is not None
+        ctx = await self._browser.new_context(**build_context_kwargs())
+        await ctx.close()
 
     async def stop(self) -> None:
+        await self._watchdog.stop()
         async with self._lock:
-            if self._browser:
-                await self._browser.close()
-                self._browser = None
+            browser, self._browser = self._browser, None
+            if browser:
+                await browser.close()
             if self._playwright:
                 await self._playwright.stop()
                 self._playwright = None
 
     @asynccontextmanager
     async def context(self) -> AsyncIterator[BrowserContext]:
-        if self._browser is None:
-            await self.start()
-        assert self._browser is not None
-        await self._sem.acquire()
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+        req = current_render_request()
+        cls = await self._scheduler.acquire(req.priority, req.api_key)
+        started = time.monotonic()
+        ok, timed_out = True, False
+        proxy = proxy_pool().choose(current_proxy_session())
+        token = set_current_proxy(proxy)
+        store = profiles()
+        lease = ProfileLease(store.choose())
+        lease_token = set_current_lease(lease)
+        gen: int | None = None
         try:
-            ctx = await self._browser.new_context(**build_context_kwargs())
+            # Checked after queueing: the browser may have been replaced meanwhile
+            if not self._connected():
+                await self.start()
+            assert self._browser is not None
+            browser, gen = self._browser, self._generation
+            self._in_use[gen] = self._in_use.get(gen, 0) + 1
+            ctx = await browser.new_context(
+                **build_context_kwargs(
+                    playwright_proxy(proxy) if proxy else None,
+                    storage_state=str(lease.profile.path) if lease.profile else None,
+                )
+            )
             try:
                 yield ctx
+                if lease.profile is None and lease.ok and not lease.failed and store.wants_capture():
+                    # Clean first visit: keep its consent/locale cookies for later contexts
+                    try:
+                        store.capture(await ctx.storage_state())
+                    except Exception:
+                        pass
             finally:
                 await ctx.close()
+        except (PlaywrightTimeoutError, asyncio.TimeoutError):
+            ok, timed_out = False, True
+            raise
+        except Exception:
+            ok = False
+            raise
         finally:
-            self._sem.release()
+            if gen is not None and gen in self._in_use:
+                self._in_use[gen] -= 1
+            store.release(lease)
+            reset_current_lease(lease_token)
+            reset_current_proxy(token)
+            self._scheduler.release(cls, req.api_key, time.monotonic() - started, ok=ok, timeout=timed_out)
+
+    async def refresh_rss(self) -> int | None:
+        return await self._limiter.refresh_rss()
+
+    def rss_bytes(self) -> int | None:
+        return self._limiter.rss_bytes
+
+    def health(self) -> Dict[str, Any]:
+        connected = self._connected()
+        contexts = pages = 0
+        if connected:
+            try:
+                for ctx in self._browser.contexts:
+                    contexts += 1
+                    pages += len(ctx.pages)
+            except Exception:
+                pass
+        return {
+            "started": self._browser is not None,
+            "connected": connected,
+            "generation": self._generation,
+            "age_s": round(time.monotonic() - self._launched_at, 1) if connected and self._launched_at else None,
+            "contexts": contexts,
+            "pages": pages,
+            "draining": sum(n for g, n in self._in_use.items() if g != self._generation),
+            "restarts": dict(self._restarts),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._limiter.stats(),
+            "scheduler": self._scheduler.stats(),
+            "browser": self.health(),
+            "watchdog": self._watchdog.stats(),
+            "profiles": profiles().stats(),
+        }
 
     @asynccontextmanager
     async def page(self) -> AsyncIterator[Page]:
@@ -64,25 +263,62 @@ class BrowserManager:
             yield page
 
 
+async def polite_goto(page: Page, url: str, **kwargs):
+    """Navigate under the per-host politeness controller and report the outcome."""
+    ctl = politeness()
+    await ctl.acquire(url)
+    started = time.monotonic()
+    try:
+        resp = await page.goto(url, **kwargs)
+    except Exception:
+        ctl.observe(url, error=True)
+        proxy_pool().report(current_proxy(), ok=False)
+        report_navigation(False)
+        raise
+    status = resp.status if resp is not None else None
+    retry_after = resp.headers.get("retry-after") if resp is not None else None
+    ctl.observe(url, status=status, retry_after=retry_after)
+    ok = not looks_blocked(status) and (status is None or status < 500)
+    proxy_pool().report(current_proxy(), ok=ok, latency_s=time.monotonic() - started)
+    report_navigation(ok)
+    return resp
+
+
 async def render_and_get_next_data(url: str, timeout_s: int = 15) -> str | None:
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
     mgr = BrowserManager.instance()
     await mgr.start()
-    async with mgr.page() as page:
-        await jitter_delay()
-        await page.goto(url, wait_until="domcontentloaded", timeout=timeout_s * 1000)
-        # Wait for __NEXT_DATA__ script if present
-        try:
-            handle = await page.wait_for_selector('script#__NEXT_DATA__', timeout=timeout_s * 1000)
-            content = await handle.inner_text()
-            return content
-        except Exception:
-            return None
+    waited_out = False
+    try:
+        async with mgr.page() as page:
+            await polite_goto(page, url, wait_until="domcontentloaded", timeout=timeout_s * 1000)
+            # Wait for __NEXT_DATA__ script if present
+            try:
+                handle = await page.wait_for_selector('script#__NEXT_DATA__', timeout=timeout_s * 1000)
+                content = await handle.inner_text()
+                return content
+            except PlaywrightTimeoutError:
+                # Leave the context through the timeout so the scheduler and limiter record it
+                waited_out = True
+                raise
+            except Exception:
+                return None
+    except PlaywrightTimeoutError:
+        if waited_out:
+            return None  # the caller falls back to the rendered HTML
+        raise
 
 
 async def render_and_get_html(url: str, timeout_s: int = 15) -> str:
     mgr = BrowserManager.instance()
     await mgr.start()
     async with mgr.page() as page:
-        await jitter_delay()
-        await page.goto(url, wait_until="domcontentloaded", timeout=timeout_s * 1000)
-        return await page.content()
+        await polite_goto(page, url, wait_until="domcontentloaded", timeout=timeout_s * 1000)
+        html = await page.content()
+        if looks_blocked(None, html):
+            politeness().observe(url, body=html)
+            report_navigation(False)
+            save_html(html, url, tag="blocked")
+            await save_screenshot(page, url, tag="blocked")
+        return html
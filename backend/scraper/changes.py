@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from ru_mapper.schema import ExtractedListing
+
+from .state import StateBackend
+
+# Fields that change on every fetch (or with the URL it was reached by) and say nothing about the listing
+_VOLATILE_FIELDS = {"fetched_at", "canonical_url"}
+
+
+def room_id_from_url(url: str) -> Optional[str]:
+    m = re.search(r"/rooms/(?:plus/)?(\d+)", url or "")
+    return m.group(1) if m else None
+
+
+def _digest(value: Any) -> str:
+    blob = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.blake2b(blob.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def content_hash(listing_subtree: Dict[str, Any]) -> str:
+    """Stable hash of the ``__NEXT_DATA__`` listing subtree (key order independent)."""
+    return _digest(listing_subtree)
+
+
+def tracked_fields(listing: ExtractedListing) -> Dict[str, Any]:
+    """The listing's values that take part in change detection."""
+    return listing.model_dump(mode="json", exclude=_VOLATILE_FIELDS)
+
+
+def field_fingerprints(listing: ExtractedListing) -> Dict[str, str]:
+    return {k: _digest(v) for k, v in tracked_fields(listing).items()}
+
+
+def diff_listings(
+    old: Optional[ExtractedListing],
+    new: ExtractedListing,
+    old_fingerprints: Optional[Dict[str, str]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Field-level diff as ``{field: {"old": ..., "new": ...}}``."""
+    new_fp = field_fingerprints(new)
+    old_fp = old_fingerprints or (field_fingerprints(old) if old is not None else {})
+    old_data = tracked_fields(old) if old is not None else {}
+    new_data = tracked_fields(new)
+    return {
+        k: {"old": old_data.get(k), "new": new_data.get(k)}
+        for k, fp in new_fp.items()
+        if old_fp.get(k) != fp
+    }
+
+
+@dataclass
+class ChangeRecord:
+    room_id: str
+    content_hash: Optional[str] = None
+    fingerprints: Dict[str, str] = field(default_factory=dict)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # Last seen values of the tracked fields: the "old" side of the next diff
+    fields: Optional[Dict[str, Any]] = None
+    checked_at: float = 0.0
+    changed_at: float = 0.0
+
+    def listing(self, url: Optional[str] = None) -> Optional[ExtractedListing]:
+        if self.fields is None:
+            return None
+        return ExtractedListing.model_validate({**self.fields, "canonical_url": url})
+
+
+class ChangeTracker:
+    """Last-seen state per room id, kept in the shared state backend."""
+
+    def __init__(self, backend: StateBackend, ttl_s: float = 14 * 86400) -> None:
+        self.backend = backend
+        self.ttl_s = ttl_s
+
+    @classmethod
+    def from_env(cls, backend: StateBackend) -> "ChangeTracker":
+        return cls(backend, ttl_s=float(os.getenv("CHANGE_TRACK_TTL_S", str(14 * 86400))))
+
+    async def get(self, room_id: str) -> Optional[ChangeRecord]:
+        raw = await self.backend.get(f"changes:{room_id}")
+        if not raw:
+            return None
+        try:
+            return ChangeRecord(**json.loads(raw))
+        except Exception:
+            return None  # unreadable or from an older record layout: treated as first sight
+
+    async def put(self, record: ChangeRecord) -> None:
+        record.checked_at = time.time()
+        await self.backend.set(f"changes:{record.room_id}", json.dumps(asdict(record)), ttl_s=self.ttl_s)
+
+
+async def conditional_fetch(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    timeout_s: float = 15.0,
+) -> Tuple[int, Optional[str], Optional[str], Optional[str]]:
+    """GET with If-None-Match / If-Modified-Since.
+
+    Returns ``(status, body, etag, last_modified)``; body is None on 304.
+    """
+    import httpx
+
+    from .politeness import controller as politeness
+
+    headers: Dict[str, str] = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    ctl = politeness()
+    await ctl.acquire(url)
+    async with httpx.AsyncClient(follow_redirects=True, timeout=timeout_s) as client:
+        try:
+            resp = await client.get(url, headers=headers)
+        except httpx.HTTPError:
+            ctl.observe(url, error=True)
+            raise
+    body = None if resp.status_code == 304 else resp.text
+    ctl.observe(url, status=resp.status_code, body=body, retry_after=resp.headers.get("retry-after"))
+    return resp.status_code, body, resp.headers.get("etag"), resp.headers.get("last-modified")
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from prometheus_client import Gauge
+
+_LIMIT_GAUGE = Gauge("scrappy_browser_concurrency_limit", "Current adaptive limit on concurrent browser contexts")
+_IN_FLIGHT_GAUGE = Gauge("scrappy_browser_contexts_in_flight", "Browser contexts currently in use")
+_QUEUED_GAUGE = Gauge("scrappy_browser_contexts_queued", "Callers waiting for a browser context slot")
+_RSS_GAUGE = Gauge("scrappy_browser_rss_bytes", "Resident memory of Chromium processes owned by this worker")
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _read_proc_children() -> Dict[int, List[int]]:
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read().decode("utf-8", "replace")
+        except OSError:
+            continue
+        # comm may contain spaces/parens, fields after the last ')' are fixed
+        rest = stat[stat.rfind(")") + 2:].split()
+        if len(rest) < 2:
+            continue
+        children.setdefault(int(rest[1]), []).append(int(entry))
+    return children
+
+
+def browser_rss_bytes(root_pid: Optional[int] = None) -> Optional[int]:
+    """Sum RSS of Chromium processes descending from ``root_pid`` (this process by default).
+
+    Linux only; returns None when /proc is unavailable.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+    try:
+        children = _read_proc_children()
+    except OSError:
+        return None
+    total = 0
+    stack = list(children.get(root_pid or os.getpid(), []))
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            with open(f"/proc/{pid}/comm", "r", encoding="utf-8") as f:
+                comm = f.read().strip().lower()
+            if "chrom" not in comm and "headless_shell" not in comm:
+                continue
+            with open(f"/proc/{pid}/statm", "r", encoding="utf-8") as f:
+                total += int(f.read().split()[1]) * _PAGE_SIZE
+        except (OSError, ValueError, IndexError):
+            continue
+    return total
+
+
+class AdaptiveLimiter:
+    """AIMD limiter for concurrent browser contexts.
+
+    The limit grows by one after a full window of healthy releases while the
+    limiter is saturated, and shrinks multiplicatively on timeouts, error
+    spikes, slow renders or Chromium RSS above ``rss_limit_bytes``.
+    """
+
+    def __init__(
+        self,
+        initial: int = 3,
+        min_limit: int = 1,
+        max_limit: int = 8,
+        target_latency_s: float = 10.0,
+        rss_limit_bytes: Optional[int] = None,
+        backoff: float = 0.7,
+        error_threshold: float = 0.25,
+        window: int = 20,
+        rss_interval_s: float = 2.0,
+        rss_probe: Callable[[], Optional[int]] = browser_rss_bytes,
+    ) -> None:
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self._limit = min(max(initial, self.min_limit), self.max_limit)
+        self.target_latency_s = target_latency_s
+        self.rss_limit_bytes = rss_limit_bytes
+        self.backoff = backoff
+        self.error_threshold = error_threshold
+        self._samples: Deque[bool] = deque(maxlen=window)
+        self._since_change = 0
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._rss_probe = rss_probe
+        self._rss_interval_s = rss_interval_s
+        self._rss_checked_at = 0.0
+        self._last_rss: Optional[int] = None
+        self._rss_task: Optional[asyncio.Task] = None
+        # Set by a scheduler that queues callers in front of this limiter
+        self.queue_probe: Optional[Callable[[], int]] = None
+        self._publish()
+
+    @classmethod
+    def from_env(cls, initial: int = 3) -> "AdaptiveLimiter":
+        rss_mb = _env_int("BROWSER_RSS_LIMIT_MB", 0)
+        return cls(
+            initial=_env_int("BROWSER_INITIAL_CONTEXTS", initial),
+            min_limit=_env_int("BROWSER_MIN_CONTEXTS", 1),
+            max_limit=_env_int("BROWSER_MAX_CONTEXTS", max(initial, 8)),
+            target_latency_s=_env_float("BROWSER_TARGET_LATENCY_S", 10.0),
+            rss_limit_bytes=rss_mb * 1024 * 1024 if rss_mb > 0 else None,
+        )
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        external = self.queue_probe() if self.queue_probe else 0
+        return external + sum(1 for w in self._waiters if not w.done())
+
+    def has_capacity(self) -> bool:
+        return self._in_flight < self._limit
+
+    def try_acquire(self) -> bool:
+        if self._in_flight >= self._limit:
+            return False
+        self._in_flight += 1
+        self._publish()
+        return True
+
+    async def acquire(self) -> None:
+        if not self._waiters and self.try_acquire():
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self._publish()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Slot was granted while we were being cancelled; hand it back
+                self._in_flight -= 1
+                self._wake()
+            raise
+        finally:
+            try:
+                self._waiters.remove(fut)
+            except ValueError:
+                pass
+            self._publish()
+
+    def release(self, latency_s: Optional[float] = None, ok: bool = True, timeout: bool = False, sample: bool = True) -> None:
+        """Free a slot; ``sample=False`` for slots that never did any work (no AIMD signal)."""
+        self._in_flight = max(0, self._in_flight - 1)
+        if sample:
+            self._record(latency_s, ok and not timeout, timeout)
+        self._wake()
+        self._publish()
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < self._limit:
+            fut = self._waiters.popleft()
+            if fut.done():
+                continue
+            self._in_flight += 1
+            fut.set_result(None)
+
+    @property
+    def rss_bytes(self) -> Optional[int]:
+        """Last sampled browser RSS; never probes."""
+        return self._last_rss
+
+    async def refresh_rss(self) -> Optional[int]:
+        """Re-probe browser RSS in a worker thread so the /proc walk stays off the event loop."""
+        self._rss_checked_at = time.monotonic()
+        try:
+            rss = await asyncio.to_thread(self._rss_probe)
+        except Exception:
+            rss = None
+        self._last_rss = rss
+        if rss is not None:
+            _RSS_GAUGE.set(rss)
+        return rss
+
+    def _schedule_rss_refresh(self) -> None:
+        if self._rss_task is not None and not self._rss_task.done():
+            return
+        if time.monotonic() - self._rss_checked_at < self._rss_interval_s:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._rss_task = loop.create_task(self.refresh_rss())
+
+    def _memory_pressure(self) -> bool:
+        if not self.rss_limit_bytes:
+            return False
+        # Decide on the cached sample; a stale one is refreshed in the background for later releases
+        self._schedule_rss_refresh()
+        rss = self._last_rss
+        return rss is not None and rss > self.rss_limit_bytes
+
+    def _record(self, latency_s: Optional[float], ok: bool, timeout: bool) -> None:
+        slow = latency_s is not None and latency_s > self.target_latency_s
+        self._samples.append(ok and not slow)
+        self._since_change += 1
+        failures = self._samples.count(False)
+        error_spike = len(self._samples) >= 5 and failures / len(self._samples) > self.error_threshold
+
+        if timeout or error_spike or self._memory_pressure():
+            # One multiplicative step per window so a burst of failures from
+            # requests started under the old limit does not collapse it.
+            if self._since_change >= self._limit:
+                self._decrease()
+            return
+        # Additive increase: only after a full window at the current limit and
+        # only when callers actually needed the extra slot.
+        if self._since_change >= self._limit and (self._in_flight + 1 >= self._limit or self.queued):
+            if self._limit < self.max_limit and not slow:
+                self._limit += 1
+                self._since_change = 0
+
+    def _decrease(self) -> None:
+        self._limit = max(self.min_limit, int(self._limit * self.backoff))
+        self._since_change = 0
+        self._samples.clear()
+
+    def _publish(self) -> None:
+        _LIMIT_GAUGE.set(self._limit)
+        _IN_FLIGHT_GAUGE.set(self._in_flight)
+        _QUEUED_GAUGE.set(self.queued)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self._limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self._in_flight,
+            "queued": self.queued,
+            "rss_bytes": self._last_rss,
+        }
@@ -1,10 +1,23 @@
 from __future__ import annotations
 
 import asyncio
+import os
 import re
-from typing import List, Optional, Set
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AbstractSet, Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 
-from .browser import BrowserManager
+from prometheus_client import Counter, Histogram
+
+from .breakers import NEUTRAL_ERRORS, breaker
+from .browser import BrowserManager, polite_goto
+from .photos import DimensionProber, PhotoSet
+
+if TYPE_CHECKING:
+    from ru_mapper.schema import ExtractedListing
+
+_ENRICH_RUNS = Counter("scrappy_enrichment_total", "Enrichment steps by outcome", ["kind", "outcome"])
+_ENRICH_SECONDS = Histogram("scrappy_enrichment_seconds", "Enrichment step duration", ["kind"])
 
 
 def _looks_like_photo(url: str) -> bool:
@@ -19,11 +32,102 @@ def _looks_like_photo(url: str) -> bool:
     )
 
 
+# Page furniture that shows up next to amenity items
+_AMENITY_EXCLUDE = (
+    "translation", "translated", "calendar", "reviews", "rating", "unavailable:",
+    "where you'll", "where you’ll", "things to know", "meet your host", "show all", "see all",
+)
+_AMENITY_MAX_LEN = 120
+_AMENITY_LIMIT = 100
+# Upper bound on elements a page script will visit, whatever the page size
+_DOM_MAX_NODES = 5000
+
+# One label per list item or row: its own text, else the first line of its innerText,
+# so "<li>Wifi<span>Fast</span></li>" gives "Wifi". Filtered and deduped before the cap;
+# nothing is scanned outside the amenities modal
+_AMENITIES_JS = """
+({sel, exclude, maxLen, limit, maxNodes}) => {
+  const root = sel ? document.querySelector(sel) : null;
+  if (!root) return [];
+  const out = [];
+  const seen = new Set();
+  let nodes = root.querySelectorAll('li,[role="listitem"],[role="row"]');
+  if (!nodes.length) nodes = root.querySelectorAll('div,span');
+  const n = Math.min(nodes.length, maxNodes);
+  for (let i = 0; i < n && out.length < limit; i++) {
+    const node = nodes[i];
+    let own = '';
+    for (const c of node.childNodes) if (c.nodeType === 3) own += c.textContent;
+    own = own.replace(/\\s+/g, ' ').trim();
+    const first = (node.innerText || node.textContent || '').split('\\n').map(x => x.trim()).find(Boolean) || '';
+    const t = (own || first).replace(/\\s+/g, ' ').trim();
+    if (!t || t.length > maxLen || seen.has(t)) continue;
+    const low = t.toLowerCase();
+    if (exclude.some(x => low.includes(x))) continue;
+    seen.add(t);
+    out.push(t);
+  }
+  return out;
+}
+"""
+
+# Largest srcset candidate per element, photo-like URLs only, deduped and capped
+_IMAGES_JS = """
+({limit, maxNodes}) => {
+  const out = [];
+  const seen = new Set();
+  const looksLikePhoto = (u) => {
+    const l = u.toLowerCase();
+    if (l.includes('airbnbplatformassets') || l.includes('search-bar-icons')) return false;
+    return l.startsWith('http') && (l.includes('muscache.com/im/pictures') || l.includes('/photos/')
+      || l.includes('.jpg') || l.includes('.jpeg') || l.includes('.png'));
+  };
+  const push = (u) => {
+    if (u && !seen.has(u) && looksLikePhoto(u)) { seen.add(u); out.push(u); }
+  };
+  const largest = (srcset) => {
+    let best = null, bestW = -1;
+    for (const part of srcset.split(',')) {
+      const [u, d] = part.trim().split(/\\s+/);
+      const w = d ? parseFloat(d) || 0 : 0;
+      if (u && w > bestW) { best = u; bestW = w; }
+    }
+    return best;
+  };
+  const nodes = document.querySelectorAll('img, source[srcset]');
+  const n = Math.min(nodes.length, maxNodes);
+  for (let i = 0; i < n && out.length < limit; i++) {
+    const node = nodes[i];
+    const srcset = node.getAttribute('srcset');
+    if (srcset) push(largest(srcset));
+    if (node.src) push(node.src);
+  }
+  return out;
+}
+"""
+
+
+def _image_args(max_images: int) -> Dict[str, int]:
+    # Headroom for Python-side variant collapsing, which may merge several URLs
+    return {"limit": max(1, max_images) * 3, "maxNodes": _DOM_MAX_NODES}
+
+
+def clean_amenity_text(text: Optional[str]) -> Optional[str]:
+    """Whitespace-normalized amenity label, or None when it is page furniture."""
+    if not text:
+        return None
+    t = re.sub(r"\s+", " ", text).strip()
+    low = t.lower()
+    if not t or len(t) > _AMENITY_MAX_LEN or any(x in low for x in _AMENITY_EXCLUDE):
+        return None
+    return t
+
+
 async def collect_images(url: str, max_images: int = 30, wait_seconds: float = 1.5) -> List[str]:
     mgr = BrowserManager.instance()
     await mgr.start()
-    images: List[str] = []
-    seen: Set[str] = set()
+    # Keyed by canonical CDN URL so size variants (im_w=, srcset) count once, at their largest
+    images = PhotoSet()
 
     async with mgr.page() as page:
         net_urls: List[str] = []
@@ -43,7 +147,7 @@ async def collect_images(url: str, max_images: int = 30, wait_seconds: float = 1
         except Exception:
             pass
 
-        await page.goto(url, wait_until="domcontentloaded")
+        await polite_goto(page, url, wait_until="domcontentloaded")
         if wait_seconds > 0:
             await asyncio.sleep(wait_seconds)
 
@@ -57,70 +161,42 @@ async def collect_images(url: str, max_images: int = 30, wait_seconds: float = 1
         except Exception:
             pass
 
-        # Collect from DOM
+        # Collect from DOM (filtered and capped in the page)
         try:
-            dom_imgs = await page.evaluate(
-                """
-                () => {
-                  const out = [];
-                  const imgs = Array.from(document.querySelectorAll('img'));
-                  for (const img of imgs) {
-                    if (img.src) out.push(img.src);
-                    const srcset = img.getAttribute('srcset');
-                    if (srcset) {
-                      const parts = srcset.split(',').map(s => s.trim().split(' ')[0]);
-                      for (const p of parts) if (p) out.push(p);
-                    }
-                  }
-                  const sources = Array.from(document.querySelectorAll('source[srcset]'));
-                  for (const s of sources) {
-                    const parts = s.getAttribute('srcset').split(',').map(x => x.trim().split(' ')[0]);
-                    for (const p of parts) if (p) out.push(p);
-                  }
-                  return out;
-                }
-                """
-            )
+            dom_imgs = await page.evaluate(_IMAGES_JS, _image_args(max_images))
             for u in dom_imgs or []:
-                if isinstance(u, str) and _looks_like_photo(u) and u not in seen:
-                    seen.add(u)
-                    images.append(u)
+                if isinstance(u, str) and _looks_like_photo(u):
+                    images.add(u)
                     if len(images) >= max_images:
-                        return images
+                        return images.urls()
         except Exception:
             pass
 
         # Add network-captured images
         for u in net_urls:
-            if _looks_like_photo(u) and u not in seen:
-                seen.add(u)
-                images.append(u)
+            if _looks_like_photo(u):
+                images.add(u)
                 if len(images) >= max_images:
-                    return images
+                    return images.urls()
 
         # Try photo tour modal variant
         sep = '&' if '?' in url else '?'
         modal_url = f"{url}{sep}modal=PHOTO_TOUR_SCROLLABLE"
         try:
-            await page.goto(modal_url, wait_until="domcontentloaded")
+            await polite_goto(page, modal_url, wait_until="domcontentloaded")
             if wait_seconds > 0:
                 await asyncio.sleep(wait_seconds)
             # Collect again
-            dom_imgs2 = await page.evaluate(
-                """
-                () => Array.from(document.querySelectorAll('img')).map(i => i.src).filter(Boolean)
-                """
-            )
+            dom_imgs2 = await page.evaluate(_IMAGES_JS, _image_args(max_images - len(images)))
             for u in dom_imgs2 or []:
-                if isinstance(u, str) and _looks_like_photo(u) and u not in seen:
-                    seen.add(u)
-                    images.append(u)
+                if isinstance(u, str) and _looks_like_photo(u):
+                    images.add(u)
                     if len(images) >= max_images:
                         break
         except Exception:
             pass
 
-    return images[:max_images]
+    return images.urls()[:max_images]
 
 
 async def collect_amenities(url: str, wait_seconds: float = 1.0) -> List[str]:
@@ -130,23 +206,13 @@ async def collect_amenities(url: str, wait_seconds: float = 1.0) -> List[str]:
     seen: Set[str] = set()
 
     def _push(s: Optional[str]):
-        if not s:
-            return
-        s2 = re.sub(r"\s+", " ", s).strip()
-        low = s2.lower()
-        if not s2 or len(s2) > 120:
-            return
-        if any(x in low for x in [
-            "translation", "translated", "calendar", "reviews", "rating", "unavailable:",
-            "where you'll", "where you’ll", "things to know", "meet your host", "show all", "see all",
-        ]):
-            return
-        if s2 not in seen:
+        s2 = clean_amenity_text(s)
+        if s2 and s2 not in seen:
             seen.add(s2)
             items.append(s2)
 
     async with mgr.page() as page:
-        await page.goto(url, wait_until="domcontentloaded")
+        await polite_goto(page, url, wait_until="domcontentloaded")
         if wait_seconds > 0:
             await asyncio.sleep(wait_seconds)
 
@@ -178,23 +244,21 @@ async def collect_amenities(url: str, wait_seconds: float = 1.0) -> List[str]:
             except Exception:
                 continue
 
-        # Extract amenity texts
+        if modal_scope is None:
+            # Without the modal the page is mostly furniture; the parsed amenities stand
+            return []
+
+        # Extract amenity texts: one per item, filtered, deduped and capped in the page
         try:
             elements = await page.evaluate(
-                """
-                (sel) => {
-                  const root = sel ? document.querySelector(sel) : document;
-                  if (!root) return [];
-                  const out = [];
-                  const nodes = root.querySelectorAll('li,div,span');
-                  nodes.forEach(n => {
-                    const t = (n.innerText || n.textContent || '').trim();
-                    if (t) out.push(t);
-                  });
-                  return out;
-                }
-                """,
-                modal_scope,
+                _AMENITIES_JS,
+                {
+                    "sel": modal_scope,
+                    "exclude": list(_AMENITY_EXCLUDE),
+                    "maxLen": _AMENITY_MAX_LEN,
+                    "limit": _AMENITY_LIMIT,
+                    "maxNodes": _DOM_MAX_NODES,
+                },
             )
             for t in elements or []:
                 if isinstance(t, str):
@@ -202,8 +266,158 @@ async def collect_amenities(url: str, wait_seconds: float = 1.0) -> List[str]:
         except Exception:
             pass
 
-    return items[:100]
+    return items[:_AMENITY_LIMIT]
+
+
+PatchCallback = Callable[[str, Tuple[str, ...]], None]
 
 
+@dataclass
+class EnrichmentPlan:
+    images: bool = False
+    amenities: bool = False
+    probe: bool = False
+
+    def __bool__(self) -> bool:
+        return self.images or self.amenities or self.probe
+
+
+def plan_enrichment(
+    listing: "ExtractedListing",
+    fields: Optional[AbstractSet[str]] = None,
+    min_photos: int = 5,
+    probe: bool = False,
+) -> EnrichmentPlan:
+    """Decide from the first parse which browser passes are worth running.
+
+    Fields the caller did not ask for are never enriched.
+    """
+    want_photos = fields is None or "photos" in fields
+    want_amenities = fields is None or bool({"amenities_raw", "amenities_normalized"} & fields)
+    return EnrichmentPlan(
+        images=want_photos and len(listing.photos) < min_photos,
+        amenities=want_amenities and not listing.amenities_raw and not listing.amenities_normalized,
+        probe=want_photos and probe,
+    )
+
+
+class EnrichmentOrchestrator:
+    """Runs the planned enrichments concurrently and merges whatever finishes.
+
+    Each pass has its own timeout; a pass that fails or times out leaves its
+    fields as parsed. Browser passes still queue through the render scheduler.
+    """
+
+    def __init__(
+        self,
+        max_images: int = 25,
+        images_timeout_s: float = 30.0,
+        amenities_timeout_s: float = 20.0,
+        probe_timeout_s: float = 10.0,
+        prober: Optional[DimensionProber] = None,
+    ) -> None:
+        self.max_images = max_images
+        self.images_timeout_s = images_timeout_s
+        self.amenities_timeout_s = amenities_timeout_s
+        self.probe_timeout_s = probe_timeout_s
+        self.prober = prober
+
+    @classmethod
+    def from_env(cls, prober: Optional[DimensionProber] = None) -> "EnrichmentOrchestrator":
+        return cls(
+            max_images=int(os.getenv("MAX_IMAGES", "25")),
+            images_timeout_s=float(os.getenv("ENRICH_IMAGES_TIMEOUT_S", "30")),
+            amenities_timeout_s=float(os.getenv("ENRICH_AMENITIES_TIMEOUT_S", "20")),
+            probe_timeout_s=float(os.getenv("ENRICH_PROBE_TIMEOUT_S", "10")),
+            prober=prober,
+        )
+
+    async def _step(self, kind: str, coro: Awaitable[Any], timeout_s: float) -> Any:
+        circuit = breaker(kind)
+        if not circuit.allow():
+            # Stage is failing across requests: skip it instead of waiting out the timeout
+            _ENRICH_RUNS.labels(kind, "rejected").inc()
+            getattr(coro, "close", lambda: None)()
+            return None
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(coro, timeout=timeout_s)
+        except asyncio.TimeoutError:
+            outcome, result = "timeout", None
+        except asyncio.CancelledError:
+            circuit.forget()
+            raise
+        except NEUTRAL_ERRORS:
+            outcome, result = "queue_timeout", None
+        except Exception:
+            outcome, result = "error", None
+        else:
+            outcome = "ok" if result else "empty"
+        elapsed = time.monotonic() - started
+        if outcome == "queue_timeout":
+            circuit.forget()
+        else:
+            circuit.record(outcome in ("ok", "empty"), elapsed)
+        _ENRICH_RUNS.labels(kind, outcome).inc()
+        _ENRICH_SECONDS.labels(kind).observe(elapsed)
+        return result
+
+    async def _images(
+        self, listing: "ExtractedListing", url: str, plan: EnrichmentPlan, on_patch: Optional[PatchCallback]
+    ) -> None:
+        from ru_mapper.schema import Photo
+
+        if plan.images:
+            imgs = await self._step(
+                "images",
+                collect_images(url, max_images=self.max_images, wait_seconds=1.0),
+                self.images_timeout_s,
+            )
+            if imgs:
+                listing.photos = [Photo(url=i) for i in imgs[: self.max_images]]
+                if on_patch:
+                    on_patch("photos", ("photos",))
+        if plan.probe and self.prober is not None and listing.photos:
+            # Fill Photo.width/height from image headers (ranged GETs, cached)
+            if await self._step("probe", self.prober.fill(listing.photos), self.probe_timeout_s) and on_patch:
+                on_patch("photos", ("photos",))
+
+    async def _amenities(
+        self, listing: "ExtractedListing", url: str, fields: Optional[AbstractSet[str]], on_patch: Optional[PatchCallback]
+    ) -> None:
+        ams = await self._step("amenities", collect_amenities(url, wait_seconds=1.0), self.amenities_timeout_s)
+        if not ams:
+            return
+        listing.amenities_raw = ams
+        changed: Tuple[str, ...] = ("amenities_raw",)
+        if fields is None or "amenities_normalized" in fields:
+            from ru_mapper.amenities import normalize_amenities
+
+            listing.amenities_normalized = normalize_amenities(ams)
+            changed += ("amenities_normalized",)
+        if on_patch:
+            on_patch("amenities", changed)
 
+    async def run(
+        self,
+        listing: "ExtractedListing",
+        url: str,
+        fields: Optional[AbstractSet[str]] = None,
+        plan: Optional[EnrichmentPlan] = None,
+        on_patch: Optional[PatchCallback] = None,
+    ) -> EnrichmentPlan:
+        """Enrich ``listing`` in place; returns the plan that was executed.
 
+        ``on_patch(stage, field_names)`` is called as soon as a pass has merged its fields.
+        """
+        if plan is None:
+            plan = plan_enrichment(listing, fields, probe=self.prober is not None)
+        jobs = []
+        if plan.images or plan.probe:
+            jobs.append(self._images(listing, url, plan, on_patch))
+        if plan.amenities:
+            jobs.append(self._amenities(listing, url, fields, on_patch))
+        if jobs:
+            # Steps touch disjoint fields, so partial results merge without coordination
+            await asyncio.gather(*jobs, return_exceptions=True)
+        return plan
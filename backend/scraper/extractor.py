@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 import json
+import re
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import AbstractSet, Any, Callable, Dict, List, Optional
 
 from ru_mapper.amenities import normalize_amenities
 from ru_mapper.schema import Address, ExtractedListing, Host, Photo
 
-from .utils import dedupe_photos, find_first_listing_like
+from .layouts import FieldReader
+from .layouts import registry as layouts
+from .utils import dedupe_photos
 
 
 def _safe_float(v: Any) -> Optional[float]:
@@ -28,124 +31,110 @@ def _safe_int(v: Any) -> Optional[int]:
             return None
 
 
-def extract_from_next_data(next_data: Dict[str, Any], url: str = "") -> ExtractedListing:
-    listing = find_first_listing_like(next_data) or {}
-
-    title = listing.get("name") or listing.get("title") or (listing.get("seoDetails") or {}).get("listingName")
-    description = (
-        listing.get("description")
-        or (listing.get("sectionedDescription") or {}).get("body")
-        or (listing.get("sectionedDescription") or {}).get("overview")
-        or (listing.get("seoDetails") or {}).get("description")
+def _address(r: FieldReader) -> Address:
+    return Address(
+        full=r.get("address.full"),
+        street=r.get("address.street"),
+        city=r.get("address.city"),
+        state=r.get("address.state"),
+        postal_code=r.get("address.postal_code"),
+        country=r.get("address.country"),
+        lat=_safe_float(r.get("address.lat")),
+        lng=_safe_float(r.get("address.lng")),
     )
 
-    # Address
-    raw_addr = listing.get("address") or listing.get("location") or {}
-    address = Address(
-        full=raw_addr.get("full") or raw_addr.get("public") or None,
-        street=raw_addr.get("street") or raw_addr.get("streetAddress") or None,
-        city=raw_addr.get("city") or None,
-        state=raw_addr.get("state") or raw_addr.get("stateProvince") or None,
-        postal_code=raw_addr.get("postalCode") or raw_addr.get("zipcode") or None,
-        country=raw_addr.get("country") or None,
-        lat=_safe_float(raw_addr.get("lat") or raw_addr.get("latitude")),
-        lng=_safe_float(raw_addr.get("lng") or raw_addr.get("longitude")),
-    )
 
-    # Photos
+def _photos(r: FieldReader) -> List[Photo]:
     raw_photos: List[dict] = []
-    photos_candidates = [
-        listing.get("photos"),
-        listing.get("images"),
-        listing.get("media"),
-        (listing.get("photoData") or {}).get("allPhotos"),
-    ]
-    for cand in photos_candidates:
+    for cand in r.collect("photos"):
         if isinstance(cand, list):
             raw_photos.extend(cand)
+    return [Photo(**p) for p in dedupe_photos(raw_photos, min_side_px=300, max_items=25)]
 
-    photos = [Photo(**p) for p in dedupe_photos(raw_photos, min_side_px=300, max_items=25)]
 
-    # Amenities
-    amenities_raw: List[str] = (
-        listing.get("amenities")
-        or listing.get("amenityNames")
-        or (listing.get("structuredContent") or {}).get("amenities")
-        or []
-    )
-    amenities_normalized = normalize_amenities(amenities_raw)
+def _amenities_raw(r: FieldReader) -> List[str]:
+    return r.get("amenities") or []
 
-    # Capacity
-    bedrooms = _safe_int(listing.get("bedrooms"))
-    beds = _safe_int(listing.get("beds"))
-    bathrooms = _safe_float(listing.get("bathrooms"))
-    max_guests = _safe_int(listing.get("maxGuests") or listing.get("personCapacity"))
 
-    # Types
-    property_type_raw = (
-        listing.get("propertyType") or listing.get("propertyTypeLabel") or listing.get("property_type")
-    )
-    room_type_raw = (
-        listing.get("roomTypeCategory") or listing.get("roomType") or listing.get("room_type")
+def _host(r: FieldReader) -> Host:
+    return Host(
+        name=r.get("host.name"),
+        superhost=r.get("host.superhost"),
+        response_rate=_safe_int(r.get("host.response_rate")),
+        response_time=r.get("host.response_time"),
     )
 
-    # Rating
-    rating = _safe_float(listing.get("starRating") or listing.get("avgRating") or listing.get("overallRating"))
-
-    # Pricing
-    currency = None
-    base_price = None
-    quote = listing.get("pricingQuote") or listing.get("price") or {}
-    if isinstance(quote, dict):
-        price = quote.get("price") or quote.get("rate") or quote
-        currency = price.get("currency") or price.get("currencyCode")
-        base_price = _safe_float(price.get("amount") or price.get("total") or price.get("nightly"))
-
-    # Host
-    raw_host = listing.get("host") or {}
-    host = Host(
-        name=raw_host.get("name") or raw_host.get("hostName"),
-        superhost=raw_host.get("isSuperhost") or raw_host.get("is_superhost"),
-        response_rate=_safe_int(raw_host.get("responseRate")),
-        response_time=raw_host.get("responseTime"),
-    )
+
+# One extractor per ExtractedListing field so ``fields=`` projections only pay for what they ask for.
+# Where each value lives is up to the detected layout (see scraper.layouts);
+# amenities_normalized is derived from amenities_raw in extract_from_next_data.
+_FIELD_EXTRACTORS: Dict[str, Callable[[FieldReader], Any]] = {
+    "title": lambda r: r.get("title"),
+    "description": lambda r: r.get("description"),
+    "address": _address,
+    "photos": _photos,
+    "amenities_raw": _amenities_raw,
+    "bedrooms": lambda r: _safe_int(r.get("bedrooms")),
+    "beds": lambda r: _safe_int(r.get("beds")),
+    "bathrooms": lambda r: _safe_float(r.get("bathrooms")),
+    "max_guests": lambda r: _safe_int(r.get("max_guests")),
+    "property_type_raw": lambda r: r.get("property_type"),
+    "room_type_raw": lambda r: r.get("room_type"),
+    "rating": lambda r: _safe_float(r.get("rating")),
+    "currency": lambda r: r.get("price.currency"),
+    "base_price": lambda r: _safe_float(r.get("price.amount")),
+    "host": _host,
+}
+
+
+def extract_from_next_data(
+    next_data: Dict[str, Any],
+    url: str = "",
+    fields: Optional[AbstractSet[str]] = None,
+) -> ExtractedListing:
+    """Build an ExtractedListing; with ``fields`` only those extractors run, the rest keep defaults."""
+    reader = layouts().resolve(next_data)
+
+    values: Dict[str, Any] = {}
+    for name, fn in _FIELD_EXTRACTORS.items():
+        if fields is None or name in fields:
+            values[name] = fn(reader)
+    if fields is None or "amenities_normalized" in fields:
+        amenities_raw = values["amenities_raw"] if "amenities_raw" in values else _amenities_raw(reader)
+        values["amenities_normalized"] = normalize_amenities(amenities_raw)
 
     return ExtractedListing(
-        title=title,
-        description=description,
-        address=address,
-        photos=photos,
-        amenities_raw=amenities_raw,
-        amenities_normalized=amenities_normalized,
-        bedrooms=bedrooms,
-        beds=beds,
-        bathrooms=bathrooms,
-        max_guests=max_guests,
-        property_type_raw=property_type_raw,
-        room_type_raw=room_type_raw,
-        rating=rating,
-        currency=currency,
-        base_price=base_price,
-        host=host,
+        **values,
         source="airbnb",
         canonical_url=url,
         fetched_at=datetime.utcnow(),
     )
 
 
-def extract_from_html(html: str, url: str = "") -> ExtractedListing:
-    # Attempt to find __NEXT_DATA__ first
+_NEXT_DATA_RE = re.compile(r"<script[^>]+id=\"__NEXT_DATA__\"[^>]*>(.*?)</script>", re.S | re.I)
+
+
+def parse_next_data(html: str) -> Optional[Dict[str, Any]]:
+    m = _NEXT_DATA_RE.search(html or "")
+    if not m:
+        return None
     try:
-        import re
+        data = json.loads(m.group(1))
+    except Exception:
+        return None
+    return data if isinstance(data, dict) else None
 
-        m = re.search(r"<script[^>]+id=\"__NEXT_DATA__\"[^>]*>(.*?)</script>", html, re.S | re.I)
-        if m:
-            data = json.loads(m.group(1))
-            return extract_from_next_data(data, url=url)
+
+def extract_from_html(html: str, url: str = "", fields: Optional[AbstractSet[str]] = None) -> ExtractedListing:
+    # Attempt to find __NEXT_DATA__ first
+    try:
+        data = parse_next_data(html)
+        if data is not None:
+            return extract_from_next_data(data, url=url, fields=fields)
     except Exception:
         pass
 
     # Fallback to DOM parsing
     from .html_fallback import extract_from_html_fallback
 
-    return extract_from_html_fallback(html, url=url)
+    return extract_from_html_fallback(html, url=url, fields=fields)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+from prometheus_client import Counter
+
+from .politeness import host_key
+
+_HEDGES = Counter("scrappy_hedge_launched_total", "Browser fetches started alongside the httpx fetch", ["reason"])
+_WINS = Counter("scrappy_hedge_wins_total", "Fetch path whose page was used", ["path"])
+
+Fetch = Callable[[str], Awaitable[Optional[str]]]
+
+
+class HedgedFetcher:
+    """Race the cheap httpx fetch against a delayed browser render.
+
+    httpx starts first. The browser path starts after ``delay_s``. The first
+    page that passes ``validate`` wins and the other fetch is cancelled. When
+    neither validates, the browser page is preferred (it may be a non-PDP page
+    the caller still wants), then the httpx page. Hosts where httpx recently
+    came back without a listing go to the browser alone; httpx is only tried
+    there when the browser misses too.
+    """
+
+    def __init__(self, delay_s: float = 2.0, bad_host_ttl_s: float = 600.0, max_hosts: int = 1024) -> None:
+        self.delay_s = delay_s
+        self.bad_host_ttl_s = bad_host_ttl_s
+        self.max_hosts = max_hosts
+        # host -> marked-until; insertion order is expiry order (every mark uses the same TTL)
+        self._bad_hosts: "OrderedDict[str, float]" = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "HedgedFetcher":
+        return cls(
+            delay_s=float(os.getenv("HEDGE_DELAY_S", "2")),
+            bad_host_ttl_s=float(os.getenv("HEDGE_BAD_HOST_TTL_S", "600")),
+        )
+
+    def is_bad_host(self, url: str) -> bool:
+        until = self._bad_hosts.get(host_key(url))
+        return until is not None and until > time.monotonic()
+
+    def _mark(self, url: str, bad: bool) -> None:
+        host = host_key(url)
+        now = time.monotonic()
+        if bad:
+            self._bad_hosts[host] = now + self.bad_host_ttl_s
+            self._bad_hosts.move_to_end(host)
+        else:
+            self._bad_hosts.pop(host, None)
+        while self._bad_hosts and (len(self._bad_hosts) > self.max_hosts or next(iter(self._bad_hosts.values())) <= now):
+            self._bad_hosts.popitem(last=False)
+
+    async def _fetch_bad_host(self, url: str, cheap: Fetch, browser: Fetch, validate: Callable[[str], bool]) -> str:
+        # httpx is known to miss here: racing it would only double the politeness tokens and origin load
+        _HEDGES.labels("bad_host").inc()
+        pages: Dict[str, Optional[str]] = {}
+        errors: Dict[str, BaseException] = {}
+        for path, fetch in (("playwright", browser), ("httpx", cheap)):
+            try:
+                html = await fetch(url)
+            except Exception as e:
+                errors[path], html = e, None
+            pages[path] = html
+            ok = bool(html) and validate(html)
+            if path == "httpx":
+                self._mark(url, bad=not ok)
+            if ok:
+                _WINS.labels(path).inc()
+                return html  # type: ignore[return-value]
+        return self._fallback(pages, errors)
+
+    @staticmethod
+    def _fallback(pages: Dict[str, Optional[str]], errors: Dict[str, BaseException]) -> str:
+        _WINS.labels("none").inc()
+        for path in ("playwright", "httpx"):
+            if pages.get(path):
+                return pages[path]  # type: ignore[return-value]
+        if "httpx" in errors:
+            raise errors["httpx"]
+        if "playwright" in errors:
+            raise errors["playwright"]
+        return ""
+
+    async def fetch(self, url: str, cheap: Fetch, browser: Fetch, validate: Callable[[str], bool]) -> str:
+        if self.is_bad_host(url):
+            return await self._fetch_bad_host(url, cheap, browser, validate)
+        cheap_task = asyncio.create_task(cheap(url))
+        browser_task: Optional[asyncio.Task] = None
+        pages: Dict[str, Optional[str]] = {}
+        errors: Dict[str, BaseException] = {}
+
+        def launch(reason: str) -> None:
+            nonlocal browser_task
+            if browser_task is None:
+                _HEDGES.labels(reason).inc()
+                browser_task = asyncio.create_task(browser(url))
+
+        try:
+            pending = {cheap_task}
+            deadline = time.monotonic() + self.delay_s
+            while pending:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # httpx is slow: hedge with the browser
+                    launch("delay")
+                    deadline = None
+                    pending.add(browser_task)
+                    continue
+                for task in done:
+                    path = "httpx" if task is cheap_task else "playwright"
+                    try:
+                        html = task.result()
+                    except Exception as e:
+                        errors[path], html = e, None
+                    pages[path] = html
+                    ok = bool(html) and validate(html)
+                    if path == "httpx":
+                        self._mark(url, bad=not ok)
+                    if ok:
+                        _WINS.labels(path).inc()
+                        return html
+                    if path == "httpx" and browser_task is None:
+                        launch("httpx_miss")
+                        deadline = None
+                        pending.add(browser_task)
+        finally:
+            for task in (cheap_task, browser_task):
+                if task is not None and not task.done():
+                    task.cancel()
+
+        return self._fallback(pages, errors)
+
+    def stats(self) -> Dict[str, object]:
+        now = time.monotonic()
+        return {"delay_s": self.delay_s, "bad_hosts": sorted(h for h, t in self._bad_hosts.items() if t > now)}
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import json
-from typing import List
+from typing import AbstractSet, List, Optional
 
 from bs4 import BeautifulSoup
 
@@ -9,7 +9,7 @@ from ru_mapper.amenities import normalize_amenities
 from ru_mapper.schema import Address, ExtractedListing, Photo
 
 
-def extract_from_html_fallback(html: str, url: str = "") -> ExtractedListing:
+def extract_from_html_fallback(html: str, url: str = "", fields: Optional[AbstractSet[str]] = None) -> ExtractedListing:
     soup = BeautifulSoup(html or "", "html.parser")
 
     # Try to parse __NEXT_DATA__ if present
@@ -19,7 +19,7 @@ def extract_from_html_fallback(html: str, url: str = "") -> ExtractedListing:
             next_data = json.loads(next_data_script.string)
             from .extractor import extract_from_next_data  # late import to avoid cycle
 
-            return extract_from_next_data(next_data, url=url)
+            return extract_from_next_data(next_data, url=url, fields=fields)
         except Exception:
             pass
 
@@ -27,8 +27,11 @@ def extract_from_html_fallback(html: str, url: str = "") -> ExtractedListing:
     desc_meta = soup.find("meta", attrs={"name": "description"})
     description = desc_meta["content"].strip() if desc_meta and desc_meta.has_attr("content") else None
 
+    def wanted(name: str) -> bool:
+        return fields is None or name in fields
+
     imgs = []
-    for img in soup.find_all("img"):
+    for img in soup.find_all("img") if wanted("photos") else []:
         src = img.get("src") or img.get("data-src")
         if not src:
             continue
@@ -40,7 +43,8 @@ def extract_from_html_fallback(html: str, url: str = "") -> ExtractedListing:
         })
 
     amenity_texts: List[str] = []
-    for elem in soup.select('[data-testid*="amenity"], .amenity, .amenities li'):
+    want_amenities = wanted("amenities_raw") or wanted("amenities_normalized")
+    for elem in soup.select('[data-testid*="amenity"], .amenity, .amenities li') if want_amenities else []:
         text = (elem.get_text(" ") or "").strip()
         if text:
             amenity_texts.append(text)
@@ -51,6 +55,6 @@ def extract_from_html_fallback(html: str, url: str = "") -> ExtractedListing:
         address=Address(),
         photos=[Photo(**p) for p in imgs],
         amenities_raw=amenity_texts,
-        amenities_normalized=normalize_amenities(amenity_texts),
+        amenities_normalized=normalize_amenities(amenity_texts) if wanted("amenities_normalized") else [],
         canonical_url=url,
     )
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import itertools
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+Path = Tuple[str, ...]
+
+
+def _product(*parts: Sequence[Path]) -> List[Path]:
+    return [tuple(itertools.chain.from_iterable(combo)) for combo in itertools.product(*parts)]
+
+
+_ADDR = [("address",), ("location",)]
+_QUOTE = _product([("pricingQuote",), ("price",)], [("price",), ("rate",), ()])
+
+# Candidate paths per leaf value, relative to the listing subtree, in priority order.
+# Layouts override individual leaves; anything not overridden uses these.
+DEFAULT_FIELD_PATHS: Dict[str, List[Path]] = {
+    "title": [("name",), ("title",), ("seoDetails", "listingName")],
+    "description": [
+        ("description",),
+        ("sectionedDescription", "body"),
+        ("sectionedDescription", "overview"),
+        ("seoDetails", "description"),
+    ],
+    "address.full": _product(_ADDR, [("full",), ("public",)]),
+    "address.street": _product(_ADDR, [("street",), ("streetAddress",)]),
+    "address.city": _product(_ADDR, [("city",)]),
+    "address.state": _product(_ADDR, [("state",), ("stateProvince",)]),
+    "address.postal_code": _product(_ADDR, [("postalCode",), ("zipcode",)]),
+    "address.country": _product(_ADDR, [("country",)]),
+    "address.lat": _product(_ADDR, [("lat",), ("latitude",)]),
+    "address.lng": _product(_ADDR, [("lng",), ("longitude",)]),
+    # Every matching photo list is merged, see FieldReader.collect
+    "photos": [("photos",), ("images",), ("media",), ("photoData", "allPhotos")],
+    "amenities": [("amenities",), ("amenityNames",), ("structuredContent", "amenities")],
+    "bedrooms": [("bedrooms",)],
+    "beds": [("beds",)],
+    "bathrooms": [("bathrooms",)],
+    "max_guests": [("maxGuests",), ("personCapacity",)],
+    "property_type": [("propertyType",), ("propertyTypeLabel",), ("property_type",)],
+    "room_type": [("roomTypeCategory",), ("roomType",), ("room_type",)],
+    "rating": [("starRating",), ("avgRating",), ("overallRating",)],
+    "price.currency": _product(_QUOTE, [("currency",), ("currencyCode",)]),
+    "price.amount": _product(_QUOTE, [("amount",), ("total",), ("nightly",)]),
+    "host.name": [("host", "name"), ("host", "hostName")],
+    "host.superhost": [("host", "isSuperhost"), ("host", "is_superhost")],
+    "host.response_rate": [("host", "responseRate")],
+    "host.response_time": [("host", "responseTime")],
+}
+
+
+def _missing(value: Any) -> bool:
+    return value is None or (isinstance(value, (str, list, dict)) and not value)
+
+
+def compile_path(path: Path) -> Callable[[Any], Any]:
+    """Turn a key path into a getter; non-dict hops yield None."""
+    if len(path) == 1:
+        (key,) = path
+        return lambda data: data.get(key) if isinstance(data, dict) else None
+
+    def get(data: Any) -> Any:
+        for key in path:
+            if not isinstance(data, dict):
+                return None
+            data = data.get(key)
+        return data
+
+    return get
+
+
+def _apollo_listing(next_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    props = (next_data.get("props") or {}).get("pageProps") or {}
+    apollo = props.get("__APOLLO_STATE__") or next_data.get("__APOLLO_STATE__")
+    if isinstance(apollo, dict):
+        for k, v in apollo.items():
+            if isinstance(k, str) and k[:8].lower() == "listing:" and isinstance(v, dict):
+                return v
+    return None
+
+
+@dataclass
+class Layout:
+    """A ``__NEXT_DATA__`` variant: where the listing lives and where each leaf lives in it."""
+
+    name: str
+    locate: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+    paths: Dict[str, List[Path]] = field(default_factory=dict)
+    getters: Dict[str, List[Callable[[Any], Any]]] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        merged = {**DEFAULT_FIELD_PATHS, **self.paths}
+        self.getters = {leaf: [compile_path(p) for p in cands] for leaf, cands in merged.items()}
+
+    def find(self, next_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            listing = self.locate(next_data)
+        except Exception:
+            return None
+        return listing if isinstance(listing, dict) and listing else None
+
+
+class FieldReader:
+    """Reads leaves from one listing, remembering which candidate path hit.
+
+    ``learned`` is shared by every page of the same template, so after the
+    first parse each leaf is a single direct lookup; a miss falls back to
+    probing the remaining candidates.
+    """
+
+    def __init__(self, listing: Dict[str, Any], layout: Optional[Layout] = None, learned: Optional[Dict[str, int]] = None) -> None:
+        self.listing = listing
+        self.layout = layout
+        self.learned = learned if learned is not None else {}
+
+    def get(self, leaf: str) -> Any:
+        getters = self.layout.getters.get(leaf, ()) if self.layout else ()
+        hit = self.learned.get(leaf)
+        if hit is not None:
+            value = getters[hit](self.listing)
+            if not _missing(value):
+                return value
+        for i, getter in enumerate(getters):
+            if i == hit:
+                continue
+            value = getter(self.listing)
+            if not _missing(value):
+                self.learned[leaf] = i
+                return value
+        return None
+
+    def collect(self, leaf: str) -> List[Any]:
+        getters = self.layout.getters.get(leaf, ()) if self.layout else ()
+        return [v for v in (g(self.listing) for g in getters) if not _missing(v)]
+
+
+def template_key(next_data: Dict[str, Any]) -> Optional[str]:
+    page, build = next_data.get("page"), next_data.get("buildId")
+    if not page and not build:
+        return None
+    return f"{page}|{build}"
+
+
+class LayoutRegistry:
+    """Ordered layouts plus the layout (and learned plan) last matched per page template."""
+
+    def __init__(self, layouts: Optional[List[Layout]] = None, max_templates: int = 256) -> None:
+        self._layouts: List[Layout] = list(layouts or [])
+        self._templates: Dict[str, Tuple[Layout, Dict[str, int]]] = {}
+        self.max_templates = max_templates
+        self.template_hits = 0
+        self.template_misses = 0
+
+    def register(self, layout: Layout, first: bool = False) -> None:
+        self._layouts = [l for l in self._layouts if l.name != layout.name]
+        if first:
+            self._layouts.insert(0, layout)
+        else:
+            self._layouts.append(layout)
+        self._templates.clear()
+
+    def unregister(self, name: str) -> None:
+        self._layouts = [l for l in self._layouts if l.name != name]
+        self._templates.clear()
+
+    def layouts(self) -> List[str]:
+        return [l.name for l in self._layouts]
+
+    def resolve(self, next_data: Dict[str, Any]) -> FieldReader:
+        if not isinstance(next_data, dict):
+            return FieldReader({})
+        key = template_key(next_data)
+        cached = self._templates.get(key) if key else None
+        if cached:
+            layout, learned = cached
+            listing = layout.find(next_data)
+            if listing is not None:
+                self.template_hits += 1
+                return FieldReader(listing, layout, learned)
+        self.template_misses += 1
+        for layout in self._layouts:
+            if cached and layout is cached[0]:
+                continue
+            listing = layout.find(next_data)
+            if listing is None:
+                continue
+            learned: Dict[str, int] = {}
+            if key:
+                if len(self._templates) >= self.max_templates:
+                    self._templates.clear()
+                self._templates[key] = (layout, learned)
+            return FieldReader(listing, layout, learned)
+        return FieldReader({})
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "layouts": self.layouts(),
+            "templates": len(self._templates),
+            "template_hits": self.template_hits,
+            "template_misses": self.template_misses,
+        }
+
+
+BUILTIN_LAYOUTS = [
+    Layout("pdp", compile_path(("props", "pageProps", "listing"))),
+    Layout(
+        "bootstrap_redux",
+        compile_path(("props", "pageProps", "bootstrapData", "reduxData", "homePDP", "listingInfo", "listing")),
+    ),
+    Layout("apollo", _apollo_listing),
+]
+
+_registry = LayoutRegistry(BUILTIN_LAYOUTS)
+
+
+def registry() -> LayoutRegistry:
+    return _registry
+
+
+def register_layout(layout: Layout, first: bool = False) -> None:
+    """Add (or replace, by name) a layout; ``first`` tries it before the built-ins."""
+    _registry.register(layout, first=first)
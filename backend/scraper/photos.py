@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import struct
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .state import StateBackend
+
+# Query params that only select a rendition of the same CDN picture
+_VARIANT_PARAMS = {"im_w", "im_q", "im_format", "im_origin", "aki_policy", "width", "height"}
+
+# Legacy ``aki_policy`` renditions, mapped to an approximate width for ranking
+_AKI_WIDTHS = {
+    "x_small": 120,
+    "small": 240,
+    "medium": 480,
+    "x_medium": 640,
+    "large": 1024,
+    "xx_large": 1440,
+    "x_large": 1200,
+    "xl_poster": 1440,
+}
+
+
+def _is_cdn_picture(parts) -> bool:
+    host = (parts.hostname or "").lower()
+    return "muscache.com" in host or "/im/pictures/" in parts.path
+
+
+def canonical_photo_url(url: str) -> str:
+    """Identity of a picture regardless of the size variant requested.
+
+    For muscache ``/im/pictures`` URLs the rendition params are dropped and the
+    scheme forced to https; other URLs only lose their fragment.
+    """
+    parts = urlsplit(url)
+    if not _is_cdn_picture(parts):
+        return urlunsplit((parts.scheme, parts.netloc, parts.path, parts.query, ""))
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in _VARIANT_PARAMS]
+    return urlunsplit(("https", parts.netloc.lower(), parts.path, urlencode(query), ""))
+
+
+def variant_width(url: str) -> Optional[int]:
+    """Width requested by a CDN size variant, if the URL says."""
+    for k, v in parse_qsl(urlsplit(url).query):
+        k = k.lower()
+        if k in ("im_w", "width"):
+            try:
+                return int(v)
+            except ValueError:
+                return None
+        if k == "aki_policy":
+            return _AKI_WIDTHS.get(v.lower())
+    return None
+
+
+def _rank(photo: Dict[str, Any]) -> int:
+    w = photo.get("width")
+    if isinstance(w, int) and w > 0:
+        return w
+    return variant_width(photo["url"]) or 0
+
+
+class PhotoSet:
+    """Ordered photos keyed by canonical URL; a larger variant replaces a smaller one in place."""
+
+    def __init__(self) -> None:
+        self._items: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, url: str) -> bool:
+        return canonical_photo_url(url) in self._items
+
+    def add(self, url: str, width: Any = None, height: Any = None, caption: Optional[str] = None) -> bool:
+        """Returns True when ``url`` is a picture not seen before."""
+        key = canonical_photo_url(url)
+        new = {"url": url, "width": width, "height": height, "caption": caption}
+        cur = self._items.get(key)
+        if cur is None:
+            self._items[key] = new
+            return True
+        if _rank(new) > _rank(cur):
+            new["caption"] = new["caption"] or cur["caption"]
+            self._items[key] = new
+        elif not cur["caption"] and caption:
+            cur["caption"] = caption
+        return False
+
+    def items(self) -> List[Dict[str, Any]]:
+        return list(self._items.values())
+
+    def urls(self) -> List[str]:
+        return [p["url"] for p in self._items.values()]
+
+
+def collapse_variants(urls: Iterable[str]) -> List[str]:
+    """Distinct pictures in first-seen order, each at its best known resolution."""
+    ps = PhotoSet()
+    for u in urls:
+        ps.add(u)
+    return ps.urls()
+
+
+def image_size(head: bytes) -> Optional[Tuple[int, int]]:
+    """(width, height) from the first bytes of a JPEG, PNG, GIF or WebP file."""
+    if head[:8] == b"\x89PNG\r\n\x1a\n" and len(head) >= 24:
+        return struct.unpack(">II", head[16:24])
+    if head[:6] in (b"GIF87a", b"GIF89a") and len(head) >= 10:
+        return struct.unpack("<HH", head[6:10])
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP" and len(head) >= 30:
+        chunk = head[12:16]
+        if chunk == b"VP8 ":
+            w, h = struct.unpack("<HH", head[26:30])
+            return w & 0x3FFF, h & 0x3FFF
+        if chunk == b"VP8L":
+            b = head[21:25]
+            w = 1 + (((b[1] & 0x3F) << 8) | b[0])
+            h = 1 + (((b[3] & 0x0F) << 10) | (b[2] << 2) | ((b[1] & 0xC0) >> 6))
+            return w, h
+        if chunk == b"VP8X":
+            w = 1 + int.from_bytes(head[24:27], "little")
+            h = 1 + int.from_bytes(head[27:30], "little")
+            return w, h
+        return None
+    if head[:2] == b"\xff\xd8":
+        i = 2
+        while i + 9 < len(head):
+            if head[i] != 0xFF:
+                i += 1
+                continue
+            marker = head[i + 1]
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7 or marker == 0xFF:
+                i += 1 if marker == 0xFF else 2
+                continue
+            seg_len = struct.unpack(">H", head[i + 2:i + 4])[0]
+            # SOF0..SOF15 except DHT (C4), JPG (C8) and DAC (CC)
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                h, w = struct.unpack(">HH", head[i + 5:i + 9])
+                return w, h
+            i += 2 + seg_len
+    return None
+
+
+class DimensionProber:
+    """Fills missing photo width/height from ranged GETs of the image header.
+
+    Results are cached per URL in the state backend (each size variant has
+    its own dimensions), so re-scraped listings cost nothing. A definitive
+    miss (404/410, or a body that is not an image) is cached for ``ttl_s``;
+    an image whose header could not be read, or another 4xx, only for
+    ``negative_ttl_s``. 429 and 5xx answers are not cached at all.
+    """
+
+    def __init__(
+        self,
+        backend: StateBackend,
+        concurrency: int = 8,
+        timeout_s: float = 5.0,
+        range_bytes: int = 65536,
+        ttl_s: float = 30 * 86400,
+        negative_ttl_s: float = 3600.0,
+    ) -> None:
+        self.backend = backend
+        self.concurrency = max(1, concurrency)
+        self.timeout_s = timeout_s
+        self.range_bytes = range_bytes
+        self.ttl_s = ttl_s
+        self.negative_ttl_s = negative_ttl_s
+
+    @classmethod
+    def from_env(cls, backend: StateBackend) -> "DimensionProber":
+        return cls(
+            backend,
+            concurrency=int(os.getenv("PHOTO_PROBE_CONCURRENCY", "8")),
+            timeout_s=float(os.getenv("PHOTO_PROBE_TIMEOUT_S", "5")),
+            range_bytes=int(os.getenv("PHOTO_PROBE_RANGE_BYTES", "65536")),
+            negative_ttl_s=float(os.getenv("PHOTO_PROBE_NEGATIVE_TTL_S", "3600")),
+        )
+
+    async def dimensions(self, client: Any, url: str) -> Optional[Tuple[int, int]]:
+        key = f"photo:dim:{url}"
+        # The cache is an optimisation: a backend outage or a bad entry is a miss
+        try:
+            cached = await self.backend.get(key)
+            if cached:
+                w, h = json.loads(cached)
+                return (w, h) if w and h else None
+        except Exception:
+            pass
+        size: Optional[Tuple[int, int]] = None
+        ttl: Optional[float] = self.ttl_s
+        try:
+            async with client.stream("GET", url, headers={"Range": f"bytes=0-{self.range_bytes - 1}"}) as resp:
+                status = resp.status_code
+                if status in (200, 206):
+                    buf = b""
+                    async for chunk in resp.aiter_bytes():
+                        buf += chunk
+                        size = image_size(buf)
+                        if size or len(buf) >= self.range_bytes:
+                            break
+                    ctype = resp.headers.get("content-type", "").lower()
+                    if size is None and ctype.startswith("image/"):
+                        ttl = self.negative_ttl_s  # an image we could not read (yet)
+                elif status == 429 or status >= 500:
+                    ttl = None  # throttled or down: probe again next time
+                elif status not in (404, 410):
+                    ttl = self.negative_ttl_s
+        except Exception:
+            return None
+        # Negative results are cached too so broken images are not refetched
+        if ttl:
+            try:
+                await self.backend.set(key, json.dumps(list(size) if size else [0, 0]), ttl_s=ttl)
+            except Exception:
+                pass
+        return size
+
+    async def fill(self, photos: List[Any]) -> int:
+        """Set width/height in place on Photo models or dicts; returns how many were filled."""
+        import httpx
+
+        def get(p: Any, k: str) -> Any:
+            return p.get(k) if isinstance(p, dict) else getattr(p, k)
+
+        todo = [p for p in photos if not (get(p, "width") and get(p, "height"))]
+        if not todo:
+            return 0
+        sem = asyncio.Semaphore(self.concurrency)
+        filled = 0
+
+        async with httpx.AsyncClient(follow_redirects=True, timeout=self.timeout_s) as client:
+
+            async def one(p: Any) -> None:
+                nonlocal filled
+                async with sem:
+                    size = await self.dimensions(client, get(p, "url"))
+                if not size:
+                    return
+                if isinstance(p, dict):
+                    p["width"], p["height"] = size
+                else:
+                    p.width, p.height = size
+                filled += 1
+
+            await asyncio.gather(*(one(p) for p in todo))
+        return filled
+
+
+def probe_enabled() -> bool:
+    return os.getenv("PHOTO_PROBE", "0").lower() in ("1", "true", "yes")
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+from prometheus_client import Counter, Gauge
+
+from .anti_bot import looks_blocked
+from .state import StateBackend, is_shared, state_backend
+
+_RATE_GAUGE = Gauge("scrappy_host_rate", "Current allowed requests per second", ["host"])
+_BLOCKS = Counter("scrappy_host_blocks_total", "Responses classified as rate limited or challenged", ["host"])
+_WAIT_SECONDS = Counter("scrappy_host_wait_seconds_total", "Seconds spent waiting on per-host politeness", ["host"])
+
+# Hosts come from user-supplied URLs; only these get their own metric series, the rest share "other"
+DEFAULT_METRIC_HOSTS = ("airbnb.com",)
+
+
+def host_key(url: str) -> str:
+    host = (urlparse(url).hostname or url or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+class HostState:
+    __slots__ = ("rate", "tokens", "updated_at", "blocked_until", "failures", "min_interval")
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.failures = 0
+        self.min_interval = 0.0
+
+
+class PolitenessController:
+    """Per-host token bucket whose rate adapts to observed responses.
+
+    Successful fetches raise the rate additively up to ``max_rate``; 429s,
+    challenge pages and 5xx cut it multiplicatively, and blocks additionally
+    pause the host with exponential backoff plus jitter (or Retry-After).
+    """
+
+    def __init__(
+        self,
+        initial_rate: float = 1.0,
+        min_rate: float = 0.05,
+        max_rate: float = 4.0,
+        burst: float = 2.0,
+        increase: float = 0.1,
+        decrease: float = 0.5,
+        base_backoff_s: float = 2.0,
+        max_backoff_s: float = 120.0,
+        max_hosts: int = 1024,
+        shared: Optional[StateBackend] = None,
+        metric_hosts: Iterable[str] = DEFAULT_METRIC_HOSTS,
+    ) -> None:
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.base_backoff_s = base_backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.max_hosts = max_hosts
+        self.metric_hosts = frozenset(host_key(f"//{h.strip()}") for h in metric_hosts if h.strip())
+        self._hosts: "OrderedDict[str, HostState]" = OrderedDict()
+        # Backoff pauses are published here so other workers honour them too
+        self.shared = shared
+        self._publishing: set = set()
+
+    @classmethod
+    def from_env(cls) -> "PolitenessController":
+        return cls(
+            initial_rate=float(os.getenv("POLITE_RATE", "1.0")),
+            min_rate=float(os.getenv("POLITE_MIN_RATE", "0.05")),
+            max_rate=float(os.getenv("POLITE_MAX_RATE", "4.0")),
+            burst=float(os.getenv("POLITE_BURST", "2")),
+            max_backoff_s=float(os.getenv("POLITE_MAX_BACKOFF_S", "120")),
+            shared=state_backend() if is_shared(state_backend()) else None,
+            metric_hosts=os.getenv("POLITE_METRIC_HOSTS", ",".join(DEFAULT_METRIC_HOSTS)).split(","),
+        )
+
+    def _label(self, host: str) -> str:
+        return host if host in self.metric_hosts else "other"
+
+    def _state(self, host: str) -> HostState:
+        st = self._hosts.get(host)
+        if st is None:
+            st = HostState(self.initial_rate, self.burst)
+            self._hosts[host] = st
+            while len(self._hosts) > self.max_hosts:
+                self._hosts.popitem(last=False)
+        else:
+            self._hosts.move_to_end(host)
+        return st
+
+    def _refill(self, st: HostState, now: float) -> None:
+        st.tokens = min(self.burst, st.tokens + (now - st.updated_at) * st.rate)
+        st.updated_at = now
+
+    def delay_for(self, url: str) -> float:
+        """Seconds a request to ``url`` would have to wait right now."""
+        st = self._state(host_key(url))
+        now = time.monotonic()
+        self._refill(st, now)
+        wait = max(0.0, st.blocked_until - now)
+        if st.tokens < 1.0:
+            wait = max(wait, (1.0 - st.tokens) / st.rate)
+        return wait
+
+    async def _sync_shared(self, host: str) -> None:
+        try:
+            until = await self.shared.get(f"polite:block:{host}")
+        except Exception:
+            return
+        if until:
+            st = self._state(host)
+            st.blocked_until = max(st.blocked_until, time.monotonic() + float(until) - time.time())
+
+    def _publish_block(self, host: str, pause: float) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        coro = self.shared.set(f"polite:block:{host}", str(time.time() + pause), ttl_s=pause)
+        task = loop.create_task(coro)
+        self._publishing.add(task)
+        task.add_done_callback(lambda t: self._publishing.discard(t) or t.cancelled() or t.exception())
+
+    async def acquire(self, url: str) -> float:
+        host = host_key(url)
+        waited = 0.0
+        if self.shared is not None:
+            await self._sync_shared(host)
+        while True:
+            delay = self.delay_for(url)
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+            waited += delay
+        st = self._state(host)
+        st.tokens -= 1.0
+        if st.min_interval > 0:
+            # Crawl-delay style floor: hold the next caller back by the interval
+            st.tokens = min(st.tokens, 1.0 - st.min_interval * st.rate)
+        if waited:
+            _WAIT_SECONDS.labels(self._label(host)).inc(waited)
+        return waited
+
+    def observe(
+        self,
+        url: str,
+        status: Optional[int] = None,
+        body: Optional[str] = None,
+        error: bool = False,
+        retry_after: Optional[str] = None,
+    ) -> None:
+        host = host_key(url)
+        st = self._state(host)
+        now = time.monotonic()
+        self._refill(st, now)
+        if looks_blocked(status, body):
+            st.failures += 1
+            st.rate = max(self.min_rate, st.rate * self.decrease)
+            backoff = min(self.max_backoff_s, self.base_backoff_s * (2 ** (st.failures - 1)))
+            pause = random.uniform(backoff / 2, backoff)
+            hinted = _parse_retry_after(retry_after)
+            if hinted is not None:
+                pause = max(pause, min(hinted, self.max_backoff_s))
+            st.blocked_until = max(st.blocked_until, now + pause)
+            if self.shared is not None:
+                self._publish_block(host, pause)
+            st.tokens = min(st.tokens, 0.0)
+            _BLOCKS.labels(self._label(host)).inc()
+        elif error or (status is not None and status >= 500):
+            st.rate = max(self.min_rate, st.rate * self.decrease)
+        elif status is not None and status < 400:
+            st.failures = 0
+            st.rate = min(self.max_rate, st.rate + self.increase)
+        if host in self.metric_hosts:
+            # A rate is per host; "other" would only show whichever host reported last (see stats())
+            _RATE_GAUGE.labels(host).set(st.rate)
+
+    def set_min_interval(self, url: str, seconds: float) -> None:
+        st = self._state(host_key(url))
+        st.min_interval = max(0.0, seconds)
+        if seconds > 0:
+            st.rate = min(st.rate, 1.0 / seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            host: {
+                "rate": round(st.rate, 3),
+                "blocked_for_s": round(max(0.0, st.blocked_until - now), 3),
+                "failures": st.failures,
+            }
+            for host, st in self._hosts.items()
+        }
+
+
+_controller: Optional[PolitenessController] = None
+
+
+def controller() -> PolitenessController:
+    global _controller
+    if _controller is None:
+        _controller = PolitenessController.from_env()
+    return _controller
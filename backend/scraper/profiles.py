@@ -0,0 +1,203 @@
+"""Reusable browser storage-state profiles (cookies + localStorage).
+
+A fresh context replays first-visit flows (consent banner, locale and currency
+negotiation) on every render. Instead, a context that rendered cleanly has its
+storage state captured to disk; later contexts start from one of those
+profiles. Profiles rotate out by age and use count and are dropped after
+repeated failures (blocked pages, navigation errors) while attached.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+import uuid
+from contextvars import ContextVar, Token
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from prometheus_client import Counter, Gauge
+
+_EVENTS = Counter("scrappy_browser_profiles_total", "Storage-state profile lifecycle events", ["event"])
+_LIVE = Gauge("scrappy_browser_profiles_live", "Storage-state profiles available for new contexts")
+
+
+class StorageProfile:
+    __slots__ = ("name", "path", "created_at", "uses", "failures")
+
+    def __init__(self, name: str, path: Path, created_at: float) -> None:
+        self.name = name
+        self.path = path
+        self.created_at = created_at
+        self.uses = 0
+        self.failures = 0
+
+
+class ProfileLease:
+    """What one browser context did with its profile; filled in by ``polite_goto``."""
+
+    __slots__ = ("profile", "ok", "failed")
+
+    def __init__(self, profile: Optional[StorageProfile]) -> None:
+        self.profile = profile
+        self.ok = 0
+        self.failed = False
+
+
+_lease: ContextVar[Optional[ProfileLease]] = ContextVar("profile_lease", default=None)
+
+
+def set_current_lease(lease: Optional[ProfileLease]) -> Token:
+    return _lease.set(lease)
+
+
+def reset_current_lease(token: Token) -> None:
+    _lease.reset(token)
+
+
+def current_lease() -> Optional[ProfileLease]:
+    return _lease.get()
+
+
+def report_navigation(ok: bool) -> None:
+    lease = _lease.get()
+    if lease is None:
+        return
+    if ok:
+        lease.ok += 1
+    else:
+        lease.failed = True
+
+
+class ProfileStore:
+    def __init__(
+        self,
+        root: Path,
+        max_profiles: int = 4,
+        max_uses: int = 200,
+        max_age_s: float = 12 * 3600,
+        max_failures: int = 2,
+    ) -> None:
+        self.root = Path(root)
+        self.max_profiles = max_profiles
+        self.max_uses = max_uses
+        self.max_age_s = max_age_s
+        self.max_failures = max_failures
+        self._profiles: Optional[Dict[str, StorageProfile]] = None
+        self._next = 0
+
+    @classmethod
+    def from_env(cls) -> "ProfileStore":
+        return cls(
+            root=Path(os.getenv("BROWSER_PROFILE_DIR", "/tmp/scrappy-profiles")),
+            max_profiles=int(os.getenv("BROWSER_PROFILES", "4")),
+            max_uses=int(os.getenv("BROWSER_PROFILE_MAX_USES", "200")),
+            max_age_s=float(os.getenv("BROWSER_PROFILE_MAX_AGE_H", "12")) * 3600,
+            max_failures=int(os.getenv("BROWSER_PROFILE_MAX_FAILURES", "2")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_profiles > 0
+
+    def _load(self) -> Dict[str, StorageProfile]:
+        # Profiles persisted by an earlier process are picked up once, aged by mtime
+        if self._profiles is None:
+            self._profiles = {}
+            if self.root.exists():
+                for p in sorted(self.root.glob("*.json")):
+                    try:
+                        created = p.stat().st_mtime
+                    except FileNotFoundError:
+                        continue
+                    self._profiles[p.stem] = StorageProfile(p.stem, p, created)
+            _LIVE.set(len(self._profiles))
+        return self._profiles
+
+    def _drop(self, profile: StorageProfile, event: str) -> None:
+        profiles = self._load()
+        if profiles.pop(profile.name, None) is not None:
+            _EVENTS.labels(event).inc()
+        try:
+            profile.path.unlink()
+        except FileNotFoundError:
+            pass
+        _LIVE.set(len(profiles))
+
+    def _expire(self) -> List[StorageProfile]:
+        now = time.time()
+        live = []
+        for prof in list(self._load().values()):
+            if now - prof.created_at > self.max_age_s or prof.uses >= self.max_uses:
+                self._drop(prof, "expired")
+            elif not prof.path.exists():
+                self._drop(prof, "missing")
+            else:
+                live.append(prof)
+        return live
+
+    def choose(self) -> Optional[StorageProfile]:
+        """Profile for a new context, or None when the context should start fresh.
+
+        While below ``max_profiles`` every other context starts fresh so new
+        profiles get captured; rotation then happens through expiry.
+        """
+        if not self.enabled:
+            return None
+        live = self._expire()
+        self._next += 1
+        if not live or (len(live) < self.max_profiles and self._next % 2 == 0):
+            return None
+        prof = live[self._next % len(live)]
+        prof.uses += 1
+        _EVENTS.labels("attached").inc()
+        return prof
+
+    def wants_capture(self) -> bool:
+        return self.enabled and len(self._expire()) < self.max_profiles
+
+    def capture(self, state: Dict[str, Any]) -> Optional[StorageProfile]:
+        """Persist a context's ``storage_state()`` as a new profile."""
+        if not self.wants_capture():
+            return None
+        self.root.mkdir(parents=True, exist_ok=True)
+        name = uuid.uuid4().hex[:12]
+        path = self.root / f"{name}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        tmp.replace(path)
+        prof = StorageProfile(name, path, time.time())
+        self._load()[name] = prof
+        _EVENTS.labels("captured").inc()
+        _LIVE.set(len(self._profiles))
+        return prof
+
+    def release(self, lease: ProfileLease) -> None:
+        """Count a failure against the lease's profile, dropping it past ``max_failures``."""
+        prof = lease.profile
+        if prof is None or prof.name not in self._load():
+            return
+        if lease.failed:
+            prof.failures += 1
+            if prof.failures >= self.max_failures:
+                self._drop(prof, "invalidated")
+        elif lease.ok:
+            prof.failures = 0
+
+    def stats(self) -> Dict[str, Any]:
+        live = self._expire() if self.enabled else []
+        return {
+            "profiles": len(live),
+            "max_profiles": self.max_profiles,
+            "uses": {p.name: p.uses for p in live},
+        }
+
+
+_store: Optional[ProfileStore] = None
+
+
+def profiles() -> ProfileStore:
+    global _store
+    if _store is None:
+        _store = ProfileStore.from_env()
+    return _store
@@ -0,0 +1,300 @@
+"""robots.txt policies: fetched once per host, cached, compiled for fast checks.
+
+Parsing follows RFC 9309. The group for our product token is used, falling
+back to ``*``. The longest matching rule wins, and ``allow`` wins ties.
+``*`` and ``$`` are supported. A missing robots.txt (4xx) allows everything;
+a 5xx answer disallows everything until the short error TTL passes. When the
+host cannot be reached at all the policy is unknown: fetches are allowed and
+the download is retried after ``retry_s``. ``Crawl-delay`` is handed to the politeness controller as
+a per-host minimum interval.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from prometheus_client import Counter
+
+_DECISIONS = Counter("scrappy_robots_decisions_total", "robots.txt checks by outcome", ["decision"])
+_FETCHES = Counter("scrappy_robots_fetch_total", "robots.txt downloads by result", ["result"])
+
+MAX_ROBOTS_BYTES = 500 * 1024
+
+
+class RobotsDisallowed(Exception):
+    def __init__(self, url: str) -> None:
+        super().__init__(f"{url} is disallowed by robots.txt")
+        self.url = url
+
+
+_TRACKING_PARAMS = frozenset({"fbclid", "gclid", "msclkid", "source_impression_id", "previous_page_section_name", "federated_search_id"})
+
+
+def _target(url: str) -> str:
+    """Path (and meaningful query) matched against the rules.
+
+    Listing pages are matched on their path alone: check-in dates, guest
+    counts and tracking ids do not change which page is fetched. Elsewhere
+    only tracking params are dropped.
+    """
+    p = urlsplit(url)
+    path = p.path or "/"
+    if "/rooms/" in path:
+        return path
+    query = [
+        (k, v)
+        for k, v in parse_qsl(p.query, keep_blank_values=True)
+        if k not in _TRACKING_PARAMS and not k.startswith("utm_")
+    ]
+    return path + (f"?{urlencode(query)}" if query else "")
+
+
+def _compile(pattern: str) -> Callable[[str], bool]:
+    if "*" not in pattern and not pattern.endswith("$"):
+        return lambda path: path.startswith(pattern)
+    anchored = pattern.endswith("$")
+    body = pattern[:-1] if anchored else pattern
+    rx = re.compile("".join(".*" if c == "*" else re.escape(c) for c in body) + ("$" if anchored else ""))
+    return lambda path: rx.match(path) is not None
+
+
+class RobotsPolicy:
+    """Compiled rules for one user-agent group of one host."""
+
+    __slots__ = ("rules", "crawl_delay", "status", "snippet")
+
+    def __init__(
+        self,
+        rules: Optional[List[Tuple[str, bool]]] = None,
+        crawl_delay: Optional[float] = None,
+        status: Optional[int] = None,
+        snippet: str = "",
+    ) -> None:
+        # Longest pattern first, allow before disallow at equal length
+        ordered = sorted(rules or [], key=lambda r: (-len(r[0]), not r[1]))
+        self.rules = [(pattern, allow, _compile(pattern)) for pattern, allow in ordered]
+        self.crawl_delay = crawl_delay
+        self.status = status
+        self.snippet = snippet
+
+    @classmethod
+    def allow_all(cls, status: Optional[int] = None) -> "RobotsPolicy":
+        return cls(status=status)
+
+    @classmethod
+    def disallow_all(cls, status: Optional[int] = None) -> "RobotsPolicy":
+        return cls([("/", False)], status=status)
+
+    def match(self, path: str) -> Optional[Tuple[str, bool]]:
+        for pattern, allow, test in self.rules:
+            if test(path):
+                return pattern, allow
+        return None
+
+    def allowed(self, path: str) -> bool:
+        if path.startswith("/robots.txt"):
+            return True
+        hit = self.match(path)
+        return True if hit is None else hit[1]
+
+
+def parse_robots(text: str, agent: str, status: Optional[int] = 200) -> RobotsPolicy:
+    """Rules and crawl-delay from the group named for product token ``agent``, else ``*``."""
+    token = agent.strip().lower()
+    groups: List[Tuple[List[str], List[Tuple[str, bool]], Optional[float]]] = []
+    agents: List[str] = []
+    rules: List[Tuple[str, bool]] = []
+    delay: Optional[float] = None
+    in_rules = False
+    for raw in text.splitlines():
+        line = raw.split("#", 1)[0].strip()
+        if ":" not in line:
+            continue
+        key, _, value = line.partition(":")
+        key, value = key.strip().lower(), value.strip()
+        if key == "user-agent":
+            if in_rules:
+                groups.append((agents, rules, delay))
+                agents, rules, delay, in_rules = [], [], None, False
+            agents.append(value.lower())
+        elif key in ("allow", "disallow"):
+            in_rules = True
+            if value:  # an empty Disallow means allow everything
+                rules.append((value, key == "allow"))
+        elif key == "crawl-delay":
+            in_rules = True
+            try:
+                delay = float(value)
+            except ValueError:
+                pass
+    if agents:
+        groups.append((agents, rules, delay))
+
+    chosen: List[Tuple[List[Tuple[str, bool]], Optional[float]]] = []
+    for names, group_rules, group_delay in groups:
+        # RFC 9309: the group name is compared to our product token, case-insensitively
+        if token in names:
+            chosen.append((group_rules, group_delay))
+    if not chosen:
+        chosen = [(r, d) for names, r, d in groups if "*" in names]
+    # Groups for the same agent are merged
+    merged = [rule for r, _ in chosen for rule in r]
+    delays = [d for _, d in chosen if d is not None]
+    return RobotsPolicy(merged, max(delays) if delays else None, status, text[:500])
+
+
+class RobotsCache:
+    def __init__(
+        self,
+        agent: str = "air-scrappy",
+        ttl_s: float = 86400.0,
+        error_ttl_s: float = 300.0,
+        retry_s: float = 60.0,
+        max_hosts: int = 1024,
+        max_crawl_delay_s: float = 30.0,
+        timeout_s: float = 10.0,
+    ) -> None:
+        self.agent = agent
+        self.ttl_s = ttl_s
+        self.error_ttl_s = error_ttl_s
+        self.retry_s = retry_s
+        self.max_hosts = max_hosts
+        self.max_crawl_delay_s = max_crawl_delay_s
+        self.timeout_s = timeout_s
+        self._policies: "OrderedDict[str, Tuple[RobotsPolicy, float]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @classmethod
+    def from_env(cls) -> "RobotsCache":
+        return cls(
+            agent=os.getenv("ROBOTS_USER_AGENT", "air-scrappy"),
+            ttl_s=float(os.getenv("ROBOTS_TTL_S", "86400")),
+            error_ttl_s=float(os.getenv("ROBOTS_ERROR_TTL_S", "300")),
+            retry_s=float(os.getenv("ROBOTS_RETRY_S", "60")),
+            max_crawl_delay_s=float(os.getenv("ROBOTS_MAX_CRAWL_DELAY_S", "30")),
+        )
+
+    @staticmethod
+    def robots_url(url: str) -> str:
+        p = urlsplit(url)
+        return f"{p.scheme or 'https'}://{p.netloc}/robots.txt"
+
+    def cached(self, url: str) -> Optional[RobotsPolicy]:
+        key = self.robots_url(url)
+        item = self._policies.get(key)
+        if item is None or item[1] <= time.monotonic():
+            return None
+        self._policies.move_to_end(key)
+        return item[0]
+
+    def put(self, url: str, policy: RobotsPolicy, ttl_s: float) -> None:
+        self._policies[self.robots_url(url)] = (policy, time.monotonic() + ttl_s)
+        while len(self._policies) > self.max_hosts:
+            self._policies.popitem(last=False)
+        if policy.crawl_delay:
+            from .politeness import controller as politeness
+
+            politeness().set_min_interval(url, min(policy.crawl_delay, self.max_crawl_delay_s))
+
+    async def _download(self, url: str) -> Tuple[RobotsPolicy, float]:
+        import httpx
+
+        from .proxy_pool import proxy_pool
+
+        robots = self.robots_url(url)
+        # Same egress as the fetches this guards: a pool proxy when configured, else the environment's
+        pool = proxy_pool()
+        proxy = pool.choose(f"robots:{urlsplit(url).netloc}")
+        started = time.monotonic()
+        try:
+            async with httpx.AsyncClient(proxy=proxy, follow_redirects=True, timeout=self.timeout_s) as client:
+                resp = await client.get(robots)
+        except httpx.HTTPError:
+            pool.report(proxy, False)
+            _FETCHES.labels("unreachable").inc()
+            return RobotsPolicy.allow_all(), self.retry_s
+        pool.report(proxy, resp.status_code < 500, time.monotonic() - started)
+        if resp.status_code >= 500:
+            _FETCHES.labels("error").inc()
+            return RobotsPolicy.disallow_all(resp.status_code), self.error_ttl_s
+        if resp.status_code >= 400:
+            _FETCHES.labels("missing").inc()
+            return RobotsPolicy.allow_all(resp.status_code), self.ttl_s
+        _FETCHES.labels("ok").inc()
+        text = resp.content[:MAX_ROBOTS_BYTES].decode("utf-8", "replace")
+        return parse_robots(text, self.agent, resp.status_code), self.ttl_s
+
+    async def _load(self, url: str) -> RobotsPolicy:
+        try:
+            policy, ttl = await self._download(url)
+            self.put(url, policy, ttl)
+            return policy
+        finally:
+            self._inflight.pop(self.robots_url(url), None)
+
+    async def policy(self, url: str) -> RobotsPolicy:
+        hit = self.cached(url)
+        if hit is not None:
+            return hit
+        # Concurrent first requests to a host share one download
+        key = self.robots_url(url)
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.ensure_future(self._load(url))
+        return await asyncio.shield(task)
+
+    async def allowed(self, url: str) -> bool:
+        ok = (await self.policy(url)).allowed(_target(url))
+        _DECISIONS.labels("allowed" if ok else "disallowed").inc()
+        return ok
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hosts": len(self._policies), "agent": self.agent}
+
+
+class RobotsGate:
+    """Inline enforcement for the fetch pipelines; ``ROBOTS_POLICY`` is enforce, warn or off."""
+
+    def __init__(self, cache: RobotsCache, mode: str = "warn") -> None:
+        self.cache = cache
+        self.mode = mode if mode in ("enforce", "warn", "off") else "warn"
+
+    @classmethod
+    def from_env(cls) -> "RobotsGate":
+        return cls(RobotsCache.from_env(), os.getenv("ROBOTS_POLICY", "warn").lower())
+
+    async def ensure_allowed(self, url: str) -> None:
+        if self.mode == "off":
+            return
+        if not await self.cache.allowed(url) and self.mode == "enforce":
+            raise RobotsDisallowed(url)
+
+    async def check(self, url: str) -> Dict[str, Any]:
+        """Policy for ``url`` as reported by ``/robots-check`` (no decision metrics)."""
+        policy = await self.cache.policy(url)
+        return {
+            "robots_url": self.cache.robots_url(url),
+            "status": policy.status,
+            "snippet": policy.snippet,
+            "allowed": policy.allowed(_target(url)),
+            "crawl_delay": policy.crawl_delay,
+            "policy": self.mode,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"policy": self.mode, **self.cache.stats()}
+
+
+_gate: Optional[RobotsGate] = None
+
+
+def robots() -> RobotsGate:
+    global _gate
+    if _gate is None:
+        _gate = RobotsGate.from_env()
+    return _gate
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import deque
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from .concurrency import AdaptiveLimiter
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+_QUEUE_GAUGE = Gauge("scrappy_render_queue_length", "Renders waiting for a browser slot", ["priority"])
+_ACTIVE_GAUGE = Gauge("scrappy_render_active", "Renders holding a browser slot", ["priority"])
+_WAIT_HIST = Histogram(
+    "scrappy_render_queue_wait_seconds",
+    "Time spent waiting for a browser slot",
+    ["priority"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+_TIMEOUTS = Counter("scrappy_render_queue_timeouts_total", "Renders rejected after max queue wait", ["priority"])
+
+
+def _parse_map(raw: str, default: Dict[str, float]) -> Dict[str, float]:
+    out = dict(default)
+    for part in (raw or "").split(","):
+        if "=" not in part:
+            continue
+        k, v = part.split("=", 1)
+        try:
+            out[k.strip()] = float(v)
+        except ValueError:
+            continue
+    return out
+
+
+@dataclass(frozen=True)
+class RenderRequest:
+    priority: str = INTERACTIVE
+    api_key: Optional[str] = None
+
+
+_current: ContextVar[RenderRequest] = ContextVar("render_request", default=RenderRequest())
+
+
+def set_render_request(priority: Optional[str] = None, api_key: Optional[str] = None) -> Token:
+    return _current.set(RenderRequest(priority=(priority or INTERACTIVE).strip().lower(), api_key=api_key))
+
+
+def current_render_request() -> RenderRequest:
+    return _current.get()
+
+
+def clamp_priority(requested: Optional[str], ceiling: str = INTERACTIVE) -> str:
+    """Class for a client-supplied ``X-Render-Priority``, never above the endpoint's ``ceiling``.
+
+    Bulk endpoints always queue as bulk; interactive ones let callers step down.
+    """
+    if ceiling == BULK:
+        return BULK
+    return (requested or ceiling).strip().lower() or ceiling
+
+
+class QueueTimeout(Exception):
+    pass
+
+
+class _Waiter:
+    __slots__ = ("future", "key", "enqueued_at")
+
+    def __init__(self, future: asyncio.Future, key: Optional[str]) -> None:
+        self.future = future
+        self.key = key
+        self.enqueued_at = time.monotonic()
+
+
+class RenderScheduler:
+    """Weighted fair queue in front of an :class:`AdaptiveLimiter`.
+
+    Each priority class gets slots in proportion to its weight whenever more
+    than one class is waiting; a per-key quota caps how many slots a single
+    API key can hold, and waiters give up after the class's max queue wait.
+    """
+
+    def __init__(
+        self,
+        limiter: AdaptiveLimiter,
+        weights: Optional[Dict[str, float]] = None,
+        max_wait_s: Optional[Dict[str, float]] = None,
+        per_key_limit: int = 0,
+    ) -> None:
+        self.limiter = limiter
+        self.weights = weights or {INTERACTIVE: 8.0, BULK: 1.0}
+        self.max_wait_s = max_wait_s or {INTERACTIVE: 30.0, BULK: 600.0}
+        self.per_key_limit = per_key_limit
+        self._queues: Dict[str, Deque[_Waiter]] = {c: deque() for c in self.weights}
+        self._vtime: Dict[str, float] = {c: 0.0 for c in self.weights}
+        self._active: Dict[str, int] = {c: 0 for c in self.weights}
+        self._per_key: Dict[str, int] = {}
+        self._clock = 0.0
+        limiter.queue_probe = lambda: self.queued
+
+    @classmethod
+    def from_env(cls, limiter: AdaptiveLimiter) -> "RenderScheduler":
+        return cls(
+            limiter,
+            weights=_parse_map(os.getenv("RENDER_WEIGHTS", ""), {INTERACTIVE: 8.0, BULK: 1.0}),
+            max_wait_s=_parse_map(os.getenv("RENDER_MAX_WAIT_S", ""), {INTERACTIVE: 30.0, BULK: 600.0}),
+            per_key_limit=int(os.getenv("RENDER_KEY_CONCURRENCY", "0") or 0),
+        )
+
+    @property
+    def queued(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def _class_of(self, priority: Optional[str]) -> str:
+        if priority in self._queues:
+            return priority
+        return INTERACTIVE if INTERACTIVE in self._queues else next(iter(self._queues))
+
+    def _key_ok(self, key: Optional[str]) -> bool:
+        return not key or self.per_key_limit <= 0 or self._per_key.get(key, 0) < self.per_key_limit
+
+    async def acquire(self, priority: Optional[str] = None, key: Optional[str] = None) -> str:
+        cls = self._class_of(priority)
+        queue = self._queues[cls]
+        if not queue:
+            # A class returning from idle must not spend credit it banked while away
+            self._vtime[cls] = max(self._vtime[cls], self._clock)
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), key)
+        queue.append(waiter)
+        self._dispatch()
+        self._publish(cls)
+        try:
+            done, _ = await asyncio.wait({waiter.future}, timeout=self.max_wait_s.get(cls))
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted but never used: free it without feeding the limiter a latency sample
+                self.release(cls, key, sample=False)
+            else:
+                self._discard(cls, waiter)
+            raise
+        if not done:
+            self._discard(cls, waiter)
+            _TIMEOUTS.labels(cls).inc()
+            raise QueueTimeout(f"no browser slot for {cls} request within {self.max_wait_s.get(cls)}s")
+        _WAIT_HIST.labels(cls).observe(time.monotonic() - waiter.enqueued_at)
+        return cls
+
+    def release(
+        self,
+        priority: str,
+        key: Optional[str] = None,
+        latency_s: Optional[float] = None,
+        ok: bool = True,
+        timeout: bool = False,
+        sample: bool = True,
+    ) -> None:
+        cls = self._class_of(priority)
+        self._active[cls] = max(0, self._active[cls] - 1)
+        if key and key in self._per_key:
+            self._per_key[key] -= 1
+            if self._per_key[key] <= 0:
+                del self._per_key[key]
+        self.limiter.release(latency_s, ok=ok, timeout=timeout, sample=sample)
+        self._dispatch()
+        self._publish(cls)
+
+    def _discard(self, cls: str, waiter: _Waiter) -> None:
+        waiter.future.cancel()
+        try:
+            self._queues[cls].remove(waiter)
+        except ValueError:
+            pass
+        self._publish(cls)
+
+    def _next_waiter(self) -> Optional[tuple]:
+        best = None
+        for cls, queue in self._queues.items():
+            for waiter in queue:
+                if self._key_ok(waiter.key):
+                    if best is None or self._vtime[cls] < self._vtime[best[0]]:
+                        best = (cls, waiter)
+                    break
+        return best
+
+    def _dispatch(self) -> None:
+        while self.limiter.has_capacity():
+            picked = self._next_waiter()
+            if picked is None:
+                return
+            cls, waiter = picked
+            self._queues[cls].remove(waiter)
+            if waiter.future.done():
+                continue
+            self.limiter.try_acquire()
+            self._clock = self._vtime[cls]
+            self._vtime[cls] += 1.0 / max(self.weights.get(cls, 1.0), 1e-6)
+            self._active[cls] += 1
+            if waiter.key:
+                self._per_key[waiter.key] = self._per_key.get(waiter.key, 0) + 1
+            waiter.future.set_result(None)
+            self._publish(cls)
+
+    def _publish(self, cls: str) -> None:
+        _QUEUE_GAUGE.labels(cls).set(len(self._queues[cls]))
+        _ACTIVE_GAUGE.labels(cls).set(self._active[cls])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "classes": {
+                c: {"queued": len(self._queues[c]), "active": self._active[c], "weight": self.weights[c]}
+                for c in self._queues
+            },
+            "keys_active": len(self._per_key),
+        }
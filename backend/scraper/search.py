@@ -0,0 +1,127 @@
+"""Expand a search or wishlist page into the listings it links to.
+
+Listing ids come from ``/rooms/<id>`` links, ``listingId`` fields and the
+base64 ``StayListing:<id>`` relay ids used in search payloads. Pagination
+links (``items_offset`` / ``cursor``) found on each page are followed
+concurrently, breadth first, until ``max_pages`` or ``max_listings``.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import html as html_lib
+import re
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+from urllib.parse import parse_qsl, urljoin, urlsplit, urlunsplit
+
+_ROOM_LINK = re.compile(r"/rooms/(\d{3,})")
+_LISTING_ID = re.compile(r'"listingId"\s*:\s*"?(\d{3,})')
+# base64("StayListing:") / base64("DemandStayListing:") both end on a 3-byte boundary
+_RELAY_ID = re.compile(r"(?:U3RheUxpc3Rpbmc6|RGVtYW5kU3RheUxpc3Rpbmc6)[A-Za-z0-9+/]+={0,2}")
+_HREF = re.compile(r"""href\s*=\s*["']([^"']+)["']""", re.I)
+_PAGE_PARAMS = ("items_offset", "cursor", "section_offset", "page")
+
+
+def listing_ids(html: str) -> List[str]:
+    """Listing ids referenced by a search/wishlist page, in page order, deduped."""
+    seen: Dict[str, int] = {}
+    found = []
+    for m in _ROOM_LINK.finditer(html):
+        found.append((m.start(), m.group(1)))
+    for m in _LISTING_ID.finditer(html):
+        found.append((m.start(), m.group(1)))
+    for m in _RELAY_ID.finditer(html):
+        try:
+            decoded = base64.b64decode(m.group(0)).decode("ascii", "ignore")
+        except ValueError:
+            continue
+        rid = decoded.rpartition(":")[2]
+        if rid.isdigit():
+            found.append((m.start(), rid))
+    for pos, rid in sorted(found):
+        seen.setdefault(rid, pos)
+    return list(seen)
+
+
+def page_urls(html: str, url: str) -> List[str]:
+    """Pagination links on the same search path as ``url``."""
+    base = urlsplit(url)
+    out: List[str] = []
+    for m in _HREF.finditer(html):
+        href = urljoin(url, html_lib.unescape(m.group(1)))
+        parts = urlsplit(href)
+        if parts.netloc != base.netloc or parts.path != base.path:
+            continue
+        if not any(k in _PAGE_PARAMS for k, _ in parse_qsl(parts.query)):
+            continue
+        href = urlunsplit((parts.scheme, parts.netloc, parts.path, parts.query, ""))
+        if href not in out:
+            out.append(href)
+    return out
+
+
+def listing_url(search_url: str, room_id: str) -> str:
+    # Same host as the search, so locale domains (airbnb.fr, ...) are kept
+    p = urlsplit(search_url)
+    return f"{p.scheme or 'https'}://{p.netloc}/rooms/{room_id}"
+
+
+@dataclass
+class SearchExpansion:
+    url: str
+    max_pages: int = 15
+    max_listings: int = 300
+    concurrency: int = 3
+    pages: int = 0
+    listings: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    async def run(self, fetch: Callable[[str], Awaitable[str]]) -> AsyncIterator[str]:
+        """Yield listing URLs as pages come in; ``fetch`` returns a page's HTML."""
+        seen_pages: Set[str] = {self.url}
+        seen_ids: Set[str] = set()
+        frontier = [self.url]
+        sem = asyncio.Semaphore(max(1, self.concurrency))
+
+        async def load(page_url: str) -> Optional[str]:
+            async with sem:
+                try:
+                    return await fetch(page_url)
+                except Exception as e:
+                    self.errors.append(f"{page_url}: {str(e) or type(e).__name__}")
+                    return None
+
+        while frontier and self.pages < self.max_pages and self.listings < self.max_listings:
+            batch = frontier[: self.max_pages - self.pages]
+            frontier = []
+            tasks = [asyncio.create_task(load(u)) for u in batch]
+            try:
+                for fut, page_url in zip(tasks, batch):
+                    html = await fut
+                    self.pages += 1
+                    if not html:
+                        continue
+                    for rid in listing_ids(html):
+                        if rid in seen_ids:
+                            continue
+                        seen_ids.add(rid)
+                        self.listings += 1
+                        yield listing_url(self.url, rid)
+                        if self.listings >= self.max_listings:
+                            return
+                    for nxt in page_urls(html, page_url):
+                        if nxt not in seen_pages:
+                            seen_pages.add(nxt)
+                            frontier.append(nxt)
+            finally:
+                for t in tasks:
+                    t.cancel()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "search": self.url,
+            "pages": self.pages,
+            "listings": self.listings,
+            "errors": self.errors,
+        }
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+class StateBackend:
+    """Key/value store shared by rate limits, caches and in-flight dedupe.
+
+    Values are strings; ``ttl_s`` of None means no expiry.
+    """
+
+    async def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl_s: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    async def set_nx(self, key: str, value: str, ttl_s: Optional[float] = None) -> bool:
+        raise NotImplementedError
+
+    async def incr(self, key: str, amount: int = 1, ttl_s: Optional[float] = None) -> int:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        return None
+
+
+class MemoryBackend(StateBackend):
+    """Per-process store; least recently used keys are evicted past ``max_keys``."""
+
+    def __init__(self, sweep_every: int = 1024, max_keys: int = 50000) -> None:
+        self._data: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        self._sweep_every = sweep_every
+        self.max_keys = max_keys
+        self._writes = 0
+
+    def _write(self, key: str, value: str, expires: Optional[float]) -> None:
+        self._data[key] = (value, expires)
+        self._data.move_to_end(key)
+        self._writes += 1
+        if self._writes % self._sweep_every == 0:
+            now = time.monotonic()
+            for k in [k for k, (_, exp) in self._data.items() if exp is not None and exp <= now]:
+                del self._data[k]
+        while len(self._data) > self.max_keys:
+            self._data.popitem(last=False)
+
+    def _live(self, key: str) -> Optional[str]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and expires <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    @staticmethod
+    def _expiry(ttl_s: Optional[float]) -> Optional[float]:
+        return time.monotonic() + ttl_s if ttl_s else None
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._live(key)
+
+    async def set(self, key: str, value: str, ttl_s: Optional[float] = None) -> None:
+        self._write(key, value, self._expiry(ttl_s))
+
+    async def set_nx(self, key: str, value: str, ttl_s: Optional[float] = None) -> bool:
+        if self._live(key) is not None:
+            return False
+        self._write(key, value, self._expiry(ttl_s))
+        return True
+
+    async def incr(self, key: str, amount: int = 1, ttl_s: Optional[float] = None) -> int:
+        current = self._live(key)
+        if current is None:
+            self._write(key, str(amount), self._expiry(ttl_s))
+            return amount
+        value = int(current) + amount
+        self._data[key] = (str(value), self._data[key][1])
+        return value
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+
+class RedisBackend(StateBackend):
+    """Redis via ``redis.asyncio``: pooled connections, reconnects and reply parsing."""
+
+    def __init__(self, url: str, pool_size: int = 4, timeout_s: float = 2.0) -> None:
+        import redis.asyncio as redis  # deferred: only needed with a redis:// state backend
+
+        self._client = redis.from_url(
+            url,
+            decode_responses=True,
+            protocol=2,  # RESP2 also works with older Redis and compatible servers
+            max_connections=pool_size,
+            socket_timeout=timeout_s,
+            socket_connect_timeout=timeout_s,
+        )
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: str, ttl_s: Optional[float] = None) -> None:
+        await self._client.set(key, value, px=int(ttl_s * 1000) if ttl_s else None)
+
+    async def set_nx(self, key: str, value: str, ttl_s: Optional[float] = None) -> bool:
+        return bool(await self._client.set(key, value, nx=True, px=int(ttl_s * 1000) if ttl_s else None))
+
+    async def incr(self, key: str, amount: int = 1, ttl_s: Optional[float] = None) -> int:
+        value = int(await self._client.incrby(key, amount))
+        if ttl_s and value == amount:
+            await self._client.pexpire(key, int(ttl_s * 1000))
+        return value
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(key)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def backend_from_url(url: Optional[str]) -> StateBackend:
+    if url and url.startswith(("redis://", "rediss://")):
+        return RedisBackend(url)
+    return MemoryBackend(max_keys=int(os.getenv("STATE_MEMORY_MAX_KEYS", "50000")))
+
+
+_backend: Optional[StateBackend] = None
+
+
+def state_backend() -> StateBackend:
+    global _backend
+    if _backend is None:
+        _backend = backend_from_url(os.getenv("STATE_BACKEND_URL"))
+    return _backend
+
+
+def is_shared(backend: StateBackend) -> bool:
+    return not isinstance(backend, MemoryBackend)
+
+
+class ResultCache:
+    """TTL cache with in-flight dedupe on top of a :class:`StateBackend`.
+
+    Concurrent calls for the same key in one worker share a single producer task.
+    Across workers a short-lived lock key elects one producer while the
+    others poll the cache for its result, falling back to computing it
+    themselves if nothing appears within ``lock_ttl_s``.
+    """
+
+    def __init__(self, backend: StateBackend, namespace: str, ttl_s: float = 0, lock_ttl_s: float = 60.0) -> None:
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl_s = ttl_s
+        self.lock_ttl_s = lock_ttl_s
+        self._inflight: Dict[str, List[Any]] = {}
+        self._owner = uuid.uuid4().hex
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[str]:
+        if self.ttl_s <= 0:
+            return None
+        try:
+            return await self.backend.get(self._key(key))
+        except Exception:
+            return None
+
+    async def put(self, key: str, value: str) -> None:
+        if self.ttl_s <= 0:
+            return
+        try:
+            await self.backend.set(self._key(key), value, ttl_s=self.ttl_s)
+        except Exception:
+            pass
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        cached = await self.get(key)
+        if cached is not None:
+            return cached
+        # The producer runs as its own task so one caller going away does not
+        # cancel the others; it is cancelled only once nobody is waiting on it
+        entry = self._inflight.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(self._produce(key, compute))
+            entry = self._inflight[key] = [task, 0]
+        task = entry[0]
+        entry[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not task.done():
+                task.cancel()
+                if self._inflight.get(key) is entry:
+                    del self._inflight[key]
+
+    async def _produce(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        try:
+            return await self._compute_once(key, compute)
+        finally:
+            entry = self._inflight.get(key)
+            if entry is not None and entry[0] is asyncio.current_task():
+                del self._inflight[key]
+
+    async def _compute_once(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        lock_key = self._key(f"lock:{key}")
+        locked = False
+        if self.ttl_s > 0 and is_shared(self.backend):
+            try:
+                locked = await self.backend.set_nx(lock_key, self._owner, ttl_s=self.lock_ttl_s)
+            except Exception:
+                locked = True
+            if not locked:
+                deadline = time.monotonic() + self.lock_ttl_s
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(0.25)
+                    cached = await self.get(key)
+                    if cached is not None:
+                        return cached
+                    try:
+                        if await self.backend.get(lock_key) is None:
+                            break  # producer gave up without a result
+                    except Exception:
+                        break
+        try:
+            value = await compute()
+            await self.put(key, value)
+            return value
+        finally:
+            if locked:
+                try:
+                    await self.backend.delete(lock_key)
+                except Exception:
+                    pass
@@ -0,0 +1,237 @@
+"""Shared on-disk cache for static subresources (JS, CSS, fonts) across browser contexts.
+
+Every context starts with an empty HTTP cache, so each render would fetch the
+same bundles again. The route handler installed by ``enable_request_blocking``
+serves them from here instead. Only responses that are explicitly long-lived
+(``immutable`` or a ``max-age`` of a day or more) are stored. Eviction is
+least-recently-used by total size. The directory may be shared by several
+workers: hits touch the file's mtime and every store rescans the directory,
+so the size bound and recency order cover all of them. URLs found not to be
+cacheable are remembered for a while and left to the browser, instead of
+being proxied through the route on every request.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+
+_REQUESTS = Counter("scrappy_subresource_cache_total", "Static subresource lookups", ["result"])
+_BYTES_SAVED = Counter("scrappy_subresource_cache_bytes_saved_total", "Bytes served from the subresource cache")
+_BYTES = Gauge("scrappy_subresource_cache_bytes", "Bytes held by the subresource cache")
+
+CACHEABLE_TYPES = ("script", "stylesheet", "font")
+_MIN_MAX_AGE_S = 86400
+_MAX_AGE_RE = re.compile(r"(?:^|,)\s*(?:s-)?max-age\s*=\s*(\d+)")
+# Replayed verbatim; everything else (cookies, timing, CORS for the page origin) is dropped
+_KEEP_HEADERS = ("content-type", "cache-control", "access-control-allow-origin", "timing-allow-origin")
+
+
+def cache_lifetime(headers: Dict[str, str]) -> Optional[float]:
+    """Seconds a response may be reused, or None when it is not long-lived."""
+    cc = (headers.get("cache-control") or "").lower()
+    if not cc or "no-store" in cc or "private" in cc or "no-cache" in cc:
+        return None
+    m = _MAX_AGE_RE.search(cc)
+    max_age = int(m.group(1)) if m else 0
+    if "immutable" in cc:
+        return float(max(max_age, 365 * 86400))
+    return float(max_age) if max_age >= _MIN_MAX_AGE_S else None
+
+
+class SubresourceCache:
+    def __init__(
+        self,
+        root: Path,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_item_bytes: int = 8 * 1024 * 1024,
+        negative_ttl_s: float = 3600.0,
+        max_negative: int = 4096,
+    ) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self.negative_ttl_s = negative_ttl_s
+        self.max_negative = max_negative
+        self._index: Optional["OrderedDict[str, int]"] = None
+        self._total = 0
+        self._lock = threading.Lock()
+        # url -> expiry (monotonic) of responses that could not be stored
+        self._uncacheable: "OrderedDict[str, float]" = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "SubresourceCache":
+        return cls(
+            root=Path(os.getenv("SUBRESOURCE_CACHE_DIR", "/tmp/scrappy-subresources")),
+            max_bytes=int(float(os.getenv("SUBRESOURCE_CACHE_MB", "256")) * 1024 * 1024),
+            max_item_bytes=int(float(os.getenv("SUBRESOURCE_CACHE_MAX_ITEM_MB", "8")) * 1024 * 1024),
+            negative_ttl_s=float(os.getenv("SUBRESOURCE_NEGATIVE_TTL_S", "3600")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()[:40]
+
+    def _load_index(self, rescan: bool = False) -> "OrderedDict[str, int]":
+        # Caller holds self._lock; built from disk, oldest access (mtime) first
+        if self._index is None or rescan:
+            entries = []
+            if self.root.exists():
+                for p in self.root.glob("*.body"):
+                    try:
+                        st = p.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((st.st_mtime, p.stem, st.st_size))
+            entries.sort()
+            self._index = OrderedDict((k, size) for _, k, size in entries)
+            self._total = sum(self._index.values())
+            _BYTES.set(self._total)
+        return self._index
+
+    def _remove(self, key: str) -> None:
+        size = self._index.pop(key, 0) if self._index is not None else 0
+        self._total -= size
+        for ext in (".body", ".json"):
+            try:
+                (self.root / f"{key}{ext}").unlink()
+            except FileNotFoundError:
+                pass
+
+    def get_sync(self, url: str) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        key = self.key(url)
+        with self._lock:
+            index = self._load_index()
+            if key not in index:
+                return None
+            try:
+                meta = json.loads((self.root / f"{key}.json").read_text(encoding="utf-8"))
+                if meta.get("url") != url or meta.get("expires", 0) < time.time():
+                    self._remove(key)
+                    _BYTES.set(self._total)
+                    return None
+                body = (self.root / f"{key}.body").read_bytes()
+            except (OSError, ValueError):
+                self._remove(key)
+                _BYTES.set(self._total)
+                return None
+            index.move_to_end(key)
+            try:
+                os.utime(self.root / f"{key}.body")
+            except OSError:
+                pass
+        return int(meta.get("status", 200)), dict(meta.get("headers") or {}), body
+
+    def put_sync(self, url: str, status: int, headers: Dict[str, str], body: bytes) -> bool:
+        if status != 200 or not body or len(body) > self.max_item_bytes:
+            return False
+        lifetime = cache_lifetime(headers)
+        if lifetime is None:
+            return False
+        key = self.key(url)
+        kept = {k: v for k, v in headers.items() if k.lower() in _KEEP_HEADERS}
+        meta = {"url": url, "status": status, "headers": kept, "expires": time.time() + lifetime}
+        with self._lock:
+            # Other workers write to the same directory: size it from disk, not from our own puts
+            index = self._load_index(rescan=True)
+            if key in index:
+                self._remove(key)
+            self.root.mkdir(parents=True, exist_ok=True)
+            # Body first, then metadata: a torn write is a miss, never a corrupt hit
+            tmp = self.root / f"{key}.body.tmp"
+            tmp.write_bytes(body)
+            tmp.replace(self.root / f"{key}.body")
+            (self.root / f"{key}.json").write_text(json.dumps(meta), encoding="utf-8")
+            index[key] = len(body)
+            self._total += len(body)
+            while self._total > self.max_bytes and index:
+                self._remove(next(iter(index)))
+            _BYTES.set(self._total)
+        return True
+
+    async def get(self, url: str) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        hit = await asyncio.to_thread(self.get_sync, url)
+        _REQUESTS.labels("hit" if hit else "miss").inc()
+        if hit:
+            _BYTES_SAVED.inc(len(hit[2]))
+        return hit
+
+    async def put(self, url: str, status: int, headers: Dict[str, str], body: bytes) -> bool:
+        stored = await asyncio.to_thread(self.put_sync, url, status, headers, body)
+        _REQUESTS.labels("stored" if stored else "uncacheable").inc()
+        if not stored:
+            self._uncacheable[url] = time.monotonic() + self.negative_ttl_s
+            self._uncacheable.move_to_end(url)
+            while len(self._uncacheable) > self.max_negative:
+                self._uncacheable.popitem(last=False)
+        return stored
+
+    def known_uncacheable(self, url: str) -> bool:
+        expires = self._uncacheable.get(url)
+        if expires is None:
+            return False
+        if expires <= time.monotonic():
+            del self._uncacheable[url]
+            return False
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            index = self._load_index()
+            return {
+                "entries": len(index),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "uncacheable_urls": len(self._uncacheable),
+            }
+
+
+_cache: Optional[SubresourceCache] = None
+
+
+def subresource_cache() -> SubresourceCache:
+    global _cache
+    if _cache is None:
+        _cache = SubresourceCache.from_env()
+    return _cache
+
+
+async def serve_cached(route: Any, cache: Optional[SubresourceCache] = None) -> bool:
+    """Fulfil a static subresource from the cache, fetching and storing it on a miss.
+
+    Returns False when the request is not cacheable and the caller should continue it.
+    """
+    cache = cache or subresource_cache()
+    req = route.request
+    if not cache.enabled or req.method != "GET" or req.resource_type not in CACHEABLE_TYPES:
+        return False
+    url = req.url
+    if cache.known_uncacheable(url):
+        _REQUESTS.labels("skipped").inc()
+        return False
+    hit = await cache.get(url)
+    if hit is not None:
+        status, headers, body = hit
+        await route.fulfill(status=status, headers=headers, body=body)
+        return True
+    resp = await route.fetch()
+    body = await resp.body()
+    try:
+        await cache.put(url, resp.status, {k.lower(): v for k, v in resp.headers.items()}, body)
+    except OSError:
+        pass  # disk full or read-only: still serve the response
+    await route.fulfill(response=resp, body=body)
+    return True
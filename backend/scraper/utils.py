@@ -27,41 +27,18 @@ def deep_get(data: Any, path: Iterable[str], default: Any = None) -> Any:
 
 
 def find_first_listing_like(next_data: dict) -> Optional[dict]:
-    # Known paths
-    candidates = [
-        deep_get(next_data, ["props", "pageProps", "listing"]),
-        deep_get(
-            next_data,
-            [
-                "props",
-                "pageProps",
-                "bootstrapData",
-                "reduxData",
-                "homePDP",
-                "listingInfo",
-                "listing",
-            ],
-        ),
-    ]
-
-    for c in candidates:
-        if isinstance(c, dict) and c:
-            return c
-
-    # Apollo cache heuristic
-    apollo = deep_get(next_data, ["props", "pageProps", "__APOLLO_STATE__"]) or deep_get(
-        next_data, ["__APOLLO_STATE__"]
-    )
-    if isinstance(apollo, dict):
-        for k, v in apollo.items():
-            if isinstance(k, str) and k.lower().startswith("listing:") and isinstance(v, dict):
-                return v
-    return None
+    # Layout detection lives in scraper.layouts (cached per page template)
+    from .layouts import registry
+
+    listing = registry().resolve(next_data).listing
+    return listing or None
 
 
 def dedupe_photos(urls: Iterable[dict], min_side_px: int = 0, max_items: int = 25) -> List[dict]:
-    seen = set()
-    out: List[dict] = []
+    # Size variants of one CDN picture collapse to the largest, in first-seen order
+    from .photos import PhotoSet
+
+    photos = PhotoSet()
     for p in urls:
         url = p.get("url") or p.get("large") or p.get("xl_picture_url") or p.get("picture")
         if not url or url.startswith("data:"):
@@ -74,18 +51,8 @@ def dedupe_photos(urls: Iterable[dict], min_side_px: int = 0, max_items: int = 2
         height = p.get("height") or p.get("h")
         if width and height and min(width, height) < min_side_px:
             continue
-        if url in seen:
-            continue
-        seen.add(url)
-        out.append({
-            "url": url,
-            "width": width,
-            "height": height,
-            "caption": p.get("caption") or p.get("title") or p.get("alt"),
-        })
-        if len(out) >= max_items:
-            break
-    return out
+        photos.add(url, width, height, p.get("caption") or p.get("title") or p.get("alt"))
+    return photos.items()[:max_items]
 
 
 def is_airbnb_listing_url(url: str) -> bool:
@@ -123,23 +90,32 @@ def normalize_airbnb_url(input_url: str) -> str:
     return s
 
 
-async def canonicalize_airbnb_url(url: str, timeout_s: int = 8) -> str:
+async def canonicalize_airbnb_url(url: str, timeout_s: int = 8, strict: bool = False) -> str:
     """Attempt a lightweight network canonicalization.
 
     - Follows redirects using a plain HTTP client
     - If HTML is returned and contains a canonical link or a rooms path,
       prefer that as the canonical target
-    - Never raises; returns the original URL on failure
+    - Never raises unless ``strict``; returns the original URL on failure
     """
     try:
         import re
         import httpx
 
+        from .politeness import controller as politeness
+
+        ctl = politeness()
+        await ctl.acquire(url)
         async with httpx.AsyncClient(follow_redirects=True, timeout=timeout_s) as client:
-            resp = await client.get(url, headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            })
+            try:
+                resp = await client.get(url, headers={
+                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                })
+            except httpx.HTTPError:
+                ctl.observe(url, error=True)
+                raise
+            ctl.observe(url, status=resp.status_code, body=resp.text, retry_after=resp.headers.get("retry-after"))
             final_url = str(resp.url)
             # If we landed on a rooms URL already, return it
             if "/rooms/" in final_url:
@@ -160,4 +136,6 @@ async def canonicalize_airbnb_url(url: str, timeout_s: int = 8) -> str:
                 return "https://www.airbnb.com" + m3.group(1)
             return final_url or url
     except Exception:
+        if strict:
+            raise
         return url
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from prometheus_client import Gauge
+
+from .proxy_pool import proxy_pool
+
+if TYPE_CHECKING:
+    from .browser import BrowserManager
+
+_CONNECTED_GAUGE = Gauge("scrappy_browser_connected", "1 while the browser process is connected")
+_PAGES_GAUGE = Gauge("scrappy_browser_open_pages", "Pages open across all browser contexts")
+_AGE_GAUGE = Gauge("scrappy_browser_age_seconds", "Seconds since the current browser was launched")
+
+
+class BrowserWatchdog:
+    """Periodically checks the browser and asks the manager to replace it.
+
+    Reasons: ``disconnected`` (crash or killed), ``rss`` (Chromium RSS above
+    ``max_rss_bytes``) and ``age`` (older than ``max_age_s``, to shed slow leaks).
+    Each tick also probes quarantined proxies (throttled by the pool).
+    """
+
+    def __init__(
+        self,
+        manager: "BrowserManager",
+        interval_s: float = 10.0,
+        max_rss_bytes: Optional[int] = None,
+        max_age_s: Optional[float] = None,
+    ) -> None:
+        self.manager = manager
+        self.interval_s = interval_s
+        self.max_rss_bytes = max_rss_bytes
+        self.max_age_s = max_age_s
+        self.last_check: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls, manager: "BrowserManager") -> "BrowserWatchdog":
+        rss_mb = float(os.getenv("BROWSER_RESTART_RSS_MB", "0"))
+        max_age = float(os.getenv("BROWSER_MAX_AGE_S", str(6 * 3600)))
+        return cls(
+            manager,
+            interval_s=float(os.getenv("BROWSER_WATCHDOG_INTERVAL_S", "10")),
+            max_rss_bytes=int(rss_mb * 1024 * 1024) if rss_mb > 0 else None,
+            max_age_s=max_age if max_age > 0 else None,
+        )
+
+    def check(self) -> Optional[str]:
+        """Reason the browser should be replaced now, if any."""
+        health = self.manager.health()
+        self.last_check = health
+        _CONNECTED_GAUGE.set(1 if health["connected"] else 0)
+        _PAGES_GAUGE.set(health["pages"])
+        _AGE_GAUGE.set(health["age_s"] or 0)
+        if not health["started"]:
+            return None
+        if not health["connected"]:
+            return "disconnected"
+        rss = self.manager.rss_bytes()
+        if self.max_rss_bytes and rss is not None and rss > self.max_rss_bytes:
+            return "rss"
+        if self.max_age_s and (health["age_s"] or 0) > self.max_age_s:
+            return "age"
+        return None
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_s)
+            try:
+                await self.manager.refresh_rss()
+                reason = self.check()
+                if reason:
+                    await self.manager.restart(reason)
+                self.last_error = None
+                # Quarantined proxies get an active probe instead of waiting out their timer
+                await proxy_pool().probe_quarantined()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Relaunch failed; keep watching and try again next tick
+                self.last_error = f"{type(e).__name__}: {e}"[:300]
+
+    def ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_s": self.interval_s,
+            "max_rss_bytes": self.max_rss_bytes,
+            "max_age_s": self.max_age_s,
+            "last_error": self.last_error,
+        }
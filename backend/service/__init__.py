@@ -0,0 +1,5 @@
+__all__ = [
+    "compression",
+    "responses",
+    "warmup",
+]
@@ -0,0 +1,179 @@
+"""Negotiated response compression (zstd, br, gzip) as pure ASGI middleware.
+
+Buffered responses are compressed in one shot once they exceed
+``minimum_size``; streamed responses (``more_body``) are compressed per
+chunk with a sync flush so NDJSON lines reach the client as they are sent.
+brotli and zstd are used only when their packages are installed.
+"""
+from __future__ import annotations
+
+import os
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:  # optional
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover - depends on environment
+    brotli = None
+
+try:  # optional
+    import zstandard  # type: ignore
+except ImportError:  # pragma: no cover - depends on environment
+    zstandard = None
+
+# Never worth compressing again
+_SKIP_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip", "text/event-stream")
+
+
+class _Encoder:
+    def __init__(self, name: str, level: Optional[int] = None) -> None:
+        self.name = name
+        if name == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=level or 3).compressobj()
+        elif name == "br":
+            self._obj = brotli.Compressor(quality=level or 4)
+        else:
+            self._obj = zlib.compressobj(level or 6, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress and flush so the client can decode everything sent so far."""
+        if self.name == "zstd":
+            return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if self.name == "br":
+            return self._obj.process(data) + self._obj.flush()
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.name == "zstd":
+            return self._obj.compress(data) + self._obj.flush()
+        if self.name == "br":
+            return self._obj.process(data) + self._obj.finish()
+        return self._obj.compress(data) + self._obj.flush()
+
+
+def available_encodings() -> List[str]:
+    """Supported encodings in server preference order."""
+    out = []
+    if zstandard is not None:
+        out.append("zstd")
+    if brotli is not None:
+        out.append("br")
+    out.append("gzip")
+    return out
+
+
+def negotiate(accept_encoding: str, encodings: List[str]) -> Optional[str]:
+    """Pick an encoding from ``Accept-Encoding``; q-values first, then server order."""
+    weights: Dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+    best: Optional[Tuple[float, int, str]] = None
+    for rank, enc in enumerate(encodings):
+        q = weights.get(enc, weights.get("*", 0.0))
+        if q <= 0:
+            continue
+        cand = (q, -rank, enc)
+        if best is None or cand > best:
+            best = cand
+    return best[2] if best else None
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: Callable,
+        minimum_size: int = 1024,
+        encodings: Optional[List[str]] = None,
+        levels: Optional[Dict[str, int]] = None,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        supported = available_encodings()
+        self.encodings = [e for e in (encodings or supported) if e in supported]
+        self.levels = levels or {}
+
+    @classmethod
+    def options_from_env(cls) -> Dict[str, Any]:
+        raw = os.getenv("COMPRESSION_ENCODINGS", "")
+        return {
+            "minimum_size": int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
+            "encodings": [e.strip() for e in raw.split(",") if e.strip()] or None,
+        }
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for k, v in scope.get("headers") or []:
+            if k == b"accept-encoding":
+                accept = v.decode("latin-1")
+                break
+        encoding = negotiate(accept, self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Dict[str, Any]] = None
+        encoder: Optional[_Encoder] = None
+        passthrough = False
+
+        async def wrapped_send(message: Dict[str, Any]) -> None:
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                headers = {k.lower(): v for k, v in message.get("headers") or []}
+                ctype = headers.get(b"content-type", b"").decode("latin-1").lower()
+                passthrough = b"content-encoding" in headers or ctype.startswith(_SKIP_TYPES)
+                if passthrough:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if start is not None:
+                # First body message decides between one-shot and streaming
+                if not more and len(body) < self.minimum_size:
+                    await send(start)
+                    start = None
+                    passthrough = True
+                    await send(message)
+                    return
+                encoder = _Encoder(encoding, self.levels.get(encoding))
+                headers = []
+                vary = [b"Accept-Encoding"]
+                for k, v in start.get("headers") or []:
+                    if k.lower() == b"vary":
+                        vary.insert(0, v)
+                    elif k.lower() != b"content-length":
+                        headers.append((k, v))
+                headers.append((b"content-encoding", encoding.encode("latin-1")))
+                headers.append((b"vary", b", ".join(vary)))
+                if not more:
+                    data = encoder.finish(body)
+                    headers.append((b"content-length", str(len(data)).encode("latin-1")))
+                    await send({**start, "headers": headers})
+                    start = None
+                    await send({"type": "http.response.body", "body": data})
+                    return
+                await send({**start, "headers": headers})
+                start = None
+            assert encoder is not None
+            data = encoder.chunk(body) if more else encoder.finish(body)
+            await send({"type": "http.response.body", "body": data, "more_body": more})
+
+        await self.app(scope, receive, wrapped_send)
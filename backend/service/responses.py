@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import json
+from typing import Any, AsyncIterator
+
+from starlette.responses import StreamingResponse
+
+try:  # optional
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON; orjson when installed, stdlib otherwise."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class NDJSONResponse(StreamingResponse):
+    """Streams one JSON document per line as the iterator yields them."""
+
+    media_type = "application/x-ndjson"
+
+    def __init__(self, lines: AsyncIterator[bytes], **kw: Any) -> None:
+        super().__init__(lines, media_type=self.media_type, **kw)
+
+
+def sse_event(event: str, data: bytes, id: Any = None) -> bytes:
+    """One Server-Sent Events frame; ``data`` is a single-line JSON document."""
+    head = f"event: {event}\n" + (f"id: {id}\n" if id is not None else "")
+    return head.encode("utf-8") + b"data: " + data + b"\n\n"
+
+
+class EventStreamResponse(StreamingResponse):
+    """``text/event-stream`` with proxy buffering disabled (the compression middleware skips it too)."""
+
+    media_type = "text/event-stream"
+
+    def __init__(self, events: AsyncIterator[bytes], **kw: Any) -> None:
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **(kw.pop("headers", None) or {})}
+        super().__init__(events, media_type=self.media_type, headers=headers, **kw)
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+
+
+class WarmupState:
+    """Background warm-up of the amenity matcher and the browser, for ``/readyz``."""
+
+    def __init__(self, browser: bool = True, require_browser: bool = False) -> None:
+        self.browser_enabled = browser
+        self.require_browser = require_browser
+        self.matcher = False
+        self.browser: Optional[bool] = None
+        self.error: Optional[str] = None
+        self.done = False
+        self.seconds: Optional[float] = None
+
+    @classmethod
+    def from_env(cls) -> "WarmupState":
+        return cls(
+            browser=os.getenv("WARMUP_BROWSER", "1") == "1",
+            require_browser=os.getenv("READY_REQUIRES_BROWSER", "0") == "1",
+        )
+
+    async def run(self) -> None:
+        from ru_mapper.amenities import warm_up as warm_matcher
+
+        started = time.monotonic()
+        try:
+            await asyncio.to_thread(warm_matcher)
+            self.matcher = True
+            if self.browser_enabled:
+                from scraper.browser import BrowserManager
+
+                try:
+                    await BrowserManager.instance().warm_up()
+                    self.browser = True
+                except Exception as e:
+                    # No Chromium: requests still work through the httpx fallback
+                    self.browser = False
+                    first_line = (str(e).strip().splitlines() or [""])[0]
+                    self.error = f"{type(e).__name__}: {first_line}"[:300]
+        finally:
+            self.done = True
+            self.seconds = round(time.monotonic() - started, 3)
+
+    def ready(self) -> bool:
+        if not self.done or not self.matcher:
+            return False
+        return not (self.require_browser and not self.browser)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready(),
+            "matcher": self.matcher,
+            "browser": self.browser,
+            "warmup_done": self.done,
+            "warmup_seconds": self.seconds,
+            "error": self.error,
+        }
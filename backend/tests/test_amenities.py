@@ -1,3 +1,4 @@
+from ru_mapper import amenities
 from ru_mapper.amenities import normalize_amenities
 
 
@@ -17,3 +18,22 @@ def test_amenity_synonyms_fridge():
     items = ["Fridge", "Refrigerator", "mini fridge"]
     normalized = normalize_amenities(items)
     assert "Fridge" in normalized
+
+
+def test_table_cache_is_json_and_opt_in(monkeypatch, tmp_path):
+    monkeypatch.delenv("AMENITY_CACHE_DIR", raising=False)
+    assert amenities._cache_file("x") is None
+
+    monkeypatch.setenv("AMENITY_CACHE_DIR", str(tmp_path / "cache"))
+    amenities.tables.cache_clear()
+    try:
+        built = amenities.tables()
+        files = list((tmp_path / "cache").glob("*.json"))
+        assert len(files) == 1
+        amenities.tables.cache_clear()
+        assert amenities.tables().canonical == built.canonical
+        files[0].write_text("not json", encoding="utf-8")
+        amenities.tables.cache_clear()
+        assert amenities.tables().synonyms == built.synonyms
+    finally:
+        amenities.tables.cache_clear()
@@ -0,0 +1,42 @@
+import asyncio
+import gzip
+import os
+import time
+
+from scraper.artifacts import INDEX_NAME, ArtifactStore
+
+
+def test_writes_in_background_and_indexes_by_room(tmp_path):
+    root = tmp_path / "artifacts"
+
+    async def run():
+        store = ArtifactStore(root=root, compression="gzip")
+        assert store.submit(b"<html>blocked</html>", "https://www.airbnb.com/rooms/42", "html", "html", tag="blocked", room_id="42")
+        assert not root.exists()  # nothing touches disk on the request path
+        await store.close()
+        return store
+
+    store = asyncio.run(run())
+    (entry,) = store.lookup("42")
+    assert entry["tag"] == "blocked" and entry["file"].endswith(".html.gz")
+    assert gzip.decompress((root / entry["file"]).read_bytes()) == b"<html>blocked</html>"
+    assert store.lookup("43") == []
+
+
+def test_sampling_and_item_cap(tmp_path):
+    store = ArtifactStore(root=tmp_path, sample_rate=0.0, max_item_bytes=10)
+    assert store.should_capture(ok=False) and not store.should_capture(ok=True)
+    assert not store.submit(b"x" * 11, "u", "html", "html")
+
+
+def test_retention_by_age_then_size(tmp_path):
+    store = ArtifactStore(root=tmp_path, max_bytes=250, max_age_s=3600, compression="none")
+    now = time.time()
+    for i, age in enumerate([7200, 300, 200, 100]):
+        p = tmp_path / f"f{i}.html"
+        p.write_bytes(b"x" * 100)
+        os.utime(p, (now - age, now - age))
+    (tmp_path / INDEX_NAME).write_text("".join(f'{{"file": "f{i}.html", "room_id": "1"}}\n' for i in range(4)))
+    assert store.prune() == 2  # f0 too old, f1 over the size budget
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["f2.html", "f3.html", INDEX_NAME]
+    assert [e["file"] for e in store.lookup("1")] == ["f2.html", "f3.html"]
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from scraper.breakers import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+
+def test_opens_on_error_rate_then_half_open_probe_closes():
+    b = CircuitBreaker("t", min_calls=4, error_rate=0.5, open_s=0.05)
+    for ok in (True, False, True, False):
+        b.record(ok)
+    assert b.state == OPEN and not b.allow()
+
+    async def probe():
+        await asyncio.sleep(0.06)
+        async with b.guard():
+            assert b.state == HALF_OPEN
+            with pytest.raises(CircuitOpen):
+                async with b.guard():  # only one probe at a time
+                    pass
+
+    asyncio.run(probe())
+    assert b.state == CLOSED and b.allow()
+
+
+def test_failed_probe_reopens_and_slow_calls_count():
+    b = CircuitBreaker("t", min_calls=2, slow_call_s=1.0, slow_rate=0.5, open_s=0)
+    b.record(True, latency_s=2.0)
+    b.record(True, latency_s=0.1)
+    assert b.state == OPEN
+    assert b.allow() and b.state == HALF_OPEN
+    b.record(False)
+    assert b.state == OPEN
+
+
+def test_guard_records_exceptions_and_marked_failures_but_not_cancellation():
+    b = CircuitBreaker("t", min_calls=100)
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            async with b.guard():
+                raise RuntimeError("boom")
+        async with b.guard() as call:
+            call.fail()
+
+        async def slow():
+            async with b.guard():
+                await asyncio.sleep(5)
+
+        task = asyncio.create_task(slow())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert b.stats()["calls"] == 2 and b.stats()["errors"] == 2
@@ -0,0 +1,45 @@
+import asyncio
+
+from ru_mapper.schema import ExtractedListing
+from scraper.changes import (
+    ChangeRecord,
+    ChangeTracker,
+    content_hash,
+    diff_listings,
+    field_fingerprints,
+    room_id_from_url,
+    tracked_fields,
+)
+from scraper.state import MemoryBackend
+
+
+def test_room_id_and_stable_content_hash():
+    assert room_id_from_url("https://www.airbnb.com/rooms/123?adults=2") == "123"
+    assert room_id_from_url("https://www.airbnb.com/h/slug") is None
+    assert content_hash({"a": 1, "b": [1, 2]}) == content_hash({"b": [1, 2], "a": 1})
+    assert content_hash({"a": 1}) != content_hash({"a": 2})
+
+
+def test_field_level_diff_ignores_fetch_time():
+    old = ExtractedListing(title="Loft", bedrooms=1, base_price=80.0)
+    new = ExtractedListing(title="Loft", bedrooms=1, base_price=95.0)
+    assert "fetched_at" not in field_fingerprints(old)
+    moved = old.model_copy(update={"canonical_url": "https://www.airbnb.com/rooms/1?source_impression_id=x"})
+    assert diff_listings(old, moved) == {}
+    diff = diff_listings(old, new, field_fingerprints(old))
+    assert diff == {"base_price": {"old": 80.0, "new": 95.0}}
+    assert diff_listings(old, old.model_copy()) == {}
+
+
+def test_tracker_round_trip():
+    async def run():
+        tracker = ChangeTracker(MemoryBackend())
+        listing = ExtractedListing(title="Loft")
+        await tracker.put(ChangeRecord(room_id="7", content_hash="abc", etag='"v1"', fields=tracked_fields(listing)))
+        rec = await tracker.get("7")
+        assert rec.etag == '"v1"' and rec.checked_at > 0
+        assert rec.listing("https://www.airbnb.com/rooms/7").title == "Loft"
+        assert "photos" in rec.fields and "fetched_at" not in rec.fields
+        assert await tracker.get("8") is None
+
+    asyncio.run(run())
@@ -0,0 +1,100 @@
+import gzip
+import zlib
+
+import brotli
+import orjson
+import zstandard
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from service.compression import CompressionMiddleware, available_encodings, negotiate
+from service.responses import EventStreamResponse, dumps, sse_event
+
+BIG = "x" * 4000
+
+
+def _client(encodings=("gzip",)):
+    async def big(request):
+        return PlainTextResponse(BIG, headers={"Vary": "Origin"})
+
+    async def small(request):
+        return PlainTextResponse("ok")
+
+    async def stream(request):
+        async def lines():
+            for i in range(3):
+                yield dumps({"i": i}) + b"\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    async def events(request):
+        async def frames():
+            yield sse_event("listing", dumps({"title": BIG}), id=1)
+            yield sse_event("done", b"{}", id=2)
+
+        return EventStreamResponse(frames())
+
+    app = Starlette(
+        routes=[Route("/big", big), Route("/small", small), Route("/stream", stream), Route("/events", events)]
+    )
+    app.add_middleware(CompressionMiddleware, encodings=list(encodings))
+    return TestClient(app)
+
+
+def test_negotiate_respects_q_values_and_server_order():
+    assert negotiate("gzip, br", ["zstd", "br", "gzip"]) == "br"
+    assert negotiate("gzip;q=1, br;q=0.5", ["br", "gzip"]) == "gzip"
+    assert negotiate("identity", ["gzip"]) is None
+    assert negotiate("*;q=0.1", ["gzip"]) == "gzip"
+    assert negotiate("gzip;q=0", ["gzip"]) is None
+
+
+def test_buffered_and_small_responses():
+    c = _client()
+    r = c.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["vary"] == "Origin, Accept-Encoding"
+    assert int(r.headers["content-length"]) < 200 and r.text == BIG
+    r = c.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers and r.text == "ok"
+    r = c.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers
+
+
+def test_streamed_response_is_compressed_per_chunk():
+    c = _client()
+    with c.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as r:
+        assert r.headers["content-encoding"] == "gzip" and "content-length" not in r.headers
+        raw = b"".join(r.iter_raw())
+    assert gzip.decompress(raw) == b'{"i":0}\n{"i":1}\n{"i":2}\n'
+    # Each chunk is sync-flushed, so a prefix decodes on its own
+    d = zlib.decompressobj(31)
+    assert d.decompress(raw[: len(raw) // 2]).startswith(b'{"i":0}')
+
+
+def test_event_stream_is_not_compressed():
+    r = _client().get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers and r.headers["cache-control"] == "no-cache"
+    assert r.headers["content-type"].startswith("text/event-stream")
+    assert r.text.startswith("event: listing\nid: 1\ndata: {") and r.text.endswith("event: done\nid: 2\ndata: {}\n\n")
+
+
+def test_zstd_and_br_are_negotiated_when_installed():
+    assert available_encodings()[:2] == ["zstd", "br"]
+    c = _client(available_encodings())
+    r = c.get("/big", headers={"Accept-Encoding": "gzip, br, zstd"})
+    assert r.headers["content-encoding"] == "zstd"
+    r = c.get("/big", headers={"Accept-Encoding": "gzip, br"})
+    assert r.headers["content-encoding"] == "br"
+    with c.stream("GET", "/stream", headers={"Accept-Encoding": "br"}) as r:
+        raw = b"".join(r.iter_raw())
+    assert brotli.decompress(raw) == b'{"i":0}\n{"i":1}\n{"i":2}\n'
+    with c.stream("GET", "/stream", headers={"Accept-Encoding": "zstd"}) as r:
+        raw = b"".join(r.iter_raw())
+    assert zstandard.ZstdDecompressor().decompressobj().decompress(raw) == b'{"i":0}\n{"i":1}\n{"i":2}\n'
+
+
+def test_dumps_uses_orjson():
+    assert dumps({1: "a", "b": [1.5]}) == orjson.dumps({1: "a", "b": [1.5]}, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+
+from scraper.concurrency import AdaptiveLimiter
+
+
+def test_limiter_grows_when_saturated_and_healthy():
+    lim = AdaptiveLimiter(initial=2, min_limit=1, max_limit=4, target_latency_s=5.0, rss_probe=lambda: None)
+    for _ in range(10):
+        while lim.try_acquire():
+            pass
+        while lim.in_flight:
+            lim.release(latency_s=0.5)
+    assert lim.limit == 4
+
+
+def test_limiter_backs_off_on_timeouts_and_memory():
+    lim = AdaptiveLimiter(initial=6, min_limit=1, max_limit=8, rss_probe=lambda: None)
+    for _ in range(6):
+        lim.try_acquire()
+    for _ in range(6):
+        lim.release(latency_s=1.0, timeout=True)
+    assert lim.limit == 4
+
+    mem = AdaptiveLimiter(initial=4, rss_limit_bytes=100, rss_interval_s=0, rss_probe=lambda: 500)
+    asyncio.run(mem.refresh_rss())
+    for _ in range(4):
+        mem.try_acquire()
+    for _ in range(4):
+        mem.release(latency_s=0.1)
+    assert mem.limit == 2
+    assert mem.stats()["rss_bytes"] == 500
+
+
+def test_limiter_queues_waiters():
+    async def run():
+        lim = AdaptiveLimiter(initial=1, max_limit=1, rss_probe=lambda: None)
+        await lim.acquire()
+        waiter = asyncio.ensure_future(lim.acquire())
+        await asyncio.sleep(0)
+        assert lim.queued == 1
+        lim.release(latency_s=0.1)
+        await asyncio.wait_for(waiter, 1)
+        assert lim.in_flight == 1 and lim.queued == 0
+
+    asyncio.run(run())
+
+
+def test_release_never_probes_rss_on_the_event_loop():
+    probed = []
+
+    def probe():
+        probed.append(threading.current_thread() is threading.main_thread())
+        return 500
+
+    async def run():
+        lim = AdaptiveLimiter(initial=2, rss_limit_bytes=100, rss_interval_s=60, rss_probe=probe)
+        lim.try_acquire()
+        lim.release(latency_s=0.1)
+        assert lim.rss_bytes is None  # decided on the (empty) cache, refresh runs in the background
+        await lim._rss_task
+        assert lim.rss_bytes == 500
+        lim.try_acquire()
+        lim.release(latency_s=0.1)  # sample is fresh: no second probe
+
+    asyncio.run(run())
+    assert probed == [False]
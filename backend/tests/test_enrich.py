@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+import scraper.enrich as enrich
+from ru_mapper.schema import ExtractedListing, Photo
+from scraper.enrich import EnrichmentOrchestrator, clean_amenity_text, plan_enrichment
+
+
+def test_plan_follows_parse_and_fields():
+    weak = ExtractedListing(url="u")
+    assert plan_enrichment(weak).images and plan_enrichment(weak).amenities
+    assert not plan_enrichment(weak, fields=frozenset({"title"}))
+    rich = ExtractedListing(url="u", photos=[Photo(url=f"p{i}") for i in range(5)], amenities_raw=["Wifi"])
+    plan = plan_enrichment(rich, probe=True)
+    assert not plan.images and not plan.amenities and plan.probe
+
+
+def test_enrichments_run_concurrently_and_merge_partial(monkeypatch):
+    async def images(url, max_images=30, wait_seconds=1.5):
+        await asyncio.sleep(0.3)
+        return ["https://a.muscache.com/im/pictures/1.jpg"]
+
+    async def amenities(url, wait_seconds=1.0):
+        await asyncio.sleep(0.3)
+        return ["Wifi", "Kitchen"]
+
+    monkeypatch.setattr(enrich, "collect_images", images)
+    monkeypatch.setattr(enrich, "collect_amenities", amenities)
+    listing = ExtractedListing(url="u")
+    patches = []
+    started = time.monotonic()
+    asyncio.run(EnrichmentOrchestrator().run(listing, "u", on_patch=lambda stage, names: patches.append((stage, names))))
+    assert time.monotonic() - started < 0.55
+    assert sorted(patches) == [("amenities", ("amenities_raw", "amenities_normalized")), ("photos", ("photos",))]
+    assert [p.url for p in listing.photos] == ["https://a.muscache.com/im/pictures/1.jpg"]
+    assert listing.amenities_raw == ["Wifi", "Kitchen"]
+    assert "Wifi" in listing.amenities_normalized
+
+    async def stuck(url, **kw):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(enrich, "collect_images", stuck)
+    listing = ExtractedListing(url="u")
+    asyncio.run(EnrichmentOrchestrator(images_timeout_s=0.1).run(listing, "u"))
+    assert listing.photos == [] and listing.amenities_raw == ["Wifi", "Kitchen"]
+
+
+def test_clean_amenity_text():
+    assert clean_amenity_text("  Free \n parking ") == "Free parking"
+    assert clean_amenity_text("Show all 42 amenities") is None
+    assert clean_amenity_text("x" * 200) is None
+    assert clean_amenity_text("") is None
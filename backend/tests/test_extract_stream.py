@@ -0,0 +1,61 @@
+import asyncio
+
+import app
+from ru_mapper.schema import ExtractedListing
+from scraper.state import MemoryBackend, ResultCache
+
+
+def stub_scrape(monkeypatch, enrich):
+    fetches = []
+
+    async def resolve(url):
+        return url
+
+    async def fetch(url):
+        fetches.append(url)
+        await asyncio.sleep(0.05)
+        return "<html></html>"
+
+    monkeypatch.setattr(app, "resolve_listing_url", resolve)
+    monkeypatch.setattr(app, "fetch_listing_html", fetch)
+    monkeypatch.setattr(app, "extract_from_html", lambda html, url="", fields=None: ExtractedListing(url=url, title="T"))
+    monkeypatch.setattr(app, "save_html", lambda *a, **kw: False)
+    monkeypatch.setattr(app.ENRICHER, "run", enrich)
+    monkeypatch.setattr(app, "EXTRACT_CACHE", ResultCache(MemoryBackend(), "extract", ttl_s=60))
+    return fetches
+
+
+async def collect(url):
+    return [frame.split(b"\n", 1)[0].decode() async for frame in app.extract_events(url, None, False)]
+
+
+def test_stream_reports_enrichment_failure(monkeypatch):
+    async def enrich(listing, url, fields=None, on_patch=None):
+        raise RuntimeError("browser gone")
+
+    stub_scrape(monkeypatch, enrich)
+    url = "https://www.airbnb.com/rooms/1"
+    assert asyncio.run(collect(url)) == ["event: listing", "event: error"]
+    # The partial listing is not cached as if it were complete
+    assert asyncio.run(app.EXTRACT_CACHE.get(app.listing_cache_key(url, True, None))) is None
+
+
+def test_stream_shares_the_scrape_with_extract(monkeypatch):
+    async def enrich(listing, url, fields=None, on_patch=None):
+        listing.amenities_raw = ["Wifi"]
+        if on_patch:
+            on_patch("amenities", ("amenities_raw",))
+
+    fetches = stub_scrape(monkeypatch, enrich)
+    url = "https://www.airbnb.com/rooms/2"
+
+    async def run():
+        leader = asyncio.ensure_future(collect(url))
+        await asyncio.sleep(0.01)  # the stream starts the scrape; the others join it
+        return await asyncio.gather(leader, app.load_resolved_listing(url), collect(url))
+
+    leader, listing, follower = asyncio.run(run())
+    assert fetches == [url]
+    assert leader == ["event: listing", "event: patch", "event: done"]
+    assert follower == ["event: listing", "event: done"]
+    assert listing.amenities_raw == ["Wifi"]
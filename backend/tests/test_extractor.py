@@ -42,3 +42,14 @@ def test_normalize_airbnb_url_variants():
     }
     for raw, expected in cases.items():
         assert normalize_airbnb_url(raw) == expected
+
+
+def test_extract_with_field_projection():
+    nd = _load_json("sample_next_data.json")
+    full = extract_from_next_data(nd, url="https://example.test/rooms/1")
+    listing = extract_from_next_data(nd, url="https://example.test/rooms/1", fields={"title", "max_guests"})
+    assert listing.title == full.title and listing.max_guests == full.max_guests
+    assert listing.address.city is None and listing.amenities_normalized == []
+    # Normalized amenities can be requested without the raw list
+    only = extract_from_next_data(nd, fields={"amenities_normalized"})
+    assert only.amenities_normalized == full.amenities_normalized and only.amenities_raw == []
@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+from scraper.hedge import HedgedFetcher
+
+GOOD, BAD = "<listing>", "<challenge>"
+
+
+def validate(html):
+    return html == GOOD
+
+
+def path(result, delay):
+    async def fetch(url):
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return fetch
+
+
+def run(fetcher, cheap, browser, url="https://www.airbnb.com/rooms/1"):
+    return asyncio.run(fetcher.fetch(url, cheap, browser, validate))
+
+
+def test_fast_httpx_wins_without_launching_browser():
+    launched = []
+
+    async def browser(url):
+        launched.append(url)
+        return GOOD
+
+    assert run(HedgedFetcher(delay_s=1), path(GOOD, 0.01), browser) == GOOD
+    assert launched == []
+
+
+def test_slow_httpx_is_hedged_and_loser_cancelled():
+    cancelled = []
+
+    async def slow(url):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(url)
+            raise
+
+    async def main():
+        started = time.monotonic()
+        html = await HedgedFetcher(delay_s=0.05).fetch("https://h/rooms/1", slow, path(GOOD, 0.05), validate)
+        await asyncio.sleep(0)
+        return html, time.monotonic() - started
+
+    html, elapsed = asyncio.run(main())
+    assert html == GOOD and elapsed < 1 and cancelled == ["https://h/rooms/1"]
+
+
+def test_httpx_miss_marks_host_and_next_fetch_goes_to_the_browser_alone():
+    fetcher = HedgedFetcher(delay_s=10)
+    assert run(fetcher, path(BAD, 0.01), path(GOOD, 0.05)) == GOOD
+    assert fetcher.is_bad_host("https://airbnb.com/rooms/2")
+    cheap_calls = []
+
+    async def cheap(url):
+        cheap_calls.append(url)
+        return BAD
+
+    started = time.monotonic()
+    assert run(fetcher, cheap, path(GOOD, 0.05)) == GOOD
+    assert time.monotonic() - started < 1 and cheap_calls == []
+    # The browser missing as well gives httpx its turn, and a good page clears the mark
+    assert run(fetcher, path(GOOD, 0.01), path(None, 0.01)) == GOOD
+    assert not fetcher.is_bad_host("https://airbnb.com/rooms/3")
+
+
+def test_bad_hosts_are_bounded_and_expire():
+    fetcher = HedgedFetcher(bad_host_ttl_s=600, max_hosts=3)
+    for i in range(5):
+        fetcher._mark(f"https://h{i}.example/rooms/1", bad=True)
+    assert list(fetcher._bad_hosts) == ["h2.example", "h3.example", "h4.example"]
+    for host in ("h2.example", "h3.example"):
+        fetcher._bad_hosts[host] = 0.0  # expired
+    fetcher._mark("https://h5.example/rooms/1", bad=False)
+    assert list(fetcher._bad_hosts) == ["h4.example"]
+
+
+def test_fallbacks_when_nothing_validates():
+    fetcher = HedgedFetcher(delay_s=0.01)
+    assert run(fetcher, path(BAD, 0.01), path(None, 0.01)) == BAD
+    try:
+        run(fetcher, path(RuntimeError("down"), 0.01), path(None, 0.01))
+    except RuntimeError as e:
+        assert str(e) == "down"
+    else:
+        raise AssertionError("expected the httpx error")
@@ -0,0 +1,38 @@
+from scraper.extractor import extract_from_next_data
+from scraper.layouts import Layout, LayoutRegistry, BUILTIN_LAYOUTS, register_layout, registry
+
+
+def _pdp(listing, build="b1"):
+    return {"props": {"pageProps": {"listing": listing}}, "page": "/rooms/[id]", "buildId": build}
+
+
+def test_layout_detection_is_cached_per_template():
+    reg = LayoutRegistry(BUILTIN_LAYOUTS)
+    apollo = {"props": {"pageProps": {"__APOLLO_STATE__": {"ROOT_QUERY": {}, "Listing:9": {"name": "A"}}}}, "page": "/rooms/[id]", "buildId": "x"}
+    assert reg.resolve(apollo).layout.name == "apollo"
+    assert reg.resolve(apollo).listing == {"name": "A"}
+    assert reg.stats()["template_hits"] == 1 and reg.stats()["template_misses"] == 1
+    # Same template, different layout: falls back to detection
+    assert reg.resolve(_pdp({"name": "B"}, build="x")).layout.name == "pdp"
+    assert reg.resolve({"nothing": 1}).listing == {}
+
+
+def test_learned_path_falls_back_when_lookup_misses():
+    reg = LayoutRegistry(BUILTIN_LAYOUTS)
+    r = reg.resolve(_pdp({"personCapacity": 4}))
+    assert r.get("max_guests") == 4 and r.learned["max_guests"] == 1
+    r = reg.resolve(_pdp({"maxGuests": 2}))
+    assert r.get("max_guests") == 2 and r.learned["max_guests"] == 0
+
+
+def test_registered_layout_takes_part_in_extraction():
+    def locate(nd):
+        return (nd.get("props") or {}).get("stayData")
+
+    register_layout(Layout("stay", locate, paths={"title": [("heading", "text")], "max_guests": [("guests",)]}))
+    try:
+        nd = {"props": {"stayData": {"heading": {"text": "Sea view"}, "guests": "5"}}, "page": "/stays/[id]"}
+        listing = extract_from_next_data(nd, url="https://example.test/stays/1")
+        assert listing.title == "Sea view" and listing.max_guests == 5
+    finally:
+        registry().unregister("stay")
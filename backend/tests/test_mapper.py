@@ -1,5 +1,14 @@
-from ru_mapper.mapping import map_property_type_to_ru, map_room_type_to_ru, map_to_ru
-from ru_mapper.schema import ExtractedListing, RUPropertyType, RURoomType
+import pytest
+
+from ru_mapper.mapping import (
+    map_property_type_to_ru,
+    map_property_types_to_ru,
+    map_room_type_to_ru,
+    map_to_ru,
+    ru_source_fields,
+)
+from ru_mapper.property_types import KeywordAutomaton
+from ru_mapper.schema import RU_FIELD_ALIASES, ExtractedListing, RUListing, RUPropertyType, RURoomType, select_fields
 
 
 def test_map_room_type_enum():
@@ -7,6 +16,15 @@ def test_map_room_type_enum():
     assert map_room_type_to_ru("private_room") == RURoomType.PRIVATE_ROOM
     assert map_room_type_to_ru("shared_room") == RURoomType.SHARED_ROOM
     assert map_room_type_to_ru("hotel_room") == RURoomType.HOTEL_ROOM
+    assert map_room_type_to_ru(" Entire home/apt ") == RURoomType.ENTIRE_PLACE
+    assert map_room_type_to_ru("castle") is None
+
+
+def test_map_room_type_display_aliases():
+    assert map_room_type_to_ru("Entire home") == RURoomType.ENTIRE_PLACE
+    assert map_room_type_to_ru("Entire place") == RURoomType.ENTIRE_PLACE
+    assert map_room_type_to_ru("entire  home/apt") == RURoomType.ENTIRE_PLACE
+    assert map_room_type_to_ru("Entire\thome") == RURoomType.ENTIRE_PLACE
 
 
 def test_map_property_type_keywords():
@@ -16,6 +34,34 @@ def test_map_property_type_keywords():
     assert map_property_type_to_ru("unknown type") == RUPropertyType.OTHER
 
 
+def test_map_property_type_priorities():
+    assert map_property_type_to_ru("Entire townhome") == RUPropertyType.TOWNHOUSE
+    assert map_property_type_to_ru("Tiny home") == RUPropertyType.HOUSE
+    assert map_property_type_to_ru("Guest  house") == RUPropertyType.GUESTHOUSE
+    assert map_property_type_to_ru("Serviced apartment in hotel") == RUPropertyType.APARTMENT
+    assert map_property_type_to_ru("Room in boutique hostel") == RUPropertyType.HOSTEL
+    assert map_property_type_to_ru("") == RUPropertyType.OTHER
+
+
+def test_map_property_types_batch():
+    labels = ["Condo", None, "Bungalow", "Condo", "Entire villa"]
+    assert map_property_types_to_ru(labels) == [
+        RUPropertyType.CONDO,
+        RUPropertyType.OTHER,
+        RUPropertyType.BUNGALOW,
+        RUPropertyType.CONDO,
+        RUPropertyType.VILLA,
+    ]
+
+
+def test_keyword_automaton_overlapping_keywords():
+    ac = KeywordAutomaton([("he", 1, "low"), ("she", 2, "mid"), ("hers", 3, "high")])
+    assert ac.best("ushers") == "high"
+    assert ac.best("ashe") == "mid"
+    assert ac.best("the") == "low"
+    assert ac.best("xyz") is None
+
+
 essential = {
     "title": "Test listing",
     "description": "Nice place",
@@ -36,3 +82,15 @@ def test_map_to_ru_basic():
     assert ru.property_type == RUPropertyType.APARTMENT
     assert ru.room_type == RURoomType.ENTIRE_PLACE
     assert "Wifi" in ru.amenities
+
+
+def test_map_to_ru_field_projection():
+    fields = select_fields("property_name,capacity", RUListing, RU_FIELD_ALIASES)
+    assert fields == {"property_name", "bedrooms", "beds", "bathrooms", "max_guests"}
+    assert ru_source_fields(fields) == {"title", "bedrooms", "beds", "bathrooms", "max_guests"}
+    ru = map_to_ru(ExtractedListing(**essential), fields)
+    assert ru.property_name == "Test listing" and ru.beds == 3
+    assert ru.amenities == [] and ru.property_type is None
+    assert select_fields(" ", RUListing) is None
+    with pytest.raises(ValueError):
+        select_fields(["bogus"], RUListing)
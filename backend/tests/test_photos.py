@@ -0,0 +1,119 @@
+import asyncio
+import struct
+
+import httpx
+
+from scraper.photos import DimensionProber, canonical_photo_url, collapse_variants, image_size
+from scraper.state import MemoryBackend
+from scraper.utils import dedupe_photos
+
+PIC = "https://a0.muscache.com/im/pictures/abc.jpg"
+
+
+def test_canonical_url_and_variant_collapse():
+    assert canonical_photo_url(PIC + "?im_w=720") == PIC
+    assert canonical_photo_url("http://A0.muscache.com/im/pictures/abc.jpg?aki_policy=large&x=1") == PIC + "?x=1"
+    assert canonical_photo_url("https://example.com/a.jpg?w=1#top") == "https://example.com/a.jpg?w=1"
+    urls = [PIC + "?im_w=720", "https://example.com/b.jpg", PIC + "?im_w=1200", PIC + "?im_w=320"]
+    assert collapse_variants(urls) == [PIC + "?im_w=1200", "https://example.com/b.jpg"]
+
+
+def test_dedupe_photos_collapses_size_variants():
+    raw = [
+        {"url": PIC + "?im_w=720", "caption": "Living"},
+        {"url": PIC + "?im_w=1440"},
+        {"url": "https://a0.muscache.com/im/pictures/other.jpg"},
+    ]
+    out = dedupe_photos(raw)
+    assert [p["url"] for p in out] == [PIC + "?im_w=1440", "https://a0.muscache.com/im/pictures/other.jpg"]
+    assert out[0]["caption"] == "Living"
+
+
+def _png(w, h):
+    return b"\x89PNG\r\n\x1a\n" + b"\x00\x00\x00\rIHDR" + struct.pack(">II", w, h) + b"\x08\x02\x00\x00\x00"
+
+
+def _jpeg(w, h):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, h, w, 3) + b"\x00" * 3
+    return b"\xff\xd8" + app0 + sof
+
+
+def test_image_size_headers():
+    assert image_size(_png(800, 600)) == (800, 600)
+    assert image_size(_jpeg(1200, 900)) == (1200, 900)
+    assert image_size(b"GIF89a" + struct.pack("<HH", 5, 7)) == (5, 7)
+    assert image_size(b"not an image") is None
+
+
+def test_prober_uses_range_requests_and_cache():
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers.get("range"))
+        return httpx.Response(206, content=_jpeg(1024, 683))
+
+    async def run():
+        prober = DimensionProber(MemoryBackend())
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            assert await prober.dimensions(client, PIC) == (1024, 683)
+            assert await prober.dimensions(client, PIC) == (1024, 683)
+
+    asyncio.run(run())
+    assert seen == ["bytes=0-65535"]
+
+
+def test_prober_treats_cache_failures_as_miss():
+    class Down(MemoryBackend):
+        async def get(self, key):
+            raise ConnectionError("state backend down")
+
+        async def set(self, key, value, ttl_s=None):
+            raise ConnectionError("state backend down")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(206, content=_jpeg(640, 480))
+
+    async def run():
+        bad = MemoryBackend()
+        await bad.set(f"photo:dim:{PIC}", "not json")
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            assert await DimensionProber(Down()).dimensions(client, PIC) == (640, 480)
+            assert await DimensionProber(bad).dimensions(client, PIC) == (640, 480)
+
+    asyncio.run(run())
+
+
+def test_prober_does_not_cache_transient_failures():
+    answers = [httpx.Response(503), httpx.Response(206, content=_jpeg(800, 600), headers={"content-type": "image/jpeg"})]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return answers.pop(0)
+
+    async def run():
+        backend = MemoryBackend()
+        prober = DimensionProber(backend)
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            assert await prober.dimensions(client, PIC) is None
+            assert await backend.get(f"photo:dim:{PIC}") is None
+            assert await prober.dimensions(client, PIC) == (800, 600)
+
+    asyncio.run(run())
+    assert answers == []
+
+
+def test_prober_caches_definitive_misses():
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path)
+        return httpx.Response(404)
+
+    async def run():
+        prober = DimensionProber(MemoryBackend())
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            assert await prober.dimensions(client, PIC) is None
+            assert await prober.dimensions(client, PIC) is None
+
+    asyncio.run(run())
+    assert len(seen) == 1
@@ -0,0 +1,54 @@
+from prometheus_client import REGISTRY
+
+from scraper.anti_bot import looks_blocked
+from scraper.politeness import PolitenessController, host_key
+
+
+def test_looks_blocked_signals():
+    assert looks_blocked(429)
+    assert looks_blocked(200, "<html><div id='px-captcha'></div></html>")
+    assert not looks_blocked(200, "<html><title>Loft</title></html>")
+    assert not looks_blocked(None)
+    # A captcha widget on a normal page (login modal) is not a block
+    page = "<html><script id='__NEXT_DATA__'>{}</script><div class='g-recaptcha'></div>" + "x" * 30000 + "</html>"
+    assert not looks_blocked(200, page)
+    assert looks_blocked(200, "<html><div class='h-captcha'></div></html>")
+
+
+def test_rate_adapts_to_blocks_and_success():
+    ctl = PolitenessController(initial_rate=1.0, max_rate=2.0, burst=1.0, increase=0.5, base_backoff_s=4.0)
+    url = "https://www.airbnb.com/rooms/1"
+    assert host_key(url) == "airbnb.com"
+    assert ctl.delay_for(url) == 0
+
+    ctl.observe(url, status=429, retry_after="10")
+    st = ctl.stats()["airbnb.com"]
+    assert st["rate"] == 0.5
+    assert 9.0 < st["blocked_for_s"] <= 10.0
+    assert ctl.delay_for("https://airbnb.com/rooms/2") > 9.0
+
+    ctl.observe(url, status=200)
+    ctl.observe(url, status=200)
+    assert ctl.stats()["airbnb.com"]["rate"] == 1.5
+    assert ctl.stats()["airbnb.com"]["failures"] == 0
+
+
+def test_other_hosts_are_unaffected():
+    ctl = PolitenessController()
+    ctl.observe("https://a.example/x", status=429)
+    assert ctl.delay_for("https://b.example/y") == 0
+
+
+def test_metric_labels_are_bounded():
+    ctl = PolitenessController(base_backoff_s=0.01, metric_hosts=["www.airbnb.com"])
+
+    def blocks(host):
+        return REGISTRY.get_sample_value("scrappy_host_blocks_total", {"host": host}) or 0
+
+    before = blocks("other"), blocks("airbnb.com")
+    ctl.observe("https://www.airbnb.com/rooms/1", 429)
+    for i in range(3):
+        ctl.observe(f"https://spam{i}.example/rooms/1", 429)
+    assert (blocks("other"), blocks("airbnb.com")) == (before[0] + 3, before[1] + 1)
+    assert blocks("spam0.example") == 0
+    assert "spam0.example" in ctl.stats()
@@ -0,0 +1,38 @@
+import json
+
+from scraper.profiles import ProfileLease, ProfileStore, report_navigation, reset_current_lease, set_current_lease
+
+STATE = {"cookies": [{"name": "consent", "value": "1", "domain": ".airbnb.com", "path": "/"}], "origins": []}
+
+
+def test_capture_then_attach_and_persist(tmp_path):
+    store = ProfileStore(tmp_path, max_profiles=1)
+    assert store.choose() is None and store.wants_capture()
+    prof = store.capture(STATE)
+    assert json.loads(prof.path.read_text()) == STATE
+    assert not store.wants_capture() and store.capture(STATE) is None
+    assert store.choose() is prof and prof.uses == 1
+    # A new process picks the profile up from disk
+    assert ProfileStore(tmp_path, max_profiles=1).choose().name == prof.name
+
+
+def test_rotation_by_uses_and_invalidation(tmp_path):
+    store = ProfileStore(tmp_path, max_profiles=1, max_uses=2, max_failures=2)
+    prof = store.capture(STATE)
+    store.choose()
+    store.choose()
+    assert store.choose() is None and not prof.path.exists()  # used up, slot freed
+
+    prof = store.capture(STATE)
+    for _ in range(2):
+        lease = ProfileLease(store.choose())
+        token = set_current_lease(lease)
+        report_navigation(False)
+        reset_current_lease(token)
+        store.release(lease)
+    assert store.stats()["profiles"] == 0 and not prof.path.exists()
+
+
+def test_disabled_store(tmp_path):
+    store = ProfileStore(tmp_path, max_profiles=0)
+    assert store.choose() is None and not store.wants_capture()
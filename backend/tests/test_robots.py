@@ -0,0 +1,127 @@
+import asyncio
+
+import httpx
+import pytest
+
+from scraper import politeness as politeness_mod
+from scraper.politeness import PolitenessController, host_key
+from scraper.robots import RobotsCache, RobotsDisallowed, RobotsGate, RobotsPolicy, _target, parse_robots
+
+ROBOTS = """
+User-agent: *
+Disallow: /s/
+Allow: /s/homes
+Disallow: /*.json$
+Crawl-delay: 2
+
+# ours
+User-agent: other-bot
+User-agent: air-scrappy
+Disallow: /wishlists
+Crawl-delay: 5
+"""
+
+
+def test_star_group_longest_match_and_wildcards():
+    policy = parse_robots(ROBOTS, "googlebot")
+    assert policy.allowed("/rooms/123")
+    assert not policy.allowed("/s/paris")
+    assert policy.allowed("/s/homes?x=1")
+    assert not policy.allowed("/api/data.json")
+    assert policy.allowed("/api/data.json?v=2")
+    assert policy.crawl_delay == 2
+
+
+def test_specific_group_replaces_star():
+    policy = parse_robots(ROBOTS, "Air-Scrappy")
+    assert policy.allowed("/s/paris")
+    assert not policy.allowed("/wishlists/1")
+    assert policy.crawl_delay == 5
+
+
+def test_group_names_are_not_substring_matched():
+    text = "User-agent: a\nUser-agent: mozilla\nDisallow: /\n\nUser-agent: *\nDisallow: /private\n"
+    policy = parse_robots(text, "air-scrappy")
+    assert policy.allowed("/rooms/1")
+    assert not policy.allowed("/private/x")
+
+
+def test_allow_wins_ties_and_empty_disallow():
+    assert RobotsPolicy([("/a", False), ("/a", True)]).allowed("/a/b")
+    assert parse_robots("User-agent: *\nDisallow:\n", "x").allowed("/anything")
+    assert RobotsPolicy.disallow_all().allowed("/robots.txt")
+
+
+class FakeCache(RobotsCache):
+    def __init__(self, result, **kwargs):
+        super().__init__(**kwargs)
+        self.result = result
+        self.downloads = 0
+
+    async def _download(self, url):
+        self.downloads += 1
+        await asyncio.sleep(0.01)
+        return self.result, self.ttl_s
+
+
+def test_cache_shares_downloads_and_feeds_crawl_delay(monkeypatch):
+    ctl = PolitenessController()
+    monkeypatch.setattr(politeness_mod, "_controller", ctl)
+    cache = FakeCache(parse_robots(ROBOTS, "air-scrappy"), max_crawl_delay_s=3)
+
+    async def go():
+        return await asyncio.gather(*(cache.allowed(f"https://www.airbnb.com/rooms/{i}") for i in range(5)))
+
+    assert asyncio.run(go()) == [True] * 5
+    assert cache.downloads == 1
+    assert ctl._state(host_key("https://www.airbnb.com/")).min_interval == 3
+    assert not asyncio.run(cache.allowed("https://www.airbnb.com/wishlists/9"))
+    assert cache.downloads == 1
+
+
+def test_cache_expires_after_ttl():
+    cache = FakeCache(RobotsPolicy.allow_all(404), ttl_s=0)
+    asyncio.run(cache.policy("https://a.example/x"))
+    asyncio.run(cache.policy("https://a.example/y"))
+    assert cache.downloads == 2
+
+
+def test_gate_modes():
+    url = "https://www.airbnb.com/rooms/1"
+    deny = RobotsPolicy.disallow_all(503)
+    with pytest.raises(RobotsDisallowed):
+        asyncio.run(RobotsGate(FakeCache(deny), "enforce").ensure_allowed(url))
+    asyncio.run(RobotsGate(FakeCache(deny), "warn").ensure_allowed(url))
+    off = FakeCache(deny)
+    asyncio.run(RobotsGate(off, "off").ensure_allowed(url))
+    assert off.downloads == 0
+    report = asyncio.run(RobotsGate(FakeCache(deny), "warn").check(url))
+    assert report["robots_url"] == "https://www.airbnb.com/robots.txt"
+    assert report["status"] == 503 and report["allowed"] is False
+
+
+def test_target_drops_listing_query_and_tracking_params():
+    assert _target("https://www.airbnb.com/rooms/1?adults=2&check_in=2024-01-01") == "/rooms/1"
+    assert _target("https://www.airbnb.com/s/Paris/homes?utm_source=x&fbclid=y") == "/s/Paris/homes"
+    assert _target("https://www.airbnb.com/s/Paris/homes?items_offset=18&gclid=z") == "/s/Paris/homes?items_offset=18"
+    assert RobotsGate(FakeCache(RobotsPolicy.allow_all())).mode == "warn"
+
+
+def test_unreachable_robots_allows_and_retries_sooner(monkeypatch):
+    class Down:
+        def __init__(self, **kwargs):
+            pass
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def get(self, url):
+            raise httpx.ConnectError("down")
+
+    monkeypatch.setattr(httpx, "AsyncClient", Down)
+    cache = RobotsCache(retry_s=7, error_ttl_s=300)
+    policy, ttl = asyncio.run(cache._download("https://www.airbnb.com/rooms/1"))
+    assert policy.allowed("/rooms/1") and ttl == 7
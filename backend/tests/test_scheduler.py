@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from scraper.concurrency import AdaptiveLimiter
+from scraper.breakers import CircuitBreaker
+from scraper.scheduler import BULK, INTERACTIVE, QueueTimeout, RenderScheduler, clamp_priority
+
+
+def _scheduler(limit=1, **kw):
+    lim = AdaptiveLimiter(initial=limit, min_limit=limit, max_limit=limit, rss_probe=lambda: None)
+    return RenderScheduler(lim, **kw)
+
+
+def test_interactive_overtakes_bulk_backlog():
+    async def run():
+        sched = _scheduler(weights={INTERACTIVE: 4.0, BULK: 1.0})
+        order = []
+
+        async def job(cls, tag):
+            got = await sched.acquire(cls)
+            order.append(tag)
+            await asyncio.sleep(0)
+            sched.release(got)
+
+        holder = await sched.acquire(BULK)
+        tasks = [asyncio.ensure_future(job(BULK, f"b{i}")) for i in range(6)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.ensure_future(job(INTERACTIVE, "i0")))
+        await asyncio.sleep(0)
+        assert sched.stats()["classes"][BULK]["queued"] == 6
+        sched.release(holder)
+        await asyncio.gather(*tasks)
+        return order
+
+    order = asyncio.run(run())
+    assert order.index("i0") <= 1
+    assert len(order) == 7
+
+
+def test_per_key_quota_and_max_wait():
+    async def run():
+        sched = _scheduler(limit=2, max_wait_s={INTERACTIVE: 0.05, BULK: 0.05}, per_key_limit=1)
+        await sched.acquire(INTERACTIVE, key="a")
+        with pytest.raises(QueueTimeout):
+            await sched.acquire(INTERACTIVE, key="a")
+        # Another key still gets the free slot
+        await sched.acquire(INTERACTIVE, key="b")
+        assert sched.stats()["keys_active"] == 2
+
+    asyncio.run(run())
+
+
+def test_clamp_priority_per_endpoint():
+    assert clamp_priority(None) == INTERACTIVE
+    assert clamp_priority("Bulk") == BULK
+    assert clamp_priority("interactive", BULK) == BULK
+    assert clamp_priority(None, BULK) == BULK
+
+
+def test_cancelled_grant_releases_without_latency_sample():
+    async def run():
+        sched = _scheduler(limit=1)
+        samples = []
+        sched.limiter._record = lambda *a: samples.append(a)
+        holder = await sched.acquire(INTERACTIVE)
+        waiter = asyncio.ensure_future(sched.acquire(INTERACTIVE))
+        await asyncio.sleep(0)
+        sched.release(holder)  # grants the waiter's future, then it is cancelled before resuming
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert len(samples) == 1 and sched.limiter._in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_queue_timeout_is_not_a_breaker_failure():
+    async def run():
+        circuit = CircuitBreaker("playwright", min_calls=1, error_rate=0.5)
+        with pytest.raises(QueueTimeout):
+            async with circuit.guard():
+                raise QueueTimeout("busy")
+        assert circuit.state == "closed" and circuit.stats()["calls"] == 0
+
+    asyncio.run(run())
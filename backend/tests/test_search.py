@@ -0,0 +1,39 @@
+import asyncio
+import base64
+
+from loadtest.mock_site import MockConfig, render_search
+from scraper.search import SearchExpansion, listing_ids, page_urls
+
+
+def test_listing_ids_from_links_and_relay_ids():
+    relay = base64.b64encode(b"StayListing:987654").decode()
+    html = f'<a href="/rooms/12345?x=1">a</a> {{"listingId":"555555"}} "id":"{relay}" <a href="/rooms/12345">b</a>'
+    assert listing_ids(html) == ["12345", "555555", "987654"]
+
+
+def test_page_urls_same_search_only():
+    html = '<a href="/s/Paris/homes?items_offset=18&amp;cursor=abc">2</a><a href="/s/Rome/homes?items_offset=18">x</a><a href="/help">h</a>'
+    assert page_urls(html, "https://www.airbnb.com/s/Paris/homes") == [
+        "https://www.airbnb.com/s/Paris/homes?items_offset=18&cursor=abc"
+    ]
+
+
+def test_expansion_follows_pagination_and_dedupes():
+    cfg = MockConfig(search_results=50)
+    base = "http://mock"
+    fetched = []
+
+    async def fetch(url):
+        fetched.append(url)
+        offset = int(url.split("items_offset=")[1].split("&")[0]) if "items_offset=" in url else 0
+        return render_search("Paris", offset, base, cfg)
+
+    async def run(**kw):
+        exp = SearchExpansion(f"{base}/s/Paris/homes", **kw)
+        return exp, [u async for u in exp.run(fetch)]
+
+    exp, urls = asyncio.run(run())
+    assert len(urls) == len(set(urls)) == 50 and exp.pages == 3
+    assert all(u.startswith("http://mock/rooms/") for u in urls)
+    exp, urls = asyncio.run(run(max_listings=20))
+    assert len(urls) == 20
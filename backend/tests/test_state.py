@@ -0,0 +1,152 @@
+import asyncio
+import time
+
+from scraper.state import MemoryBackend, RedisBackend, ResultCache
+
+
+class _StandInRedis:
+    """Just enough of the Redis protocol for the backend's commands."""
+
+    def __init__(self):
+        self.data = {}
+
+    def _get(self, key):
+        item = self.data.get(key)
+        if item and item[1] is not None and item[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return item
+
+    def execute(self, args):
+        cmd = args[0].upper()
+        if cmd == "GET":
+            item = self._get(args[1])
+            return item[0] if item else None
+        if cmd == "SET":
+            key, value, rest = args[1], args[2], [a.upper() for a in args[3:]]
+            if "NX" in rest and self._get(key):
+                return None
+            expires = None
+            if "PX" in rest:
+                expires = time.monotonic() + int(args[3 + rest.index("PX") + 1]) / 1000
+            self.data[key] = (value, expires)
+            return "+OK"
+        if cmd == "INCRBY":
+            item = self._get(args[1])
+            value = int(item[0] if item else 0) + int(args[2])
+            self.data[args[1]] = (str(value), item[1] if item else None)
+            return value
+        if cmd == "PEXPIRE":
+            value, _ = self.data[args[1]]
+            self.data[args[1]] = (value, time.monotonic() + int(args[2]) / 1000)
+            return 1
+        if cmd == "DEL":
+            return 1 if self.data.pop(args[1], None) else 0
+        return "-ERR unknown command"
+
+    async def handle(self, reader, writer):
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            args = []
+            for _ in range(int(line[1:])):
+                n = int((await reader.readline())[1:])
+                args.append((await reader.readexactly(n + 2))[:-2].decode())
+            reply = self.execute(args)
+            if reply is None:
+                writer.write(b"$-1\r\n")
+            elif isinstance(reply, int):
+                writer.write(b":%d\r\n" % reply)
+            elif reply.startswith(("+", "-")):
+                writer.write(reply.encode() + b"\r\n")
+            else:
+                writer.write(b"$%d\r\n%s\r\n" % (len(reply.encode()), reply.encode()))
+            await writer.drain()
+        writer.close()
+
+
+async def _exercise(backend):
+    assert await backend.get("k") is None
+    await backend.set("k", "v")
+    assert await backend.get("k") == "v"
+    assert await backend.set_nx("k", "other") is False
+    assert await backend.set_nx("lock", "me", ttl_s=0.05) is True
+    await asyncio.sleep(0.1)
+    assert await backend.get("lock") is None
+    assert await backend.incr("hits", ttl_s=10) == 1
+    assert await backend.incr("hits", 2) == 3
+    await backend.delete("k")
+    assert await backend.get("k") is None
+
+
+def test_memory_backend():
+    asyncio.run(_exercise(MemoryBackend()))
+
+
+def test_memory_backend_evicts_least_recently_used():
+    async def run():
+        backend = MemoryBackend(max_keys=2)
+        await backend.set("a", "1")
+        await backend.set("b", "2")
+        assert await backend.get("a") == "1"
+        await backend.set("c", "3")
+        assert await backend.get("b") is None
+        assert await backend.get("a") == "1" and await backend.get("c") == "3"
+
+    asyncio.run(run())
+
+
+def test_redis_backend_against_stand_in():
+    async def run():
+        stand_in = _StandInRedis()
+        server = await asyncio.start_server(stand_in.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        backend = RedisBackend(f"redis://127.0.0.1:{port}/0")
+        try:
+            await _exercise(backend)
+        finally:
+            await backend.close()
+            server.close()
+
+    asyncio.run(run())
+
+
+def test_result_cache_dedupes_inflight_and_caches():
+    async def run():
+        cache = ResultCache(MemoryBackend(), "t", ttl_s=60)
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "listing"
+
+        results = await asyncio.gather(*[cache.get_or_compute("room:1", compute) for _ in range(5)])
+        assert results == ["listing"] * 5
+        assert await cache.get_or_compute("room:1", compute) == "listing"
+        return calls
+
+    assert asyncio.run(run()) == 1
+
+
+def test_result_cache_cancelled_caller_does_not_cancel_others():
+    async def run():
+        cache = ResultCache(MemoryBackend(), "t", ttl_s=60)
+        started = asyncio.Event()
+
+        async def compute():
+            started.set()
+            await asyncio.sleep(0.05)
+            return "listing"
+
+        first = asyncio.create_task(cache.get_or_compute("room:2", compute))
+        await started.wait()
+        second = asyncio.create_task(cache.get_or_compute("room:2", compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "listing"
+        assert first.cancelled()
+
+    asyncio.run(run())
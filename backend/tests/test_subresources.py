@@ -0,0 +1,102 @@
+import asyncio
+import os
+
+from scraper.subresources import SubresourceCache, cache_lifetime, serve_cached
+
+IMMUTABLE = {"content-type": "text/javascript", "cache-control": "public, max-age=31536000, immutable", "set-cookie": "a=b"}
+
+
+def test_cache_lifetime():
+    assert cache_lifetime(IMMUTABLE) == 31536000
+    assert cache_lifetime({"cache-control": "max-age=600"}) is None
+    assert cache_lifetime({"cache-control": "private, max-age=31536000"}) is None
+    assert cache_lifetime({}) is None
+
+
+def test_lru_eviction_by_size(tmp_path):
+    cache = SubresourceCache(tmp_path, max_bytes=25)
+    assert cache.put_sync("https://a/1.js", 200, IMMUTABLE, b"x" * 10)
+    assert cache.put_sync("https://a/2.js", 200, IMMUTABLE, b"y" * 10)
+    assert cache.get_sync("https://a/1.js")[2] == b"x" * 10  # 1.js is now most recent
+    assert cache.put_sync("https://a/3.js", 200, IMMUTABLE, b"z" * 10)
+    assert cache.get_sync("https://a/2.js") is None
+    status, headers, body = cache.get_sync("https://a/3.js")
+    assert status == 200 and body == b"z" * 10 and "set-cookie" not in headers
+    assert not cache.put_sync("https://a/4.js", 200, {"cache-control": "no-store"}, b"w")
+    # Index is rebuilt from disk by a fresh instance
+    assert SubresourceCache(tmp_path, max_bytes=25).stats()["entries"] == 2
+
+
+def test_size_bound_covers_other_workers(tmp_path):
+    a = SubresourceCache(tmp_path, max_bytes=25)
+    b = SubresourceCache(tmp_path, max_bytes=25)
+    assert a.put_sync("https://a/1.js", 200, IMMUTABLE, b"x" * 10)
+    os.utime(tmp_path / f"{a.key('https://a/1.js')}.body", (1, 1))
+    assert b.put_sync("https://a/2.js", 200, IMMUTABLE, b"y" * 10)
+    assert a.put_sync("https://a/3.js", 200, IMMUTABLE, b"z" * 10)
+    assert sum(p.stat().st_size for p in tmp_path.glob("*.body")) <= 25
+    assert a.get_sync("https://a/1.js") is None
+    assert b.get_sync("https://a/1.js") is None
+
+
+class FakeRequest:
+    method = "GET"
+    resource_type = "script"
+    url = "https://a0.muscache.com/bundle.js"
+
+
+class FakeResponse:
+    status = 200
+    headers = IMMUTABLE
+
+    def __init__(self, headers=None):
+        if headers is not None:
+            self.headers = headers
+
+    async def body(self):
+        return b"console.log(1)"
+
+
+class FakeRoute:
+    request = FakeRequest()
+
+    def __init__(self, headers=None):
+        self.headers = headers
+        self.fetches = 0
+        self.fulfilled = []
+
+    async def fetch(self):
+        self.fetches += 1
+        return FakeResponse(self.headers)
+
+    async def fulfill(self, **kw):
+        self.fulfilled.append(kw)
+
+
+def test_route_served_from_cache_on_second_request(tmp_path):
+    cache = SubresourceCache(tmp_path)
+
+    async def run():
+        first, second = FakeRoute(), FakeRoute()
+        assert await serve_cached(first, cache)
+        assert await serve_cached(second, cache)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.fetches == 1 and second.fetches == 0
+    assert second.fulfilled[0]["body"] == b"console.log(1)"
+
+
+def test_uncacheable_url_is_left_to_the_browser(tmp_path):
+    cache = SubresourceCache(tmp_path)
+    short = {"content-type": "text/javascript", "cache-control": "max-age=60"}
+
+    async def run():
+        first, second = FakeRoute(short), FakeRoute(short)
+        assert await serve_cached(first, cache)
+        assert not await serve_cached(second, cache)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.fetches == 1 and second.fetches == 0 and not second.fulfilled
+    assert cache.stats()["uncacheable_urls"] == 1
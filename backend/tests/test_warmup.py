@@ -0,0 +1,18 @@
+import asyncio
+
+from ru_mapper.amenities import normalize_amenities, tables
+from service.warmup import WarmupState
+
+
+def test_ready_after_matcher_warmup_without_browser():
+    state = WarmupState(browser=False)
+    assert not state.ready()
+    asyncio.run(state.run())
+    assert state.ready() and state.matcher and state.browser is None
+    assert WarmupState(browser=False, require_browser=True).ready() is False
+
+
+def test_amenity_tables_are_cached():
+    assert tables() is tables()
+    assert "Wifi" in tables().canonical_set
+    assert normalize_amenities(["wireless internet", "Wifi"]) == ["Wifi"]
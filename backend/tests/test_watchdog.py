@@ -0,0 +1,191 @@
+import asyncio
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+import scraper.browser as browser_mod
+from scraper.browser import BrowserManager
+from scraper.watchdog import BrowserWatchdog
+
+
+class FakePage:
+    async def route(self, *args, **kwargs):
+        pass
+
+    async def wait_for_selector(self, selector, timeout=None):
+        raise PlaywrightTimeoutError("Timeout exceeded")
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.pages = []
+
+    async def new_page(self):
+        self.pages.append(FakePage())
+        return self.pages[-1]
+
+    async def close(self):
+        self.browser.contexts.remove(self)
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.closed = False
+        self.contexts = []
+        self.handlers = {}
+
+    def is_connected(self):
+        return self.connected
+
+    def on(self, event, fn):
+        self.handlers[event] = fn
+
+    async def new_context(self, **kwargs):
+        ctx = FakeContext(self)
+        self.contexts.append(ctx)
+        return ctx
+
+    async def close(self):
+        self.closed = True
+        self.connected = False
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.launched = []
+        self.chromium = self
+
+    async def launch(self, **kwargs):
+        self.launched.append(FakeBrowser())
+        return self.launched[-1]
+
+    async def stop(self):
+        pass
+
+
+def make_manager():
+    mgr = BrowserManager()
+    mgr._playwright = FakePlaywright()
+    mgr.drain_timeout_s = 2
+    return mgr
+
+
+def test_watchdog_reasons():
+    async def main():
+        mgr = make_manager()
+        dog = BrowserWatchdog(mgr, max_rss_bytes=100, max_age_s=3600)
+        assert dog.check() is None  # not started yet
+        await mgr.start()
+        mgr._limiter._rss_probe = lambda: 50
+        await mgr.refresh_rss()
+        assert dog.check() is None
+        mgr._limiter._rss_probe = lambda: 500
+        await mgr.refresh_rss()
+        assert dog.check() == "rss"
+        mgr._limiter._rss_probe = lambda: 50
+        await mgr.refresh_rss()
+        mgr._launched_at -= 7200
+        assert dog.check() == "age"
+        mgr._browser.connected = False
+        assert dog.check() == "disconnected"
+        await mgr.stop()
+
+    asyncio.run(main())
+
+
+def test_restart_drains_in_flight_contexts():
+    async def main():
+        mgr = make_manager()
+        await mgr.start()
+        old = mgr._browser
+        entered, release = asyncio.Event(), asyncio.Event()
+
+        async def render():
+            async with mgr.context():
+                entered.set()
+                await release.wait()
+
+        task = asyncio.create_task(render())
+        await entered.wait()
+        restart = asyncio.create_task(mgr.restart("rss"))
+        await asyncio.sleep(0.2)
+        # New browser is live; the old one waits for the render to finish
+        assert mgr._browser is not old and not old.closed
+        assert mgr.health()["draining"] == 1
+        release.set()
+        await task
+        await restart
+        assert old.closed
+        health = mgr.health()
+        assert health["generation"] == 2 and health["restarts"] == {"rss": 1}
+        assert health["draining"] == 0
+        # A stale generation is ignored
+        await mgr.restart("disconnected", gen=1)
+        assert mgr.health()["generation"] == 2
+        await mgr.stop()
+
+    asyncio.run(main())
+
+
+def test_disconnect_event_triggers_restart():
+    async def main():
+        mgr = make_manager()
+        await mgr.start()
+        old = mgr._browser
+        old.connected = False
+        old.handlers["disconnected"]()
+        await asyncio.sleep(0.1)
+        assert mgr._browser is not old and mgr._connected()
+        assert mgr.health()["restarts"] == {"disconnected": 1}
+        await mgr.stop()
+
+    asyncio.run(main())
+
+
+def test_failed_relaunch_keeps_old_browser_and_driver():
+    async def main():
+        mgr = make_manager()
+        await mgr.start()
+        old, driver = mgr._browser, mgr._playwright
+        stopped = []
+
+        async def broken_launch(**kwargs):
+            raise RuntimeError("chromium crashed")
+
+        async def stop():
+            stopped.append(True)
+
+        driver.launch, driver.stop = broken_launch, stop
+        try:
+            await mgr.restart("rss")
+        except RuntimeError:
+            pass
+        assert mgr._browser is old and mgr._playwright is driver and not stopped
+        assert not old.closed
+
+    asyncio.run(main())
+
+
+def test_next_data_timeout_reaches_the_limiter(monkeypatch):
+    async def main():
+        mgr = make_manager()
+        releases = []
+        real_release = mgr._scheduler.release
+
+        def release(*args, **kwargs):
+            releases.append(kwargs)
+            real_release(*args, **kwargs)
+
+        async def goto(page, url, **kwargs):
+            return None
+
+        monkeypatch.setattr(mgr._scheduler, "release", release)
+        monkeypatch.setattr(BrowserManager, "instance", classmethod(lambda cls: mgr))
+        monkeypatch.setattr(browser_mod, "polite_goto", goto)
+        assert await browser_mod.render_and_get_next_data("https://www.airbnb.com/rooms/1", timeout_s=1) is None
+        await mgr.stop()
+        return releases
+
+    releases = asyncio.run(main())
+    assert releases and releases[0]["timeout"] is True and releases[0]["ok"] is False